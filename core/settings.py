@@ -49,6 +49,7 @@ THIRD_PARTY_APPS = [
     "drf_yasg",
     "dj_rest_auth",
     "rest_framework",
+    "django_filters",
     "django_extensions",
     "rest_framework.authtoken",
     "rest_framework_simplejwt",
@@ -62,6 +63,8 @@ CUSTOM_APPS =[
 INSTALLED_APPS = CUSTOM_APPS + THIRD_PARTY_APPS + DJANGO_APPS
 
 MIDDLEWARE = [
+    'schedule_manager.middleware.InstrumentationMiddleware',
+    'schedule_manager.middleware.ReplicaRoutingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -118,17 +121,55 @@ else:
             "PASSWORD": os.environ.get("PASSWORD"),
             "HOST": os.environ.get("HOST"),
             "PORT": os.environ.get("PORT"),
+            # Reuse connections across requests, checking them before reuse
+            "CONN_MAX_AGE": int(os.environ.get("CONN_MAX_AGE", 60)),
+            "CONN_HEALTH_CHECKS": True,
         }
     }
 
+# Read replicas: comma separated hosts (database files with SQLite), each
+# configured like the primary under a "replica_<n>" alias. Tests read them
+# through the primary's test database.
+DATABASE_REPLICAS = []
+for index, location in enumerate(filter(None, os.environ.get("DATABASE_REPLICAS", "").split(","))):
+    alias = f"replica_{index}"
+    location_key = "NAME" if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3" else "HOST"
+    DATABASES[alias] = {**DATABASES["default"], location_key: location, "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ["schedule_manager.routers.ReplicaRouter"]
+
+# Seconds a user's reads stay on the primary after they write, longer than the replica lag
+DATABASE_REPLICA_PIN_SECONDS = 5
+
+# Cache (use a shared backend such as Redis in production so schedule versions are shared between processes)
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.environ.get("CACHE_LOCATION", ""),
+    }
+}
+
 # RESTful Settings
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "dj_rest_auth.jwt_auth.JWTCookieAuthentication",
+        "schedule_manager.auth.authentication.CachedJWTCookieAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 25,
+    # orjson with the same bytes as the DRF JSON renderer, MessagePack for embedded devices
+    "DEFAULT_RENDERER_CLASSES": (
+        "schedule_manager.renderers.FastJSONRenderer",
+        "schedule_manager.renderers.MessagePackRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    "DEFAULT_PARSER_CLASSES": (
+        "schedule_manager.parsers.FastJSONParser",
+        "schedule_manager.parsers.MessagePackParser",
+        "rest_framework.parsers.FormParser",
+        "rest_framework.parsers.MultiPartParser",
+    ),
 }
 
 # JWT authentication
@@ -137,11 +178,21 @@ SIMPLE_JWT = {
     "REFRESH_TOKEN_LIFETIME": timedelta(days=100),  # Note: This is just for testing purposes
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
-    "UPDATE_LAST_LOGIN": True,
+    # last_login is written in batches by CustomTokenObtainPairSerializer instead
+    "UPDATE_LAST_LOGIN": False,
     "TOKEN_OBTAIN_SERIALIZER": "schedule_manager.auth.serializers.CustomTokenObtainPairSerializer",
     "TOKEN_REFRESH_SERIALIZER": "schedule_manager.auth.serializers.CustomCookieTokenRefreshSerializer",
 }
 
+# Bloom filter of blacklisted refresh tokens. Tokens blacklisted by other
+# processes are picked up every JWT_BLACKLIST_FILTER_SYNC_INTERVAL seconds.
+JWT_BLACKLIST_FILTER_CAPACITY = 1_000_000
+JWT_BLACKLIST_FILTER_ERROR_RATE = 0.001
+JWT_BLACKLIST_FILTER_SYNC_INTERVAL = 1
+# Seconds a blacklisting transaction may stay open. Syncs read the IDs skipped
+# below recent rows again until then, in case they commit late.
+JWT_BLACKLIST_FILTER_GAP_TIMEOUT = 60
+
 REST_AUTH = {
     "USE_JWT": True,
     "JWT_AUTH_SECURE": True,
@@ -222,3 +273,49 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Custom User Model
 AUTH_USER_MODEL = "schedule_manager.User"
+
+# Schedule Manager
+SCHEDULE_BULK_MAX_OPERATIONS = 5000
+# Rows validated and committed per transaction by schedule imports, and rejected rows kept per import
+SCHEDULE_IMPORT_CHUNK_SIZE = 2000
+SCHEDULE_IMPORT_MAX_ERRORS = 1000
+# Chunks imported per upload request, larger files are uploaded again to resume
+SCHEDULE_IMPORT_REQUEST_CHUNKS = 5
+SCHEDULE_RESPONSE_CACHE_SIZE = 512
+# Cached responses smaller than this are not compressed
+SCHEDULE_COMPRESSION_MIN_BYTES = 512
+SCHEDULE_COVERAGE_MAX_CAMERAS = 1000
+
+# Reject schedules overlapping another schedule of the user on a shared camera or badge
+SCHEDULE_OVERLAP_DETECTION = os.environ.get("SCHEDULE_OVERLAP_DETECTION") == "True"
+
+# Server-Sent Events feed (seconds unless noted). Streams end after
+# SCHEDULE_STREAM_MAX_SECONDS and clients reconnect with Last-Event-ID.
+SCHEDULE_STREAM_HEARTBEAT = 15
+SCHEDULE_STREAM_MAX_SECONDS = 300
+SCHEDULE_STREAM_RETRY_MS = 3000
+# A missing event ID may belong to a write transaction still open (a bulk,
+# compaction or import batch). Streams wait this long before skipping it.
+SCHEDULE_STREAM_GAP_TIMEOUT = 60
+SCHEDULE_EVENT_RETENTION = 24 * 60 * 60
+
+# Deleted schedules are kept as tombstones for delta sync this many seconds
+# before purge_schedule_tombstones removes them
+SCHEDULE_TOMBSTONE_RETENTION = 30 * 24 * 60 * 60
+# Delta sync cursors stay this many seconds behind, longer than the slowest
+# write transaction (a bulk, compaction or import batch) takes to commit
+SCHEDULE_CHANGES_SETTLE_SECONDS = 60
+
+# Authenticated users cached in process (seconds for the TTL)
+USER_CACHE_SIZE = 10000
+USER_CACHE_TTL = 60
+
+# last_login/last_logout_at updates are buffered and written in one UPDATE
+# once this many users are pending or the oldest is this many seconds old
+USER_TIMESTAMP_FLUSH_SIZE = 500
+USER_TIMESTAMP_FLUSH_INTERVAL = 5
+
+# Per-request SQL and latency instrumentation, scraped from /api/metrics.
+# Set SCHEDULE_METRICS_TOKEN to require "Authorization: Bearer <token>".
+SCHEDULE_INSTRUMENTATION = os.environ.get("SCHEDULE_INSTRUMENTATION") == "True"
+SCHEDULE_METRICS_TOKEN = os.environ.get("SCHEDULE_METRICS_TOKEN", "")
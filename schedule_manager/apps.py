@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class ScheduleManagerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'schedule_manager'
+
+    def ready(self):
+        """Connect the model signal handlers and register the system checks."""
+        import schedule_manager.checks  # noqa: F401
+        import schedule_manager.signals  # noqa: F401
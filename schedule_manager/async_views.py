@@ -0,0 +1,245 @@
+import time
+import asyncio
+from functools import wraps
+from django.db.models import Q
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from rest_framework import exceptions
+from rest_framework.utils.urls import replace_query_param
+from django.http import (
+    HttpResponse,
+    HttpResponseNotAllowed,
+    HttpResponseNotModified,
+    StreamingHttpResponse
+)
+from schedule_manager.models import Schedule
+from schedule_manager.filters import ScheduleFilter
+from schedule_manager.renderers import encode_json
+from schedule_manager.routers import pin_if_recently_changed
+from schedule_manager.pagination import (
+    ScheduleCursorPagination,
+    decode_keyset_cursor,
+    encode_keyset_cursor
+)
+from schedule_manager.utils.grouping import agroup_schedules_by_day
+from schedule_manager.utils.events import (
+    afetch_events,
+    ais_expired,
+    alatest_event_id,
+    format_event,
+    get_event_bus
+)
+from schedule_manager.utils.representation import represent_schedule_row
+from schedule_manager.auth.authentication import CachedJWTCookieAuthentication
+from schedule_manager.utils.cache import (
+    SCHEDULE_SCOPE,
+    aget_version,
+    is_not_modified,
+    version_headers
+)
+
+SCHEDULE_FIELDS = ("start", "stop", "badge_ids", "camera_ids")
+
+# Tells a resuming client its events were pruned and it must refetch
+RESET_EVENT = "event: reset\ndata: {}\n\n"
+
+# Retry soon when the next event ID may still be committing
+GAP_RETRY_SECONDS = 0.5
+
+authentication = CachedJWTCookieAuthentication()
+
+
+def _json_response(data, status=200) -> HttpResponse:
+    """Return compact JSON, encoded like the DRF JSON renderer."""
+    content = encode_json(data)
+    return HttpResponse(content, status=status, content_type="application/json")
+
+
+def _unauthorized(request, detail) -> HttpResponse:
+    """Return a 401 response shaped like the DRF exception handler's."""
+    data = detail if isinstance(detail, (list, dict)) else {"detail": str(detail)}
+    response = _json_response(data, status=401)
+    response["WWW-Authenticate"] = authentication.authenticate_header(request)
+    return response
+
+
+async def _authenticate(request):
+    """Authenticate the request, returning the 401 response when it fails."""
+    try:
+        result = await authentication.aauthenticate(request)
+    except exceptions.AuthenticationFailed as error:
+        return _unauthorized(request, error.detail)
+
+    if result is None:
+        return _unauthorized(request, exceptions.NotAuthenticated.default_detail)
+
+    request.user, request.auth = result
+    return None
+
+
+def async_schedule_view(view):
+    """
+    Run an async, read-only schedule view behind JWT authentication, with
+    the same ETag/Last-Modified handling as the synchronous views.
+    """
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method != "GET":
+            return HttpResponseNotAllowed(["GET"])
+
+        response = await _authenticate(request)
+        if response is not None:
+            return response
+
+        version = await aget_version(SCHEDULE_SCOPE)
+        pin_if_recently_changed(version)
+        if is_not_modified(request, SCHEDULE_SCOPE, version):
+            response = HttpResponseNotModified()
+        else:
+            response = await view(request, *args, **kwargs)
+
+        for header, value in version_headers(SCHEDULE_SCOPE, version).items():
+            response[header] = value
+        return response
+
+    return wrapper
+
+
+def _filter_schedules(request):
+    """Return the filtered schedules, or the filter errors."""
+    filterset = ScheduleFilter(request.GET, queryset=Schedule.objects.all())
+    if not filterset.is_valid():
+        return None, filterset.errors
+    return filterset.qs, None
+
+
+@async_schedule_view
+async def schedule_list(request):
+    """List schedules newest first with keyset pagination on (created_at, id)."""
+    queryset, errors = _filter_schedules(request)
+    if errors:
+        return _json_response(errors, status=400)
+
+    try:
+        page_size = int(request.GET.get("page_size", settings.REST_FRAMEWORK["PAGE_SIZE"]))
+    except ValueError:
+        page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    page_size = min(max(page_size, 1), ScheduleCursorPagination.max_page_size)
+
+    cursor = request.GET.get("cursor")
+    if cursor:
+        try:
+            created_at, schedule_id = decode_keyset_cursor(cursor)
+        except ValueError:
+            return _json_response({"detail": "Invalid cursor"}, status=404)
+        queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=schedule_id))
+
+    rows = queryset.order_by("-created_at", "-id").values_list("id", "created_at", *SCHEDULE_FIELDS)
+    page = [row async for row in rows[:page_size + 1]]
+
+    next_link = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_link = replace_query_param(
+            request.build_absolute_uri(), "cursor", encode_keyset_cursor(page[-1][1], page[-1][0])
+        )
+
+    return _json_response({
+        "next": next_link,
+        "results": [represent_schedule_row(*row[2:]) for row in page],
+    })
+
+
+@async_schedule_view
+async def schedule_detail(request, pk):
+    """Retrieve a schedule."""
+    row = await Schedule.objects.filter(pk=pk).values_list(*SCHEDULE_FIELDS).afirst()
+    if row is None:
+        return _json_response({"detail": "Not found."}, status=404)
+    return _json_response(represent_schedule_row(*row))
+
+
+@async_schedule_view
+async def schedule_grouped(request):
+    """Return unique schedules grouped by day, fetched in a single query."""
+    queryset, errors = _filter_schedules(request)
+    if errors:
+        return _json_response(errors, status=400)
+
+    schedule_data = await agroup_schedules_by_day(queryset)
+    return _json_response({"schedule": schedule_data})
+
+
+async def _event_stream(last_id):
+    """
+    Yield the schedule events after `last_id`, waiting for new commits in
+    between. The stream ends after SCHEDULE_STREAM_MAX_SECONDS and the client
+    reconnects with Last-Event-ID, so abandoned streams do not pile up.
+    """
+    yield f"retry: {settings.SCHEDULE_STREAM_RETRY_MS}\n\n"
+
+    if last_id is None:
+        last_id = await alatest_event_id()
+    elif await ais_expired(last_id):
+        yield RESET_EVENT
+        last_id = await alatest_event_id()
+
+    deadline = time.monotonic() + settings.SCHEDULE_STREAM_MAX_SECONDS
+    gaps = {}
+    sent_at = time.monotonic()
+    async with get_event_bus().subscribe() as wakeups:
+        while time.monotonic() < deadline:
+            events, pending = await afetch_events(last_id, gaps)
+            for event in events:
+                yield format_event(event)
+                last_id = event.id
+                sent_at = time.monotonic()
+
+            # Wake ups only announce commits, the table is the source of truth
+            while not wakeups.empty():
+                wakeups.get_nowait()
+
+            timeout = GAP_RETRY_SECONDS if pending else settings.SCHEDULE_STREAM_HEARTBEAT
+            try:
+                await asyncio.wait_for(wakeups.get(), timeout=min(timeout, max(deadline - time.monotonic(), 0)))
+            except asyncio.TimeoutError:
+                # Also polls for the commits of processes this bus does not reach.
+                # A stream waiting at a gap retries often but only keeps alive
+                # at the heartbeat.
+                if not pending or time.monotonic() - sent_at >= settings.SCHEDULE_STREAM_HEARTBEAT:
+                    yield ": keepalive\n\n"
+                    sent_at = time.monotonic()
+
+
+async def schedule_stream(request):
+    """
+    Push schedule create/update/delete events as Server-Sent Events. A
+    client resumes after the event in the Last-Event-ID header (or the
+    last_event_id query parameter), otherwise it starts with new events.
+    Only served under ASGI, WSGI requests get a 501.
+    """
+    if request.method != "GET":
+        return HttpResponseNotAllowed(["GET"])
+
+    response = await _authenticate(request)
+    if response is not None:
+        return response
+
+    last_id = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    if last_id is not None:
+        try:
+            last_id = int(last_id)
+        except ValueError:
+            return _json_response({"detail": "Invalid Last-Event-ID."}, status=400)
+
+    # WSGI servers (and runserver) buffer an async iterator to the end and
+    # hold a worker for the whole stream
+    if not isinstance(request, ASGIRequest):
+        return _json_response({"detail": "The schedule stream is only served under ASGI."}, status=501)
+
+    response = StreamingHttpResponse(_event_stream(last_id), content_type="text/event-stream")
+    response["Cache-Control"] = "no-cache"
+    # Let nginx pass events through instead of buffering the response
+    response["X-Accel-Buffering"] = "no"
+    return response
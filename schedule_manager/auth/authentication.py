@@ -0,0 +1,87 @@
+import copy
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from dj_rest_auth.jwt_auth import JWTCookieAuthentication
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from dj_rest_auth.app_settings import api_settings as rest_auth_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from schedule_manager.utils.cache import LRUCache
+from schedule_manager.routers import apin_if_recent_write, pin_if_recent_write
+
+# Users resolved from token claims, dropped when the user is saved or deleted
+user_cache = LRUCache(settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+
+class CachedJWTCookieAuthentication(JWTCookieAuthentication):
+    """
+    JWT cookie authentication that resolves the user from the token claims
+    through a short-lived, size-bounded in-process cache, so a cache hit
+    costs no database round trip.
+    """
+
+    def get_cached_user(self, validated_token):
+        """Return the cached user of the token, or None on a cache miss."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = user_cache.get(user_id)
+        if user is None:
+            return None
+
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # Every request works on its own copy of the cached user
+        return copy.copy(user)
+
+    def get_user(self, validated_token):
+        """
+        Return the user of the token, loading it only on a cache miss. Users
+        who wrote recently have the rest of the request read from the primary.
+        """
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(validated_token[api_settings.USER_ID_CLAIM], user)
+            user = copy.copy(user)
+        pin_if_recent_write(user.pk)
+        return user
+
+    async def aget_user(self, validated_token):
+        """Async version of get_user; only a cache miss leaves the event loop."""
+        user = self.get_cached_user(validated_token)
+        if user is None:
+            return await sync_to_async(self.get_user)(validated_token)
+        await apin_if_recent_write(user.pk)
+        return user
+
+    async def aauthenticate(self, request):
+        """
+        Authenticate a plain Django request from the Authorization header or
+        the access token cookie. CSRF is not enforced, so only use it for
+        safe methods.
+        """
+        header = self.get_header(request)
+        if header is None:
+            raw_token = request.COOKIES.get(rest_auth_settings.JWT_AUTH_COOKIE)
+        else:
+            raw_token = self.get_raw_token(header)
+
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+
+def invalidate_cached_user(user_id):
+    """Drop a user from the authentication cache."""
+    user_cache.delete(user_id)
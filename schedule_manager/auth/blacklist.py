@@ -0,0 +1,105 @@
+import time
+import threading
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from schedule_manager.utils.bloom import BloomFilter
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+
+class BlacklistFilter:
+    """
+    In-memory Bloom filter of blacklisted refresh token JTIs.
+
+    The filter is loaded from the blacklist table on first use and picks up
+    rows blacklisted by other processes every `sync_interval` seconds with
+    an indexed query on the primary key. A negative answer clears a token
+    without touching the database; only a possible hit is confirmed there.
+
+    IDs are allocated at insert, not at commit, so a row can commit after
+    a higher ID was synced. The IDs skipped below recent rows are read again
+    on every sync until they show up or are older than `gap_timeout`
+    seconds, the longest a blacklisting transaction may stay open.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, sync_interval: float, gap_timeout: float):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.gap_timeout = gap_timeout
+        self._bloom = None
+        self._last_id = 0
+        self._missing = {}
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def _sync(self):
+        """Add the rows blacklisted since the last sync and the missing rows that committed since."""
+        now = time.monotonic()
+        # Missing IDs past the timeout belong to rolled back transactions
+        self._missing = {
+            missing_id: seen_at for missing_id, seen_at in self._missing.items() if now - seen_at < self.gap_timeout
+        }
+        recent = timezone.now() - timedelta(seconds=self.gap_timeout)
+        rows = (
+            BlacklistedToken.objects
+            .filter(Q(id__gt=self._last_id) | Q(id__in=list(self._missing)))
+            .order_by("id")
+            .values_list("id", "token__jti", "blacklisted_at")
+        )
+        for blacklisted_id, jti, blacklisted_at in rows.iterator(chunk_size=5000):
+            self._bloom.add(jti)
+            if self._missing.pop(blacklisted_id, None) is not None or blacklisted_id <= self._last_id:
+                continue
+            # Below an old row the gaps are deleted or rolled back rows, not open transactions
+            if blacklisted_at >= recent:
+                self._missing.update(dict.fromkeys(range(self._last_id + 1, blacklisted_id), now))
+            self._last_id = blacklisted_id
+        self._synced_at = now
+
+    def _is_stale(self) -> bool:
+        """Return whether the filter is missing or due for a sync."""
+        return self._synced_at is None or time.monotonic() - self._synced_at >= self.sync_interval
+
+    def _ensure_fresh(self):
+        """Load the filter on first use and sync it once the interval has passed."""
+        if not self._is_stale():
+            return
+
+        with self._lock:
+            if self._bloom is None or self._bloom.count > self._bloom.capacity:
+                # (Re)build with room to grow so the error rate holds
+                capacity = max(self.capacity, BlacklistedToken.objects.count() * 2)
+                self._bloom = BloomFilter(capacity, self.error_rate)
+                self._last_id = 0
+                self._missing = {}
+                self._synced_at = None
+            if self._is_stale():
+                self._sync()
+
+    def might_contain(self, jti: str) -> bool:
+        """Return False if the JTI is certainly not blacklisted."""
+        self._ensure_fresh()
+        return jti in self._bloom
+
+    def add(self, jti: str):
+        """Record a JTI blacklisted by this process."""
+        self._ensure_fresh()
+        self._bloom.add(jti)
+
+    def reset(self):
+        """Drop the filter so it is reloaded on next use."""
+        with self._lock:
+            self._bloom = None
+            self._last_id = 0
+            self._missing = {}
+            self._synced_at = None
+
+
+blacklist_filter = BlacklistFilter(
+    capacity=settings.JWT_BLACKLIST_FILTER_CAPACITY,
+    error_rate=settings.JWT_BLACKLIST_FILTER_ERROR_RATE,
+    sync_interval=settings.JWT_BLACKLIST_FILTER_SYNC_INTERVAL,
+    gap_timeout=settings.JWT_BLACKLIST_FILTER_GAP_TIMEOUT,
+)
@@ -2,9 +2,9 @@ from typing import Any, Dict
 from django.db import transaction
 from rest_framework import serializers
 from schedule_manager.models import User
-from django.contrib.auth.models import update_last_login
-from rest_framework_simplejwt.settings import api_settings
 from schedule_manager.serializers import UserSerializer
+from schedule_manager.auth.tokens import FilteredRefreshToken
+from schedule_manager.auth.timestamps import record_last_login
 from dj_rest_auth.jwt_auth import CookieTokenRefreshSerializer
 from schedule_manager.utils.validator import password_validator
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
@@ -75,12 +75,12 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         data = super().validate(attrs)
         data["user"] = UserSerializer(self.user).data
 
-        # Update last timestamp of the user
-        if api_settings.UPDATE_LAST_LOGIN:
-            update_last_login(None, self.user)
+        # Update last timestamp of the user, written in the background
+        record_last_login(self.user)
         return data
 
 
 class CustomCookieTokenRefreshSerializer(CookieTokenRefreshSerializer):
     """Custom refresh token serializer."""
     is_http_cookie_only = serializers.BooleanField(required=False)
+    token_class = FilteredRefreshToken
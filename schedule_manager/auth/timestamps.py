@@ -0,0 +1,35 @@
+import atexit
+from django.conf import settings
+from django.utils import timezone
+from schedule_manager.models import User
+from schedule_manager.utils.write_behind import WriteBehindBuffer
+from schedule_manager.auth.authentication import invalidate_cached_user
+
+
+def _invalidate_cached_users(user_ids):
+    """Bulk updates skip post_save, so drop the written users from the cache here."""
+    for user_id in user_ids:
+        invalidate_cached_user(user_id)
+
+
+# Login and logout timestamps, written in batches after responses are sent
+user_timestamps = WriteBehindBuffer(
+    User,
+    ("last_login", "last_logout_at"),
+    max_size=settings.USER_TIMESTAMP_FLUSH_SIZE,
+    interval=settings.USER_TIMESTAMP_FLUSH_INTERVAL,
+    on_flush=_invalidate_cached_users,
+)
+atexit.register(user_timestamps.flush_on_exit)
+
+
+def record_last_login(user):
+    """Set the last login time of the user without a synchronous UPDATE."""
+    user.last_login = timezone.now()
+    user_timestamps.record(user.pk, last_login=user.last_login)
+
+
+def record_last_logout(user):
+    """Set the last logout time of the user without a synchronous UPDATE."""
+    user.last_logout_at = timezone.now()
+    user_timestamps.record(user.pk, last_logout_at=user.last_logout_at)
@@ -0,0 +1,21 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.settings import api_settings
+from schedule_manager.auth.blacklist import blacklist_filter
+
+
+class FilteredRefreshToken(RefreshToken):
+    """
+    Refresh token that checks the in-memory blacklist filter before the
+    blacklist table, and records the tokens it blacklists there.
+    """
+
+    def check_blacklist(self) -> None:
+        """Only query the blacklist table when the filter reports a possible hit."""
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        """Blacklist the token and add it to the filter."""
+        result = super().blacklist()
+        blacklist_filter.add(self.payload[api_settings.JTI_CLAIM])
+        return result
@@ -12,13 +12,13 @@ from schedule_manager.auth.serializers import (
     CustomTokenObtainPairSerializer,
     CustomCookieTokenRefreshSerializer
 )
+from schedule_manager.auth.timestamps import record_last_logout
 from schedule_manager.utils.jwt_auth import (
     set_cookies,
     logout_and_revoke_tokens,
     refresh_and_set_jwt_cookies
 )
 from rest_framework_simplejwt.tokens import TokenError
-from dj_rest_auth.jwt_auth import CookieTokenRefreshSerializer
 from rest_framework_simplejwt.views import TokenRefreshView as BaseTokenRefreshView
 
 
@@ -76,8 +76,8 @@ class LogoutView(GenericAPIView):
             refresh_token = serializer.validated_data.get("refresh")
             is_http_cookie_only = request.data.get("is_http_cookie_only", False)
 
-            # Update the last logout time
-            request.user.update_last_logout_at()
+            # Update the last logout time, written in the background
+            record_last_logout(request.user)
 
             # Blacklist the refresh token
             response = logout_and_revoke_tokens(
@@ -98,7 +98,7 @@ class TokenRefreshView(BaseTokenRefreshView):
     """An endpoint for user to refresh token."""
 
     # This will handle for getting a new refresh and access token
-    serializer_class = CookieTokenRefreshSerializer
+    serializer_class = CustomCookieTokenRefreshSerializer
 
     def finalize_response(self, request, response, *args, **kwargs):
         """Set the access token in the cookie."""
@@ -0,0 +1,34 @@
+import os
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Cache backends whose entries only live in the process that wrote them
+PER_PROCESS_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+@register(Tags.caches)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    Schedule versions and replica pins live in the default cache. Workers
+    on a per-process cache would serve stale ETags and read lagging
+    replicas after another worker's write, so several workers
+    (WEB_CONCURRENCY) need a shared cache.
+    """
+    try:
+        workers = int(os.environ.get("WEB_CONCURRENCY", 1))
+    except ValueError:
+        workers = 1
+
+    backend = settings.CACHES["default"]["BACKEND"]
+    if workers > 1 and backend in PER_PROCESS_CACHE_BACKENDS:
+        return [
+            Error(
+                f"The default cache ({backend}) is per process, but WEB_CONCURRENCY runs {workers} workers.",
+                hint="Point CACHE_BACKEND and CACHE_LOCATION to a shared cache such as Redis, or run one worker.",
+                id="schedule_manager.E001",
+            )
+        ]
+    return []
@@ -0,0 +1,74 @@
+from django import forms
+from django_filters import rest_framework as filters
+from schedule_manager.models import Schedule, ScheduleTarget
+
+
+class ScheduleFilterForm(forms.Form):
+    """
+    Validate the schedule filters that depend on each other.
+    """
+
+    def clean(self):
+        """Require active_from and active_to together, in order."""
+        cleaned_data = super().clean()
+        active_from = cleaned_data.get("active_from")
+        active_to = cleaned_data.get("active_to")
+
+        if (active_from is None) != (active_to is None) and not self.errors:
+            raise forms.ValidationError("You must provide both 'active_from' and 'active_to'.")
+        if active_from is not None and active_to is not None and active_to <= active_from:
+            raise forms.ValidationError("'active_to' must be after 'active_from'.")
+        return cleaned_data
+
+
+class IntegerFilter(filters.NumberFilter):
+    """
+    Filter on a whole number, answering 400 to decimals instead of
+    truncating them like the decimal NumberFilter would.
+    """
+
+    field_class = forms.IntegerField
+
+
+class ScheduleFilter(filters.FilterSet):
+    """
+    Filter schedules by the cameras and badges they cover, and by the
+    [active_from, active_to) range of time they are active in.
+    """
+
+    camera_id = IntegerFilter(method="filter_camera_id")
+    badge_id = filters.CharFilter(method="filter_badge_id")
+    active_from = filters.IsoDateTimeFilter(method="filter_active_range")
+    active_to = filters.IsoDateTimeFilter(method="filter_active_range")
+
+    class Meta:
+        model = Schedule
+        fields = []
+        form = ScheduleFilterForm
+
+    def filter_camera_id(self, queryset, name, value):
+        """Return schedules covering the camera, using the membership index."""
+        return queryset.filter(
+            targets__kind=ScheduleTarget.KindChoices.CAMERA,
+            targets__target_id=str(value),
+        )
+
+    def filter_badge_id(self, queryset, name, value):
+        """Return schedules covering the badge, using the membership index."""
+        return queryset.filter(
+            targets__kind=ScheduleTarget.KindChoices.BADGE,
+            targets__target_id=value,
+        )
+
+    def filter_active_range(self, queryset, name, value):
+        """The range needs both bounds, it is applied once in filter_queryset."""
+        return queryset
+
+    def filter_queryset(self, queryset):
+        """Apply the field filters, then the active range."""
+        queryset = super().filter_queryset(queryset)
+        active_from = self.form.cleaned_data.get("active_from")
+        active_to = self.form.cleaned_data.get("active_to")
+        if active_from is not None and active_to is not None:
+            queryset = queryset.active_between(active_from, active_to)
+        return queryset
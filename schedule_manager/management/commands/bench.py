@@ -0,0 +1,241 @@
+import json
+import sys
+import django
+from django.db import connection, transaction
+from django.urls import reverse
+from django.utils import timezone
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.request import Request
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from schedule_manager.models import Schedule
+from schedule_manager.views import ScheduleViews
+from schedule_manager.renderers import FastJSONRenderer, MessagePackRenderer
+from schedule_manager.signals import schedules_bulk_saved
+from schedule_manager.serializers import ScheduleRowSerializer, ScheduleSerializer
+from schedule_manager.auth.tokens import FilteredRefreshToken
+from schedule_manager.auth.views import LoginView, TokenRefreshView
+from schedule_manager.auth.timestamps import user_timestamps
+from schedule_manager.auth.authentication import user_cache
+from schedule_manager.tests.factories import UserFactory, ScheduleFactory
+from schedule_manager.utils.cache import response_cache
+from schedule_manager.utils.benchmark import compare_results, run_benchmark
+
+BENCH_PASSWORD = "Bench@12345"
+BENCHMARKS = (
+    "validate",
+    "to_representation",
+    "to_representation_fast",
+    "grouped",
+    "grouped_cached",
+    "grouped_cached_br",
+    "render_json",
+    "render_orjson",
+    "render_msgpack",
+    "login",
+    "refresh",
+)
+# Login and refresh are dominated by password hashing and token writes
+AUTH_BENCHMARKS = ("login", "refresh")
+RENDERERS = {
+    "render_json": JSONRenderer,
+    "render_orjson": FastJSONRenderer,
+    "render_msgpack": MessagePackRenderer,
+}
+
+
+def render(response):
+    """Render DRF responses, cached responses already hold their content."""
+    if hasattr(response, "render"):
+        response.render()
+    return response
+
+
+class Command(BaseCommand):
+    help = "Benchmark the schedule and authentication hot paths against seeded data"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=5, help="Users to seed")
+        parser.add_argument("--schedules", type=int, default=1000, help="Schedules seeded per user")
+        parser.add_argument("--iterations", type=int, default=100, help="Timed runs per benchmark")
+        parser.add_argument("--auth-iterations", type=int, default=10, help="Timed runs of the login and refresh benchmarks")
+        parser.add_argument("--warmup", type=int, default=5, help="Untimed runs before each benchmark")
+        parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="Run only these benchmarks")
+        parser.add_argument("--output", help="Write the JSON report to this file")
+        parser.add_argument("--compare", help="JSON report of a previous run to compare against")
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.1,
+            help="Fraction of lost throughput reported as a regression",
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["iterations"] < 1 or options["auth_iterations"] < 1:
+            raise CommandError("--users, --iterations and --auth-iterations must be at least 1.")
+
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+
+        # Everything the benchmarks write is rolled back
+        with transaction.atomic():
+            user = self.seed(options["users"], options["schedules"])
+            results = []
+            for name in options["only"] or BENCHMARKS:
+                operation, setup = self.build(name, user)
+                results.append(run_benchmark(
+                    name,
+                    operation,
+                    iterations=options["auth_iterations"] if name in AUTH_BENCHMARKS else options["iterations"],
+                    warmup=options["warmup"],
+                    setup=setup,
+                ))
+            # Write the buffered login times before everything is rolled back
+            user_timestamps.flush()
+            transaction.set_rollback(True)
+
+        response_cache.clear()
+        user_cache.clear()
+
+        report = {
+            "generated_at": timezone.now().isoformat(),
+            "environment": {
+                "python": sys.version.split()[0],
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "parameters": {
+                "users": options["users"],
+                "schedules": options["schedules"],
+                "iterations": options["iterations"],
+                "auth_iterations": options["auth_iterations"],
+            },
+            "results": [result.as_dict() for result in results],
+        }
+
+        self.write_table(report["results"])
+
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                json.dump(report, file, indent=2)
+            self.stdout.write(f"Report written to {options['output']}.")
+
+        if baseline is not None:
+            self.check_regressions(baseline, report, options["threshold"])
+
+    def seed(self, users, schedules):
+        """Create the users and schedules, return the benchmarked user."""
+        seeded_users = UserFactory.create_batch(users)
+        bench_user = seeded_users[0]
+        bench_user.set_password(BENCH_PASSWORD)
+        bench_user.save(update_fields=["password"])
+
+        for seeded_user in seeded_users:
+            batch = ScheduleFactory.build_batch(schedules, user=seeded_user)
+            for schedule in batch:
+                schedule.update_derived_fields()
+            created = Schedule.objects.bulk_create(batch, batch_size=1000)
+            schedules_bulk_saved.send(sender=Schedule, schedules=created, created=created)
+
+        return bench_user
+
+    def build(self, name, user):
+        """Return the (operation, setup) pair of a benchmark."""
+        factory = APIRequestFactory()
+
+        if name == "validate":
+            request = Request(factory.post(reverse("schedule-list")))
+            request.user = user
+            payload = {"day": "monday", "start": "08:00", "stop": "17:00", "camera_ids": [1, 2, 3]}
+
+            def validate():
+                ScheduleSerializer(data=payload, context={"request": request}).is_valid()
+            return validate, None
+
+        if name == "to_representation":
+            schedules = list(Schedule.objects.filter(user=user))
+
+            def to_representation():
+                return ScheduleSerializer(schedules, many=True).data
+            return to_representation, None
+
+        if name == "to_representation_fast":
+            rows = list(Schedule.objects.filter(user=user).values(*ScheduleRowSerializer.FIELDS))
+
+            def to_representation_fast():
+                return ScheduleRowSerializer(rows, many=True).data
+            return to_representation_fast, None
+
+        if name in RENDERERS:
+            renderer = RENDERERS[name]()
+            data = ScheduleSerializer(Schedule.objects.filter(user=user), many=True).data
+
+            def render_schedules():
+                return renderer.render(data)
+            return render_schedules, None
+
+        if name in ("grouped", "grouped_cached", "grouped_cached_br"):
+            view = ScheduleViews.as_view({"get": "grouped"})
+            # The brotli run is served the body compressed when it was cached
+            headers = {"HTTP_ACCEPT_ENCODING": "gzip, deflate, br"} if name == "grouped_cached_br" else {}
+
+            def grouped():
+                request = factory.get(reverse("schedule-grouped"), **headers)
+                force_authenticate(request, user=user)
+                return render(view(request)).content
+            # The cold run drops the cached response before every call
+            return grouped, response_cache.clear if name == "grouped" else None
+
+        if name == "login":
+            view = LoginView.as_view()
+
+            def login():
+                request = factory.post(
+                    reverse("login-user"),
+                    {"email": user.email, "password": BENCH_PASSWORD},
+                    format="json",
+                )
+                return render(view(request))
+            return login, None
+
+        view = TokenRefreshView.as_view()
+        tokens = []
+
+        def issue_token():
+            # Refresh tokens rotate and are blacklisted, every call needs a new one
+            tokens.append(str(FilteredRefreshToken.for_user(user)))
+
+        def refresh():
+            request = factory.post(reverse("refresh-token"), {"refresh": tokens.pop()}, format="json")
+            return render(view(request))
+        return refresh, issue_token
+
+    def write_table(self, results):
+        """Print a summary line per benchmark."""
+        self.stdout.write(
+            f"{'benchmark':<24}{'ops/sec':>12}{'p50 ms':>12}{'p99 ms':>12}{'queries':>10}{'alloc KiB':>12}"
+        )
+        for result in results:
+            self.stdout.write(
+                f"{result['name']:<24}{result['ops_per_sec']:>12.2f}{result['p50_ms']:>12.3f}"
+                f"{result['p99_ms']:>12.3f}{result['queries_per_op']:>10.2f}"
+                f"{result['allocated_bytes_per_op'] / 1024:>12.1f}"
+                + (f"{result['payload_bytes'] / 1024:>14.1f}" if result["payload_bytes"] is not None else "")
+            )
+
+    def check_regressions(self, baseline, report, threshold):
+        """Print the change against the baseline and fail on regressions."""
+        changes = compare_results(baseline, report, threshold)
+        for name, change in changes.items():
+            line = (
+                f"{name}: {change['ops_per_sec_change']:+.1%} ops/sec, "
+                f"{change['queries_per_op_change']:+.2f} queries/op"
+            )
+            self.stdout.write(self.style.ERROR(line) if change["regressed"] else line)
+
+        regressed = [name for name, change in changes.items() if change["regressed"]]
+        if regressed:
+            raise CommandError(f"Regressions against {baseline.get('generated_at')}: {', '.join(regressed)}.")
+        self.stdout.write(self.style.SUCCESS("No regressions."))
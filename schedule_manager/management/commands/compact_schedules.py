@@ -0,0 +1,51 @@
+import json
+from django.core.management.base import BaseCommand
+from schedule_manager.models import Schedule
+from schedule_manager.utils.compaction import CompactionReport, compact_user_schedules
+
+
+class Command(BaseCommand):
+    help = (
+        "Merge overlapping and adjacent schedules sharing a user, a day and a set "
+        "of cameras or badges, one transaction per batch of users"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+        parser.add_argument("--batch-size", type=int, default=500, help="Users compacted per transaction")
+        parser.add_argument("--user", type=int, action="append", dest="users", help="Only compact this user ID")
+        parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        report = CompactionReport()
+        schedules = Schedule.objects.all()
+        if options["users"]:
+            schedules = schedules.filter(user_id__in=options["users"])
+        last_id = 0
+
+        while True:
+            # Walk the users owning schedules so every batch is an index range scan
+            user_ids = list(
+                schedules
+                .filter(user_id__gt=last_id)
+                .order_by("user_id")
+                .values_list("user_id", flat=True)
+                .distinct()[:batch_size]
+            )
+            if not user_ids:
+                break
+
+            report.merge(compact_user_schedules(user_ids, dry_run=options["dry_run"]))
+            last_id = user_ids[-1]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(report.as_dict()))
+            return
+
+        verb = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report.rows_removed} of {report.schedules_scanned} schedules "
+            f"in {report.groups_compacted} groups ({report.rows_updated} stretched), "
+            f"saving {report.bytes_saved} bytes."
+        ))
@@ -0,0 +1,89 @@
+import json
+import os
+from django.conf import settings
+from django.db import IntegrityError
+from django.core.management.base import BaseCommand, CommandError
+from schedule_manager.models import ScheduleImport, User
+from schedule_manager.utils.importer import (
+    ImportConflictError,
+    ImportFileError,
+    file_fingerprint,
+    iter_import_rows,
+    resume_import,
+    run_import
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Import schedules from a CSV or JSON Lines file, streamed and committed in chunks. "
+        "Running it again with the same file and key resumes an interrupted import"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON Lines file, in the format of the schedule export")
+        parser.add_argument(
+            "--format",
+            choices=ScheduleImport.FormatChoices.values,
+            help="File format, by default from the file extension",
+        )
+        parser.add_argument("--user", type=int, help="Import every row for this user ID instead of the user column")
+        parser.add_argument("--key", help="Key the progress is saved under, the absolute file path by default")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=settings.SCHEDULE_IMPORT_CHUNK_SIZE,
+            help="Rows validated and committed per transaction",
+        )
+        parser.add_argument("--errors", help="Write every rejected row to this JSON Lines file")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        file_format = options["format"] or ScheduleImport.format_for(path)
+        if file_format is None:
+            raise CommandError("Cannot tell the file format from its extension, pass --format.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        user = None
+        if options["user"] is not None:
+            user = User.objects.filter(pk=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']} does not exist.")
+
+        with open(path, "rb") as file:
+            fingerprint = file_fingerprint(file)
+        try:
+            record = resume_import(user, options["key"] or os.path.abspath(path), file_format, fingerprint)
+        except ImportConflictError as exc:
+            raise CommandError(f"{exc} Pass another --key to import this file.")
+        if record.rows_read:
+            self.stdout.write(f"Resuming import {record.key} after row {record.rows_read}.")
+
+        errors_file = open(options["errors"], "a") if options["errors"] else None
+        try:
+            with open(path, "rb") as file:
+                run_import(
+                    record,
+                    iter_import_rows(file, file_format),
+                    user=user,
+                    chunk_size=options["chunk_size"],
+                    on_errors=lambda errors: self.write_errors(errors_file, errors),
+                )
+        except (ImportFileError, IntegrityError) as exc:
+            raise CommandError(f"{exc} Run the command again to resume after row {record.rows_read}.")
+        finally:
+            if errors_file is not None:
+                errors_file.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {record.rows_imported} schedules from {record.rows_read} rows, "
+            f"{record.rows_failed} rejected."
+        ))
+
+    def write_errors(self, errors_file, errors):
+        """Append the rejected rows of a chunk to the errors file."""
+        if errors_file is None:
+            return
+        for row, row_errors in sorted(errors.items()):
+            errors_file.write(json.dumps({"row": row, "errors": row_errors}) + "\n")
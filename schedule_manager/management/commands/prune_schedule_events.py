@@ -0,0 +1,43 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+from schedule_manager.models import ScheduleEvent
+
+
+class Command(BaseCommand):
+    help = "Delete schedule events older than the retention period in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Events deleted per transaction")
+        parser.add_argument(
+            "--retention",
+            type=int,
+            default=settings.SCHEDULE_EVENT_RETENTION,
+            help="Seconds of events kept for resuming clients",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options["retention"])
+        batch_size = options["batch_size"]
+        deleted = 0
+
+        # The latest event is always kept, it tells resuming clients where the feed is
+        latest = ScheduleEvent.objects.order_by("-id").values_list("id", flat=True).first()
+
+        while latest is not None:
+            ids = list(
+                ScheduleEvent.objects
+                .filter(id__lt=latest, created_at__lte=cutoff)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                ScheduleEvent.objects.filter(id__in=ids).delete()
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} schedule events."))
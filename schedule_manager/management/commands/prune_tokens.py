@@ -0,0 +1,37 @@
+from django.db import transaction
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.utils import aware_utcnow
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted refresh tokens in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Tokens deleted per transaction")
+
+    def handle(self, *args, **options):
+        now = aware_utcnow()
+        batch_size = options["batch_size"]
+        last_id = 0
+        deleted = 0
+
+        while True:
+            # Walk the primary key so every batch is an index range scan
+            ids = list(
+                OutstandingToken.objects
+                .filter(id__gt=last_id, expires_at__lte=now)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                OutstandingToken.objects.filter(id__in=ids).delete()
+
+            last_id = ids[-1]
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired tokens."))
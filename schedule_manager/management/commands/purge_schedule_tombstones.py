@@ -0,0 +1,44 @@
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+from schedule_manager.models import Schedule
+
+
+class Command(BaseCommand):
+    help = "Delete the tombstones of soft-deleted schedules older than the retention period in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Tombstones deleted per transaction")
+        parser.add_argument(
+            "--retention",
+            type=int,
+            default=settings.SCHEDULE_TOMBSTONE_RETENTION,
+            help="Seconds tombstones are kept for delta sync",
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(seconds=options["retention"])
+        batch_size = options["batch_size"]
+        last_id = 0
+        deleted = 0
+
+        while True:
+            # Walk the primary key so every batch is an index range scan
+            ids = list(
+                Schedule.all_objects
+                .filter(id__gt=last_id, is_active=False, updated_at__lte=cutoff)
+                .order_by("id")
+                .values_list("id", flat=True)[:batch_size]
+            )
+            if not ids:
+                break
+
+            with transaction.atomic():
+                Schedule.all_objects.filter(id__in=ids).delete()
+
+            last_id = ids[-1]
+            deleted += len(ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} schedule tombstones."))
@@ -0,0 +1,59 @@
+from django.db import connection, transaction
+from django.db.migrations.recorder import MigrationRecorder
+from django.core.management.base import BaseCommand
+from schedule_manager.models import Schedule
+from schedule_manager.utils.fingerprint import find_duplicate_schedules
+
+# The migration adding the unique constraint the duplicates block
+CONSTRAINT_MIGRATION = ("schedule_manager", "0003_schedule_fingerprint")
+
+# Columns of the initial schema, the command runs before the later migrations
+SCHEDULE_COLUMNS = ("id", "user_id", "day", "start", "stop", "badge_ids", "camera_ids")
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete the schedules repeating an earlier schedule of the same user, day, window and cameras or badges, "
+        "which keep migration 0003 from adding its unique constraint"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="List the duplicates without deleting them")
+        parser.add_argument("--batch-size", type=int, default=2000, help="Duplicates deleted per statement")
+
+    def handle(self, *args, **options):
+        if CONSTRAINT_MIGRATION in MigrationRecorder(connection).applied_migrations():
+            self.stdout.write("The unique fingerprint constraint is in place, no duplicates can exist.")
+            return
+
+        duplicates = find_duplicate_schedules(self.iter_rows())
+        for duplicate_id, kept_id in sorted(duplicates.items()):
+            self.stdout.write(f"Schedule {duplicate_id} repeats schedule {kept_id}.")
+        if options["dry_run"] or not duplicates:
+            self.stdout.write(f"Found {len(duplicates)} duplicate schedules.")
+            return
+
+        table = connection.ops.quote_name(Schedule._meta.db_table)
+        ids = sorted(duplicates)
+        batch_size = options["batch_size"]
+        with transaction.atomic(), connection.cursor() as cursor:
+            for index in range(0, len(ids), batch_size):
+                batch = ids[index:index + batch_size]
+                cursor.execute(f"DELETE FROM {table} WHERE id IN ({', '.join(['%s'] * len(batch))})", batch)
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {len(ids)} duplicate schedules."))
+
+    def iter_rows(self):
+        """Yield the schedule rows in ID order, read with SQL as the model may be ahead of the table."""
+        table = connection.ops.quote_name(Schedule._meta.db_table)
+        columns = ", ".join(connection.ops.quote_name(column) for column in SCHEDULE_COLUMNS)
+        # Some drivers return JSON columns as text, the field decodes them like the ORM
+        id_list = Schedule._meta.get_field("camera_ids")
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT {columns} FROM {table} ORDER BY id")
+            for *row, badge_ids, camera_ids in cursor:
+                yield (
+                    *row,
+                    id_list.from_db_value(badge_ids, None, connection),
+                    id_list.from_db_value(camera_ids, None, connection),
+                )
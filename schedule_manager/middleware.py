@@ -0,0 +1,180 @@
+import time
+from typing import Optional
+from contextvars import ContextVar
+from django.conf import settings
+from django.db import connections
+from django.core.exceptions import MiddlewareNotUsed
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from rest_framework.permissions import SAFE_METHODS
+from schedule_manager.utils.metrics import metrics
+from schedule_manager.routers import (
+    RoutingState,
+    routing_state,
+    mark_recent_write,
+    amark_recent_write
+)
+
+KNOWN_METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+
+class QueryRecorder:
+    """
+    Queries of a request and the time spent running them.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+# Recorder of the current request. A context variable rather than a
+# wrapper per request so queries the async ORM runs in worker threads,
+# on other connection objects, are still attributed to the request.
+current_recorder: ContextVar[Optional[QueryRecorder]] = ContextVar("current_recorder", default=None)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper feeding the recorder of the current request."""
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        recorder.duration += time.perf_counter() - started
+        recorder.count += 1
+
+
+def install_query_recorder():
+    """Install the execute wrapper on the connections of the calling thread."""
+    for connection in connections.all():
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_query)
+
+
+class InstrumentationMiddleware:
+    """
+    Record the wall time, SQL query count and SQL time of every request,
+    add them as a Server-Timing header and aggregate them in the metrics
+    registry served at /api/metrics.
+
+    Opt-in with SCHEDULE_INSTRUMENTATION: when it is off the middleware
+    removes itself from the chain at startup and costs nothing.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.SCHEDULE_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            install_query_recorder()
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finalize(request, response, recorder, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        started = time.perf_counter()
+        try:
+            # The async ORM runs queries in the request's thread sensitive worker
+            await sync_to_async(install_query_recorder)()
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.finalize(request, response, recorder, time.perf_counter() - started)
+
+    def finalize(self, request, response, recorder: QueryRecorder, duration: float):
+        """Add the Server-Timing header and record the request metrics."""
+        response["Server-Timing"] = (
+            f'db;dur={recorder.duration * 1000:.3f};desc="{recorder.count} queries", '
+            f"app;dur={duration * 1000:.3f}"
+        )
+
+        # Label by route name, never by raw path, to keep the series bounded
+        match = getattr(request, "resolver_match", None)
+        view = match.view_name if match is not None and match.view_name else "unresolved"
+        method = request.method if request.method in KNOWN_METHODS else "OTHER"
+        metrics.observe_request(
+            view=view,
+            method=method,
+            status=response.status_code,
+            duration=duration,
+            queries=recorder.count,
+            sql_duration=recorder.duration,
+        )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Let the reads of safe-method requests go to the read replicas, and pin
+    a user's reads to the primary for DATABASE_REPLICA_PIN_SECONDS after
+    each successful write so they read their own changes.
+
+    Only active when DATABASE_REPLICAS is configured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        token = routing_state.set(RoutingState(request.method in SAFE_METHODS))
+        try:
+            response = self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        user_id = self.written_by(request, response)
+        if user_id is not None:
+            mark_recent_write(user_id)
+        return response
+
+    async def __acall__(self, request):
+        token = routing_state.set(RoutingState(request.method in SAFE_METHODS))
+        try:
+            response = await self.get_response(request)
+        finally:
+            routing_state.reset(token)
+
+        user_id = self.written_by(request, response)
+        if user_id is not None:
+            await amark_recent_write(user_id)
+        return response
+
+    def written_by(self, request, response):
+        """Return the ID of the user who successfully wrote in the request, if any."""
+        if request.method in SAFE_METHODS or response.status_code >= 400:
+            return None
+
+        # DRF sets the authenticated user back on the Django request
+        user = getattr(request, "user", None)
+        if user is None or not user.is_authenticated:
+            return None
+        return user.pk
@@ -0,0 +1,53 @@
+# Generated by Django 4.2 on 2026-10-18 15:35
+
+from django.db import migrations, models
+from schedule_manager.utils.fingerprint import build_fingerprint, find_duplicate_schedules
+
+
+def backfill_fingerprints(apps, schema_editor):
+    """
+    Compute the fingerprint of existing schedules. Exact duplicates would
+    break the unique constraint; they are listed for review rather than
+    deleted here, see the remove_duplicate_schedules command.
+    """
+    Schedule = apps.get_model('schedule_manager', 'Schedule')
+    rows = Schedule.objects.order_by('id').values_list(
+        'id', 'user_id', 'day', 'start', 'stop', 'badge_ids', 'camera_ids'
+    ).iterator(chunk_size=2000)
+    duplicates = find_duplicate_schedules(rows)
+    if duplicates:
+        listed = ", ".join(f"{duplicate_id} (repeats {kept_id})" for duplicate_id, kept_id in sorted(duplicates.items()))
+        raise RuntimeError(
+            f"{len(duplicates)} schedules duplicate earlier ones and block the unique fingerprint constraint: "
+            f"{listed}. Review them, delete them with `python manage.py remove_duplicate_schedules`, "
+            f"then migrate again."
+        )
+
+    pending = []
+    for schedule in Schedule.objects.order_by('id').iterator(chunk_size=2000):
+        schedule.fingerprint = build_fingerprint(schedule.badge_ids, schedule.camera_ids)
+        pending.append(schedule)
+        if len(pending) >= 2000:
+            Schedule.objects.bulk_update(pending, ['fingerprint'])
+            pending = []
+    Schedule.objects.bulk_update(pending, ['fingerprint'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule_manager', '0002_rename_end_time_schedule_start_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.RunPython(backfill_fingerprints, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=models.UniqueConstraint(fields=('user', 'day', 'start', 'stop', 'fingerprint'), name='unique_schedule_fingerprint'),
+        ),
+    ]
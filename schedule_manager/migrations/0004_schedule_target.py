@@ -0,0 +1,50 @@
+# Generated by Django 4.2 on 2026-10-18 15:36
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_schedule_targets(apps, schema_editor):
+    """Create the membership rows of existing schedules."""
+    Schedule = apps.get_model('schedule_manager', 'Schedule')
+    ScheduleTarget = apps.get_model('schedule_manager', 'ScheduleTarget')
+    pending = []
+
+    for schedule in Schedule.objects.order_by('id').iterator(chunk_size=2000):
+        for kind, values in (('badge', schedule.badge_ids), ('camera', schedule.camera_ids)):
+            for target_id in dict.fromkeys(str(value) for value in values or []):
+                pending.append(ScheduleTarget(schedule_id=schedule.id, kind=kind, target_id=target_id))
+
+        if len(pending) >= 2000:
+            ScheduleTarget.objects.bulk_create(pending, ignore_conflicts=True)
+            pending = []
+
+    ScheduleTarget.objects.bulk_create(pending, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule_manager', '0003_schedule_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleTarget',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('camera', 'Camera'), ('badge', 'Badge')], max_length=6)),
+                ('target_id', models.CharField(max_length=255)),
+                ('schedule', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='targets', to='schedule_manager.schedule')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='scheduletarget',
+            index=models.Index(fields=['kind', 'target_id'], name='schedule_target_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='scheduletarget',
+            constraint=models.UniqueConstraint(fields=('schedule', 'kind', 'target_id'), name='unique_schedule_target'),
+        ),
+        migrations.RunPython(backfill_schedule_targets, migrations.RunPython.noop),
+    ]
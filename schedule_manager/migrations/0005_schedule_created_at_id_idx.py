@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 15:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule_manager', '0004_schedule_target'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['created_at', 'id'], name='schedule_created_at_id_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2 on 2026-10-18 16:00
+
+from django.db import migrations, models
+from schedule_manager.utils.week import schedule_window
+
+
+def backfill_week_minutes(apps, schema_editor):
+    """Compute the minutes of the week covered by existing schedules."""
+    Schedule = apps.get_model('schedule_manager', 'Schedule')
+    pending = []
+
+    for schedule in Schedule.objects.order_by('id').only('id', 'day', 'start', 'stop').iterator(chunk_size=2000):
+        schedule.start_minute, schedule.stop_minute = schedule_window(schedule.day, schedule.start, schedule.stop)
+        pending.append(schedule)
+        if len(pending) >= 2000:
+            Schedule.objects.bulk_update(pending, ['start_minute', 'stop_minute'])
+            pending = []
+
+    Schedule.objects.bulk_update(pending, ['start_minute', 'stop_minute'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule_manager', '0005_schedule_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedule',
+            name='start_minute',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='schedule',
+            name='stop_minute',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_week_minutes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['start_minute', 'stop_minute'], name='schedule_week_minutes_idx'),
+        ),
+    ]
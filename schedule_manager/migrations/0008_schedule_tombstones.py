@@ -0,0 +1,25 @@
+# Generated by Django 4.2 on 2026-10-18 16:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule_manager', '0007_schedule_event'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='schedule',
+            name='unique_schedule_fingerprint',
+        ),
+        migrations.AddIndex(
+            model_name='schedule',
+            index=models.Index(fields=['updated_at', 'id'], name='schedule_updated_at_id_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='schedule',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_active', True)), fields=('user', 'day', 'start', 'stop', 'fingerprint'), name='unique_schedule_fingerprint'),
+        ),
+    ]
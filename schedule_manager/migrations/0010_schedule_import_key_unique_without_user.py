@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule_manager', '0009_schedule_import'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='scheduleimport',
+            constraint=models.UniqueConstraint(condition=models.Q(('user__isnull', True)), fields=('key',), name='schedule_import_key_unique_without_user'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-18 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schedule_manager', '0010_schedule_import_key_unique_without_user'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scheduleimport',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+    ]
@@ -1,6 +1,10 @@
+import os
 from django.db import models
 from django.utils import timezone
 from abstract.models import AbstractModel
+from schedule_manager.utils.fingerprint import build_fingerprint
+from schedule_manager.utils.representation import represent_schedule_row
+from schedule_manager.utils.week import schedule_window, week_range_pieces, MINUTES_PER_WEEK
 from django.contrib.auth.models import (
     AbstractBaseUser,
     PermissionsMixin,
@@ -74,6 +78,41 @@ class User(AbstractBaseUser, AbstractModel, PermissionsMixin):
         return self.email
 
 
+# Fields update_derived_fields() maintains
+DERIVED_FIELDS = ("fingerprint", "start_minute", "stop_minute")
+
+# Fields written when a schedule is soft-deleted
+TOMBSTONE_FIELDS = ("is_active", "updated_at")
+
+
+class ScheduleQuerySet(models.QuerySet):
+    """QuerySet for the Schedule model."""
+
+    def active_between(self, start, stop):
+        """
+        Return the schedules covering part of the [start, stop) datetime range,
+        with one range condition on the indexed minute-of-week columns per
+        piece of the range.
+        """
+        condition = models.Q()
+        for start_minute, stop_minute in week_range_pieces(start, stop):
+            condition |= models.Q(start_minute__lt=stop_minute, stop_minute__gt=start_minute)
+            # Windows running past Sunday midnight also cover the start of the week
+            condition |= models.Q(stop_minute__gt=start_minute + MINUTES_PER_WEEK)
+        return self.filter(condition)
+
+
+class ScheduleManager(models.Manager.from_queryset(ScheduleQuerySet)):
+    """
+    Manager of the active schedules. Deleted schedules stay behind as
+    inactive tombstones for delta sync until they are purged.
+    """
+
+    def get_queryset(self):
+        """Exclude the tombstones."""
+        return super().get_queryset().filter(is_active=True)
+
+
 class Schedule(AbstractModel):
     """
     Schedule model.
@@ -95,7 +134,240 @@ class Schedule(AbstractModel):
     badge_ids = models.JSONField(default=list, blank=True, null=True)
     start = models.TimeField()
     stop = models.TimeField()
+    fingerprint = models.CharField(max_length=64, default="", editable=False)
+
+    # [start, stop) minutes of the week, Monday 00:00 being 0. A stop at or
+    # before the start runs into the next day, past the week end on Sunday.
+    start_minute = models.PositiveIntegerField(default=0, editable=False)
+    stop_minute = models.PositiveIntegerField(default=0, editable=False)
+
+    # Active schedules, and every schedule including the tombstones
+    objects = ScheduleManager()
+    all_objects = ScheduleQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "day", "start", "stop", "fingerprint"],
+                condition=models.Q(is_active=True),
+                name="unique_schedule_fingerprint",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="schedule_created_at_id_idx"),
+            models.Index(fields=["start_minute", "stop_minute"], name="schedule_week_minutes_idx"),
+            models.Index(fields=["updated_at", "id"], name="schedule_updated_at_id_idx"),
+        ]
+
+    def update_derived_fields(self):
+        """Recompute the fingerprint and the minutes of the week covered."""
+        self.fingerprint = build_fingerprint(self.badge_ids, self.camera_ids)
+        self.start_minute, self.stop_minute = schedule_window(
+            self.day,
+            self._meta.get_field("start").to_python(self.start),
+            self._meta.get_field("stop").to_python(self.stop),
+        )
+
+    def iter_targets(self):
+        """Yield the (kind, target_id) pairs this schedule covers."""
+        for badge_id in dict.fromkeys(str(value) for value in self.badge_ids or []):
+            yield ScheduleTarget.KindChoices.BADGE, badge_id
+        for camera_id in dict.fromkeys(str(value) for value in self.camera_ids or []):
+            yield ScheduleTarget.KindChoices.CAMERA, camera_id
+
+    def mark_deleted(self):
+        """Turn the schedule into a tombstone, to be written with TOMBSTONE_FIELDS."""
+        self.is_active = False
+        self.updated_at = timezone.now()
+
+    def soft_delete(self):
+        """Delete the schedule, keeping a tombstone for delta sync."""
+        self.mark_deleted()
+        self.save(update_fields=TOMBSTONE_FIELDS)
+
+    def save(self, *args, **kwargs):
+        """Keep the derived fields in sync on every save."""
+        self.update_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            kwargs["update_fields"] = {*update_fields, *DERIVED_FIELDS}
+        super().save(*args, **kwargs)
 
     def __str__(self):
         """Return the string representation of the schedule."""
         return f"{self.user.email} - {self.day} - {self.start} - {self.stop}"
+
+
+class ScheduleTargetManager(models.Manager):
+    """Manager for the camera/badge membership of schedules."""
+
+    def sync_for(self, schedules):
+        """
+        Rebuild the membership rows of the given schedules, tombstones
+        having none. Return every (kind, target_id) pair that was added or removed.
+        """
+        schedules = [schedule for schedule in schedules if schedule.pk is not None]
+        if not schedules:
+            return set()
+
+        existing = self.filter(schedule__in=schedules)
+        affected = set(existing.values_list("kind", "target_id"))
+        existing.delete()
+
+        targets = [
+            self.model(schedule=schedule, kind=kind, target_id=target_id)
+            for schedule in schedules
+            if schedule.is_active
+            for kind, target_id in schedule.iter_targets()
+        ]
+        self.bulk_create(targets, ignore_conflicts=True)
+        affected.update((target.kind, target.target_id) for target in targets)
+        return affected
+
+
+class ScheduleTarget(models.Model):
+    """
+    Normalized camera/badge membership of a schedule, maintained from its ID lists.
+    """
+
+    class KindChoices(models.TextChoices):
+        """Choices for the kind of target."""
+        CAMERA = "camera", "Camera"
+        BADGE = "badge", "Badge"
+
+    schedule = models.ForeignKey(Schedule, on_delete=models.CASCADE, related_name="targets")
+    kind = models.CharField(max_length=6, choices=KindChoices.choices)
+    target_id = models.CharField(max_length=255)
+
+    # Target Manager
+    objects = ScheduleTargetManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["schedule", "kind", "target_id"],
+                name="unique_schedule_target",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["kind", "target_id"], name="schedule_target_lookup_idx"),
+        ]
+
+    def __str__(self):
+        """Return the string representation of the target."""
+        return f"{self.schedule_id} - {self.kind} - {self.target_id}"
+
+
+class ScheduleEventManager(models.Manager):
+    """Manager for the schedule change feed."""
+
+    def record(self, changes):
+        """Append one event per (action, schedule) change, with the schedule as it was written."""
+        start_field = Schedule._meta.get_field("start")
+        stop_field = Schedule._meta.get_field("stop")
+        return self.bulk_create([
+            self.model(
+                action=action,
+                schedule_id=schedule.pk,
+                data={
+                    "id": schedule.pk,
+                    "day": schedule.day,
+                    **represent_schedule_row(
+                        start_field.to_python(schedule.start),
+                        stop_field.to_python(schedule.stop),
+                        schedule.badge_ids,
+                        schedule.camera_ids,
+                    ),
+                },
+            )
+            for action, schedule in changes
+        ])
+
+
+class ScheduleEvent(models.Model):
+    """
+    A created, updated or deleted schedule, written in the transaction of
+    the change. Event IDs are the positions clients resume the stream from.
+    """
+
+    class ActionChoices(models.TextChoices):
+        """Choices for the change made to the schedule."""
+        CREATED = "created", "Created"
+        UPDATED = "updated", "Updated"
+        DELETED = "deleted", "Deleted"
+
+    action = models.CharField(max_length=7, choices=ActionChoices.choices)
+    schedule_id = models.BigIntegerField()
+    data = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    # Event Manager
+    objects = ScheduleEventManager()
+
+    @classmethod
+    def action_for(cls, schedule, created=False):
+        """Return the action of a schedule write, soft deletes included."""
+        if not schedule.is_active:
+            return cls.ActionChoices.DELETED
+        return cls.ActionChoices.CREATED if created else cls.ActionChoices.UPDATED
+
+    def __str__(self):
+        """Return the string representation of the event."""
+        return f"{self.id} - {self.action} - {self.schedule_id}"
+
+
+class ScheduleImport(AbstractModel):
+    """
+    Progress of a schedule file import. Rows are committed in chunks along
+    with the progress, so an interrupted import resumes after its last
+    committed row.
+    """
+
+    class FormatChoices(models.TextChoices):
+        """Choices for the format of the imported file."""
+        CSV = "csv", "CSV"
+        JSONL = "jsonl", "JSON Lines"
+
+    class StatusChoices(models.TextChoices):
+        """Choices for the state of the import."""
+        RUNNING = "running", "Running"
+        COMPLETED = "completed", "Completed"
+
+    # Owner of uploaded imports, empty for command imports reading users from the rows
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="schedule_imports", null=True, blank=True)
+    key = models.CharField(max_length=255)
+    # SHA-256 of the imported file, a resume must upload the same file
+    fingerprint = models.CharField(max_length=64, blank=True)
+    format = models.CharField(max_length=5, choices=FormatChoices.choices)
+    status = models.CharField(max_length=9, choices=StatusChoices.choices, default=StatusChoices.RUNNING)
+    rows_read = models.PositiveIntegerField(default=0)
+    rows_imported = models.PositiveIntegerField(default=0)
+    rows_failed = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list, blank=True)
+
+    # Formats of the imported files by extension
+    EXTENSIONS = {
+        ".csv": FormatChoices.CSV,
+        ".jsonl": FormatChoices.JSONL,
+        ".ndjson": FormatChoices.JSONL,
+    }
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="schedule_import_user_key_unique"),
+            # NULL users never collide above, command imports need their own constraint
+            models.UniqueConstraint(
+                fields=["key"],
+                condition=models.Q(user__isnull=True),
+                name="schedule_import_key_unique_without_user",
+            ),
+        ]
+
+    @classmethod
+    def format_for(cls, name):
+        """Return the format of a file from its extension, None when it is not supported."""
+        return cls.EXTENSIONS.get(os.path.splitext(name)[1].lower())
+
+    def __str__(self):
+        """Return the string representation of the import."""
+        return f"{self.key} - {self.status} - {self.rows_read}"
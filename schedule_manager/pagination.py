@@ -0,0 +1,69 @@
+import base64
+import binascii
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.response import Response
+from rest_framework.pagination import CursorPagination
+
+
+def encode_keyset_cursor(moment, pk) -> str:
+    """Encode a (datetime, id) keyset position."""
+    return base64.urlsafe_b64encode(f"{moment.isoformat()}|{pk}".encode()).decode()
+
+
+def decode_keyset_cursor(cursor: str):
+    """
+    Decode a (datetime, id) keyset position, raising ValueError when it is
+    malformed. Encoded positions are always timezone-aware, so naive ones are too.
+    """
+    try:
+        moment, pk = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    except (binascii.Error, UnicodeDecodeError) as error:
+        raise ValueError(cursor) from error
+
+    moment = parse_datetime(moment)
+    if moment is None or timezone.is_naive(moment):
+        raise ValueError(cursor)
+    return moment, int(pk)
+
+
+class ScheduleCursorPagination(CursorPagination):
+    """
+    Keyset pagination on (created_at, id).
+
+    Every page is an indexed range scan, so deep pages cost the same as the
+    first one, and the table is only counted when ?count=true is passed.
+    """
+
+    ordering = ("-created_at", "-id")
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate the queryset, counting it only on request."""
+        self.count = None
+        if request.query_params.get(self.count_query_param, "").lower() in ("1", "true"):
+            self.count = queryset.count()
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        """Return the page with the next/previous cursors and the optional count."""
+        payload = {}
+        if self.count is not None:
+            payload["count"] = self.count
+        payload.update({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        """Document the optional count next to the cursors."""
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema["properties"] = {
+            "count": {"type": "integer", "example": 123},
+            **response_schema["properties"],
+        }
+        return response_schema
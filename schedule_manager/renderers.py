@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import math
+import msgpack
+import orjson
+from decimal import Decimal
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# orjson writes dates, times and datetimes natively, as isoformat() does. UTC
+# datetimes end with "Z" like the DRF encoder, and non string keys are
+# converted like json.dumps does.
+ORJSON_OPTIONS = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+
+# Other types (decimals, UUIDs, querysets...) are converted by the DRF encoder
+_encoder = JSONEncoder()
+
+
+def _has_non_finite_number(data) -> bool:
+    """Return whether NaN or infinity is nested in the dicts, lists and tuples of data."""
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, Decimal) and not value.is_finite():
+            return True
+    return False
+
+
+def encode_json(data) -> bytes:
+    """
+    Encode data with orjson into the bytes the default DRF JSON renderer
+    produces: compact, UTF-8 and with U+2028/U+2029 escaped. Like the strict
+    DRF renderer, raise ValueError on NaN and infinity, which orjson would
+    silently write as null.
+    """
+    content = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    # Only look for them when a null was written
+    if b"null" in content and _has_non_finite_number(data):
+        raise ValueError("Out of range float values are not JSON compliant")
+    # Valid JSON, but not valid JavaScript, escaped like JSONRenderer does
+    return content.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer encoding with orjson. Bodies are byte-identical to the DRF
+    JSON renderer with the default settings; indented output, non default
+    JSON settings and what orjson cannot encode (such as integers over 64
+    bits) go through the DRF renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as compact JSON."""
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or not self.strict
+            or self.get_indent(accepted_media_type, renderer_context) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            return encode_json(data)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    MessagePack renderer for embedded devices, selected with
+    "Accept: application/msgpack". The document is the one the JSON
+    renderer would encode: dates, times and other types become the same
+    strings.
+    """
+
+    media_type = "application/msgpack"
+    format = "msgpack"
+    charset = None
+    render_style = "binary"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as MessagePack."""
+        if data is None:
+            return b""
+        return msgpack.packb(data, default=_encoder.default, use_bin_type=True, datetime=False)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline-delimited JSON renderer. Exports stream their own body; this
+    only renders regular responses such as errors.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render the data as a single JSON line."""
+        if data is None:
+            return b""
+        return (json.dumps(data, ensure_ascii=False, separators=(",", ":")) + "\n").encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """
+    CSV renderer. Exports stream their own body; this only renders regular
+    responses such as errors, one "key,value" row per item.
+    """
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render a flat mapping as key/value rows."""
+        if data is None:
+            return b""
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        items = data.items() if isinstance(data, dict) else enumerate(data)
+        for key, value in items:
+            writer.writerow([key, value])
+        return buffer.getvalue().encode(self.charset)
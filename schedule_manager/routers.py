@@ -0,0 +1,101 @@
+import time
+import random
+from typing import Optional
+from contextvars import ContextVar
+from django.conf import settings
+from django.core.cache import cache
+
+PIN_KEY_PREFIX = "schedule_manager:replica-pin:"
+
+# Apps whose reads may be served by a replica. Token blacklist lookups stay
+# on the primary so a revoked token is rejected immediately.
+REPLICA_APP_LABELS = {"schedule_manager"}
+
+
+class RoutingState:
+    """Whether the reads of the current request may use a replica."""
+
+    def __init__(self, use_replica: bool):
+        self.use_replica = use_replica
+
+
+# Set by ReplicaRoutingMiddleware for the duration of a request. The state is
+# mutable so pinning it also reaches the worker threads of async views.
+routing_state: ContextVar[Optional[RoutingState]] = ContextVar("routing_state", default=None)
+
+
+def _pin_key(user_id) -> str:
+    return f"{PIN_KEY_PREFIX}{user_id}"
+
+
+def _may_use_replica() -> bool:
+    state = routing_state.get()
+    return state is not None and state.use_replica
+
+
+def pin_to_primary():
+    """Send the remaining reads of the current request to the primary."""
+    state = routing_state.get()
+    if state is not None:
+        state.use_replica = False
+
+
+def mark_recent_write(user_id):
+    """Keep the reads of a user on the primary while replicas catch up."""
+    cache.set(_pin_key(user_id), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+async def amark_recent_write(user_id):
+    """Async version of mark_recent_write."""
+    await cache.aset(_pin_key(user_id), True, settings.DATABASE_REPLICA_PIN_SECONDS)
+
+
+def pin_if_recent_write(user_id):
+    """Pin the current request to the primary if the user wrote recently."""
+    if _may_use_replica() and cache.get(_pin_key(user_id)):
+        pin_to_primary()
+
+
+async def apin_if_recent_write(user_id):
+    """Async version of pin_if_recent_write."""
+    if _may_use_replica() and await cache.aget(_pin_key(user_id)):
+        pin_to_primary()
+
+
+def pin_if_recently_changed(version: int):
+    """
+    Pin the current request to the primary if a versioned scope changed
+    within the replica lag window, so a lagging replica never answers with
+    the ETag (and cached body) of a version it has not seen yet.
+    """
+    if _may_use_replica() and time.time_ns() - version < settings.DATABASE_REPLICA_PIN_SECONDS * 1_000_000_000:
+        pin_to_primary()
+
+
+class ReplicaRouter:
+    """
+    Send reads of safe-method requests to a random replica and everything
+    else to the primary. Requests outside ReplicaRoutingMiddleware (shell,
+    management commands, tasks) always use the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in REPLICA_APP_LABELS and settings.DATABASE_REPLICAS and _may_use_replica():
+            return random.choice(settings.DATABASE_REPLICAS)
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Objects read from a replica are still saved on the primary
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {"default", *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas get the schema through replication
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -1,10 +1,34 @@
-from django.db import transaction
+import copy
+from django.conf import settings
+from django.utils import timezone
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
 from schedule_manager.models import (
     User,
-    Schedule
+    Schedule,
+    ScheduleImport
 )
 from abstract.serializers import AbstractSerializer
+from schedule_manager.pagination import ScheduleCursorPagination, decode_keyset_cursor
+from schedule_manager.utils.coverage import OPERATIONS, UNION
+from schedule_manager.utils.fingerprint import build_fingerprint
+from schedule_manager.utils.representation import (
+    represent_badge_ids,
+    represent_camera_ids,
+    represent_time
+)
+from schedule_manager.utils.overlap import find_overlapping_schedules, lock_user_schedules
+
+DUPLICATE_SCHEDULE_MESSAGE = "Schedule with these IDs already exists."
+OVERLAPPING_SCHEDULE_MESSAGE = "Schedule overlaps existing schedules of the same cameras or badges."
+
+
+def overlap_error(conflicts) -> serializers.ValidationError:
+    """Return the validation error listing the conflicting schedules."""
+    return serializers.ValidationError({
+        "non_field_errors": [OVERLAPPING_SCHEDULE_MESSAGE],
+        "conflicts": conflicts,
+    })
 
 
 class UserSerializer(AbstractSerializer):
@@ -62,7 +86,6 @@ class ScheduleSerializer(AbstractSerializer):
         day = validated_data.get("day")
         badge_ids = validated_data.get("badge_ids")
         camera_ids = validated_data.get("camera_ids")
-        user = self.context["request"].user
 
         # Ensure that only one of the two fields is provided
         if badge_ids and camera_ids:
@@ -72,32 +95,10 @@ class ScheduleSerializer(AbstractSerializer):
         if not badge_ids and not camera_ids:
             raise serializers.ValidationError("You must provide either 'badge_ids' or 'camera_ids'.")
 
-        # Get all schedules that match user, day, start, and stop
-        existing_schedules = Schedule.objects.filter(
-            user=user,
-            day=day,
-            start=start,
-            stop=stop,
-        )
-
-        # If we're updating, get the current instance (if applicable)
-        instance = self.instance  # The current instance being updated, if any
-
-        # Prepare a function to check for duplicates
-        def has_duplicate(existing_schedule):
-            if badge_ids is not None and set(existing_schedule.badge_ids) == set(badge_ids):
-                return True
-            if camera_ids is not None and set(existing_schedule.camera_ids) == set(camera_ids):
-                return True
-            return False
-
-        for schedule in existing_schedules:
-            # If we're updating, skip the instance being updated
-            if instance is None or schedule.id != instance.id:
-                if has_duplicate(schedule):
-                    raise serializers.ValidationError("Schedule with these IDs already exists.")
+        self.check_duplicate(day, start, stop, badge_ids, camera_ids)
 
         # Additional check when updating
+        instance = self.instance  # The current instance being updated, if any
         if instance is not None:
             # Check if we're changing the badge_ids and the existing instance has camera_ids
             if badge_ids is not None and instance.camera_ids:
@@ -108,11 +109,65 @@ class ScheduleSerializer(AbstractSerializer):
 
         return validated_data
 
+    def check_duplicate(self, day, start, stop, badge_ids, camera_ids):
+        """
+        Reject a schedule of the current user that already exists, with a
+        single indexed lookup on (user, day, start, stop, fingerprint).
+        """
+        existing_schedules = Schedule.objects.filter(
+            user=self.context["request"].user,
+            day=day,
+            start=start,
+            stop=stop,
+            fingerprint=build_fingerprint(badge_ids, camera_ids),
+        )
+
+        # If we're updating, skip the instance being updated
+        if self.instance is not None:
+            existing_schedules = existing_schedules.exclude(pk=self.instance.pk)
+
+        if existing_schedules.exists():
+            raise serializers.ValidationError(DUPLICATE_SCHEDULE_MESSAGE)
+
+    def check_overlap(self, schedule):
+        """
+        Reject a schedule overlapping another schedule of the user on a shared
+        camera or badge, when SCHEDULE_OVERLAP_DETECTION is on. Runs inside
+        the write transaction with the user's schedules locked.
+        """
+        if not settings.SCHEDULE_OVERLAP_DETECTION:
+            return
+
+        lock_user_schedules([schedule.user_id])
+        conflicts, = find_overlapping_schedules([({}, schedule)])
+        if conflicts:
+            raise overlap_error(conflicts)
+
     def create(self, validated_data):
         """Automatically set the user field to the current user."""
 
-        with transaction.atomic():
-            return Schedule.objects.create(**validated_data)
+        try:
+            with transaction.atomic():
+                schedule = Schedule(**validated_data)
+                self.check_overlap(schedule)
+                schedule.save(force_insert=True)
+                return schedule
+        except IntegrityError:
+            # A concurrent request created the same schedule after validation
+            raise serializers.ValidationError(DUPLICATE_SCHEDULE_MESSAGE)
+
+    def update(self, instance, validated_data):
+        """Reject updates that collide with an existing schedule."""
+
+        try:
+            with transaction.atomic():
+                candidate = copy.copy(instance)
+                for field, value in validated_data.items():
+                    setattr(candidate, field, value)
+                self.check_overlap(candidate)
+                return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError(DUPLICATE_SCHEDULE_MESSAGE)
 
     def to_representation(self, instance):
         """
@@ -122,3 +177,172 @@ class ScheduleSerializer(AbstractSerializer):
         representation.pop("user", None)
         representation.pop("day", None)
         return representation
+
+
+class ScheduleRowSerializer(serializers.BaseSerializer):
+    """
+    Read-only fast path of ScheduleSerializer for lists. Builds the same
+    representation straight from values() rows, without field objects per
+    row, optionally limited to the requested fields.
+    """
+
+    FIELDS = {
+        "start": represent_time,
+        "stop": represent_time,
+        "badge_ids": represent_badge_ids,
+        "camera_ids": represent_camera_ids,
+    }
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.selected_fields = tuple(fields or self.FIELDS)
+        self._formatters = [(name, self.FIELDS[name]) for name in self.selected_fields]
+
+    @classmethod
+    def parse_fields(cls, value):
+        """Return the fields of a ?fields= parameter in representation order, all of them by default."""
+        requested = {name.strip() for name in (value or "").split(",") if name.strip()}
+        unknown = requested - cls.FIELDS.keys()
+        if unknown:
+            raise serializers.ValidationError({
+                "fields": f"Unknown fields: {', '.join(sorted(unknown))}. Choose among {', '.join(cls.FIELDS)}."
+            })
+        return tuple(name for name in cls.FIELDS if not requested or name in requested)
+
+    def to_representation(self, row):
+        return {name: formatter(row[name]) for name, formatter in self._formatters}
+
+
+class BulkScheduleSerializer(ScheduleSerializer):
+    """
+    Schedule serializer used inside a bulk batch or an import, which need
+    no request.
+    """
+
+    def check_duplicate(self, day, start, stop, badge_ids, camera_ids):
+        """Duplicates are checked once for the whole batch."""
+
+
+class BulkOperationSerializer(serializers.Serializer):
+    """
+    A single create, update or delete operation of a bulk batch.
+    """
+
+    ACTIONS = ("create", "update", "delete")
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    id = serializers.IntegerField(required=False)
+    data = serializers.DictField(required=False)
+
+    def validate(self, attrs):
+        """Require the schedule ID and data each action needs."""
+        if attrs["action"] != "create" and "id" not in attrs:
+            raise serializers.ValidationError({"id": "This field is required to update or delete a schedule."})
+        if attrs["action"] != "delete" and "data" not in attrs:
+            raise serializers.ValidationError({"data": "This field is required to create or update a schedule."})
+        return attrs
+
+
+class ActiveScheduleQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the active schedule lookup.
+    """
+
+    camera_id = serializers.IntegerField(required=False)
+    badge_id = serializers.CharField(required=False)
+    at = serializers.DateTimeField(required=False)
+
+    def validate(self, attrs):
+        """Require exactly one target and default the moment to now."""
+        if ("camera_id" in attrs) == ("badge_id" in attrs):
+            raise serializers.ValidationError("You must provide either 'camera_id' or 'badge_id'.")
+
+        attrs.setdefault("at", timezone.now())
+        return attrs
+
+
+class CompactionRequestSerializer(serializers.Serializer):
+    """
+    Options of a schedule compaction.
+    """
+
+    dry_run = serializers.BooleanField(default=False)
+
+
+class CoverageQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the coverage lookup. Camera IDs can be repeated
+    (?camera_ids=1&camera_ids=2) or comma separated (?camera_ids=1,2).
+    """
+
+    camera_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.SCHEDULE_COVERAGE_MAX_CAMERAS,
+    )
+    operation = serializers.ChoiceField(choices=OPERATIONS, default=UNION)
+
+    def to_internal_value(self, data):
+        """Split comma separated camera IDs."""
+        if hasattr(data, "getlist"):
+            camera_ids = [value for param in data.getlist("camera_ids") for value in param.split(",") if value]
+            data = {**data.dict(), "camera_ids": camera_ids}
+        return super().to_internal_value(data)
+
+
+class ChangesQuerySerializer(serializers.Serializer):
+    """
+    Query parameters of the delta sync.
+    """
+
+    since = serializers.CharField(required=False)
+    page_size = serializers.IntegerField(
+        min_value=1,
+        max_value=ScheduleCursorPagination.max_page_size,
+        default=ScheduleCursorPagination.max_page_size,
+    )
+
+    def validate_since(self, value):
+        """Decode the cursor into its (updated_at, id) position."""
+        try:
+            return decode_keyset_cursor(value)
+        except ValueError:
+            raise serializers.ValidationError("Invalid cursor.")
+
+
+class ScheduleImportRequestSerializer(serializers.Serializer):
+    """
+    An uploaded CSV or JSON Lines file of schedules. Uploading the same file
+    again with the same key resumes its import; the key defaults to the
+    SHA-256 of the file.
+    """
+
+    file = serializers.FileField()
+    key = serializers.CharField(max_length=255, required=False)
+
+    def validate_file(self, value):
+        """Accept the file formats imports can parse."""
+        if ScheduleImport.format_for(value.name) is None:
+            raise serializers.ValidationError("Upload a .csv, .jsonl or .ndjson file.")
+        return value
+
+
+class ScheduleImportSerializer(AbstractSerializer):
+    """
+    Progress and rejected rows of a schedule import.
+    """
+
+    class Meta:
+        model = ScheduleImport
+        fields = [
+            "id",
+            "key",
+            "format",
+            "status",
+            "rows_read",
+            "rows_imported",
+            "rows_failed",
+            "errors",
+            "created_at",
+            "updated_at",
+        ]
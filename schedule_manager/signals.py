@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.dispatch import Signal, receiver
+from django.core.signals import request_finished
+from django.db.models.signals import post_delete, post_save
+from schedule_manager.models import Schedule, ScheduleEvent, ScheduleTarget, User
+from schedule_manager.utils.events import get_event_bus
+from schedule_manager.utils.timeline import weekly_timeline
+from schedule_manager.utils.cache import SCHEDULE_SCOPE, bump_version, get_version
+from schedule_manager.auth.timestamps import user_timestamps
+from schedule_manager.auth.authentication import invalidate_cached_user
+
+# Sent after schedules are written with bulk_create/bulk_update, which skip
+# post_save. `created` is the part of `schedules` that was inserted.
+schedules_bulk_saved = Signal()
+
+
+@receiver(post_save, sender=Schedule)
+def sync_schedule_targets(sender, instance, **kwargs):
+    """Keep the camera/badge membership rows and the timeline in sync with the schedule."""
+    affected = ScheduleTarget.objects.sync_for([instance])
+    transaction.on_commit(lambda: weekly_timeline.refresh(affected))
+
+
+@receiver(schedules_bulk_saved, sender=Schedule)
+def sync_bulk_schedule_targets(sender, schedules, **kwargs):
+    """Keep the membership rows and the timeline in sync after a bulk write."""
+    affected = ScheduleTarget.objects.sync_for(schedules)
+    transaction.on_commit(lambda: weekly_timeline.refresh(affected))
+
+
+@receiver(post_delete, sender=Schedule)
+def refresh_deleted_schedule_targets(sender, instance, **kwargs):
+    """Recompile the timeline of the targets of a deleted schedule."""
+    if not instance.is_active:
+        # A purged tombstone, its targets were removed when it was soft-deleted
+        return
+    affected = set(instance.iter_targets())
+    transaction.on_commit(lambda: weekly_timeline.refresh(affected))
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+@receiver(schedules_bulk_saved, sender=Schedule)
+def bump_schedule_version(sender, signal, instance=None, **kwargs):
+    """
+    Invalidate cached schedule responses. The version is bumped again on
+    commit so responses rendered before the commit are never reused.
+    """
+    if signal is post_delete and not instance.is_active:
+        # Purging tombstones changes no response
+        return
+    previous = get_version(SCHEDULE_SCOPE)
+    bumped = bump_version(SCHEDULE_SCOPE)
+
+    def bump_on_commit():
+        current = get_version(SCHEDULE_SCOPE)
+        committed = bump_version(SCHEDULE_SCOPE)
+        # Unless another write moved the version since, the timeline only
+        # missed this write, whose targets were refreshed just before
+        if current == bumped:
+            weekly_timeline.advance((previous, bumped), committed)
+
+    transaction.on_commit(bump_on_commit)
+
+
+def _publish_events(events):
+    """Wake the stream subscribers once the events are committed."""
+    if events:
+        last_id = events[-1].id
+        transaction.on_commit(lambda: get_event_bus().publish(last_id))
+
+
+@receiver(post_save, sender=Schedule)
+def record_saved_schedule_event(sender, instance, created, **kwargs):
+    """Append the change, or the soft delete, to the schedule event feed in the same transaction."""
+    _publish_events(ScheduleEvent.objects.record([(ScheduleEvent.action_for(instance, created), instance)]))
+
+
+@receiver(schedules_bulk_saved, sender=Schedule)
+def record_bulk_saved_schedule_events(sender, schedules, created=(), **kwargs):
+    """Append the bulk written schedules to the event feed."""
+    created_ids = {schedule.pk for schedule in created}
+    _publish_events(ScheduleEvent.objects.record([
+        (ScheduleEvent.action_for(schedule, schedule.pk in created_ids), schedule)
+        for schedule in schedules
+    ]))
+
+
+@receiver(post_delete, sender=Schedule)
+def record_deleted_schedule_event(sender, instance, **kwargs):
+    """Append a hard deletion (not a tombstone purge) to the schedule event feed."""
+    if instance.is_active:
+        _publish_events(ScheduleEvent.objects.record([(ScheduleEvent.ActionChoices.DELETED, instance)]))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_authenticated_user(sender, instance, **kwargs):
+    """Drop the user from the authentication cache when it changes."""
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(request_finished)
+def flush_user_timestamps(sender, **kwargs):
+    """Write buffered login/logout times once due, after the response was sent."""
+    user_timestamps.flush_if_due()
@@ -1,5 +1,5 @@
 import factory
-from schedule_manager.models import User
+from schedule_manager.models import User, Schedule
 
 
 class UserFactory(factory.django.DjangoModelFactory):
@@ -15,3 +15,15 @@ class UserFactory(factory.django.DjangoModelFactory):
     def create_superuser(cls, **kwargs):
         """Return created superuser instance."""
         return cls(is_superuser=True, **kwargs)
+
+
+class ScheduleFactory(factory.django.DjangoModelFactory):
+    class Meta:
+        model = Schedule
+
+    user = factory.SubFactory(UserFactory)
+    day = factory.Iterator(Schedule.DaysChoices.values)
+    start = factory.Faker("time_object")
+    stop = factory.Faker("time_object")
+    camera_ids = factory.Sequence(lambda n: [n])
+    badge_ids = factory.LazyFunction(list)
@@ -1,9 +1,21 @@
+from io import StringIO
+from datetime import timedelta
 from django.urls import reverse
+from django.utils import timezone
+from django.core.management import call_command
 from rest_framework import status
 from schedule_manager.models import User
 from rest_framework.response import Response
-from rest_framework.test import APITestCase, APIClient
+from rest_framework.test import APITestCase, APIClient, APIRequestFactory
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
 from schedule_manager.tests.factories import UserFactory
+from schedule_manager.auth.authentication import CachedJWTCookieAuthentication, user_cache
+from schedule_manager.auth.blacklist import BlacklistFilter, blacklist_filter
+from schedule_manager.auth.tokens import FilteredRefreshToken
+from schedule_manager.auth.timestamps import user_timestamps
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
 
 
 class AuthenticationEndpointTestCases(APITestCase):
@@ -17,6 +29,9 @@ class AuthenticationEndpointTestCases(APITestCase):
         self.logout_url = reverse("logout-user")
         self.user_1 = UserFactory()
 
+    def tearDown(self) -> None:
+        user_timestamps.clear()
+
     def test_register_user_fail(self):
         """Test user registration."""
 
@@ -175,3 +190,160 @@ class AuthenticationEndpointTestCases(APITestCase):
         response = self.client.post(self.logout_url, payload, format="json")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, {"detail": "Successfully logged out"})
+
+
+class CachedJWTCookieAuthenticationTestCases(APITestCase):
+    """Cached JWT authentication test case."""
+
+    def setUp(self) -> None:
+        user_cache.clear()
+        self.user = UserFactory()
+        self.authentication = CachedJWTCookieAuthentication()
+        access_token = RefreshToken.for_user(self.user).access_token
+        self.request = APIRequestFactory().get("/", HTTP_AUTHORIZATION=f"Bearer {access_token}")
+
+    def test_user_is_resolved_from_cache(self):
+        """Test a cache hit authenticates without a query."""
+        with self.assertNumQueries(1):
+            user, _ = self.authentication.authenticate(self.request)
+        self.assertEqual(user, self.user)
+
+        with self.assertNumQueries(0):
+            user, _ = self.authentication.authenticate(self.request)
+        self.assertEqual(user, self.user)
+
+    def test_cached_user_is_invalidated_on_save(self):
+        """Test saving the user drops it from the cache."""
+        self.authentication.authenticate(self.request)
+
+        self.user.is_active = False
+        self.user.save()
+
+        with self.assertRaises(AuthenticationFailed):
+            self.authentication.authenticate(self.request)
+
+
+class RefreshTokenBlacklistFilterTestCases(APITestCase):
+    """Refresh token blacklist filter test case."""
+
+    def setUp(self) -> None:
+        blacklist_filter.reset()
+        self.user = UserFactory()
+
+    def test_blacklisted_token_is_rejected(self):
+        """Test a blacklisted token is confirmed against the database."""
+        token = FilteredRefreshToken.for_user(self.user)
+        FilteredRefreshToken(str(token)).blacklist()
+
+        with self.assertRaises(TokenError):
+            FilteredRefreshToken(str(token))
+
+    def test_unknown_token_skips_blacklist_query(self):
+        """Test a token missing from the filter is cleared in memory."""
+        token = FilteredRefreshToken.for_user(self.user)
+        blacklist_filter.might_contain("warm-up")
+
+        with self.assertNumQueries(0):
+            FilteredRefreshToken(str(token))
+
+    def test_filter_picks_up_tokens_blacklisted_elsewhere(self):
+        """Test tokens blacklisted by another process are synced."""
+        token = FilteredRefreshToken.for_user(self.user)
+        blacklist_filter.might_contain("warm-up")
+
+        outstanding = OutstandingToken.objects.get(jti=token["jti"])
+        BlacklistedToken.objects.create(token=outstanding)
+        blacklist_filter.reset()
+
+        self.assertTrue(blacklist_filter.might_contain(token["jti"]))
+
+    def test_filter_picks_up_tokens_committed_out_of_order(self):
+        """Test a row committing after a higher ID was synced is still picked up."""
+        tokens = [FilteredRefreshToken.for_user(self.user) for _ in range(2)]
+        outstanding = [OutstandingToken.objects.get(jti=token["jti"]) for token in tokens]
+        bloom = BlacklistFilter(capacity=1000, error_rate=0.001, sync_interval=0, gap_timeout=60)
+
+        # ID 10 commits first while the transaction holding ID 5 is still open
+        BlacklistedToken.objects.create(id=10, token=outstanding[1])
+        self.assertTrue(bloom.might_contain(tokens[1]["jti"]))
+        self.assertFalse(bloom.might_contain(tokens[0]["jti"]))
+
+        BlacklistedToken.objects.create(id=5, token=outstanding[0])
+        self.assertTrue(bloom.might_contain(tokens[0]["jti"]))
+
+    def test_prune_tokens_deletes_expired_tokens(self):
+        """Test expired outstanding and blacklisted tokens are pruned."""
+        expired = FilteredRefreshToken.for_user(self.user)
+        FilteredRefreshToken(str(expired)).blacklist()
+        FilteredRefreshToken.for_user(self.user)
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(expires_at=timezone.now() - timedelta(days=1))
+
+        call_command("prune_tokens", "--batch-size", "1", stdout=StringIO())
+
+        self.assertEqual(OutstandingToken.objects.count(), 1)
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class UserTimestampBufferTestCases(APITestCase):
+    """Buffered login and logout timestamps test case."""
+
+    def setUp(self) -> None:
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="buffer@test.com", password="Testing@123")
+        user_timestamps.clear()
+        user_cache.clear()
+
+    def tearDown(self) -> None:
+        user_timestamps.clear()
+
+    def test_login_and_logout_are_written_in_one_update(self):
+        """Test login and logout times are buffered, then written with a single query."""
+        response = self.client.post(
+            reverse("login-user"), {"email": "buffer@test.com", "password": "Testing@123"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        other_user = UserFactory()
+        user_timestamps.record(other_user.pk, last_login=timezone.now())
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post(reverse("logout-user"), {"refresh": response.data["refresh"]}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+        self.assertIsNone(self.user.last_logout_at)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user_timestamps.flush(), 2)
+
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+        self.assertIsNotNone(self.user.last_logout_at)
+        other_user.refresh_from_db()
+        self.assertIsNotNone(other_user.last_login)
+        self.assertIsNone(other_user.last_logout_at)
+
+    def test_flush_after_response_when_due(self):
+        """Test pending updates are written at the end of a request once the size threshold is reached."""
+        user_timestamps.record(self.user.pk, last_login=timezone.now())
+        self.client.get(reverse("schedule-list"))
+        self.user.refresh_from_db()
+        self.assertIsNone(self.user.last_login)
+
+        max_size = user_timestamps.max_size
+        user_timestamps.max_size = 1
+        try:
+            self.client.get(reverse("schedule-list"))
+        finally:
+            user_timestamps.max_size = max_size
+
+        self.assertEqual(len(user_timestamps), 0)
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_flush_invalidates_cached_user(self):
+        """Test written users are dropped from the authentication cache."""
+        user_cache.set(self.user.pk, self.user)
+        user_timestamps.record(self.user.pk, last_logout_at=timezone.now())
+        user_timestamps.flush()
+        self.assertIsNone(user_cache.get(self.user.pk))
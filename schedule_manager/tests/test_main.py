@@ -1,5 +1,29 @@
-from rest_framework.test import APITestCase
-from schedule_manager.models import User
+import os
+import time
+from unittest import mock, skipUnless
+from django.conf import settings
+from django.urls import reverse
+from django.db import connections
+from django.core.cache import cache
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from schedule_manager.models import User, Schedule
+from schedule_manager.tests.factories import UserFactory
+from schedule_manager.auth.authentication import user_cache
+from schedule_manager.checks import check_shared_cache
+from schedule_manager.utils.cache import SCHEDULE_SCOPE, VERSION_KEY_PREFIX, response_cache
+from schedule_manager.routers import (
+    ReplicaRouter,
+    RoutingState,
+    routing_state,
+    pin_to_primary,
+    mark_recent_write,
+    pin_if_recent_write,
+    pin_if_recently_changed
+)
 
 
 class UserModelAndManagerTestCase(APITestCase):
@@ -63,3 +87,131 @@ class UserModelAndManagerTestCase(APITestCase):
         for payload in payloads:
             with self.assertRaises(ValueError):
                 User.objects.create_superuser(**payload)
+
+
+@override_settings(DATABASE_REPLICAS=["replica_0"], DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaRouterTestCase(APITestCase):
+    """
+    Test the read replica router decisions.
+    """
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.token = routing_state.set(RoutingState(use_replica=True))
+        cache.clear()
+
+    def tearDown(self):
+        routing_state.reset(self.token)
+
+    def test_routing(self):
+        """
+        Test safe-method reads go to a replica and everything else to the primary.
+        """
+
+        self.assertEqual(self.router.db_for_read(Schedule), "replica_0")
+        self.assertEqual(self.router.db_for_read(User), "replica_0")
+        self.assertIsNone(self.router.db_for_read(OutstandingToken))
+        self.assertEqual(self.router.db_for_write(Schedule), "default")
+        self.assertFalse(self.router.allow_migrate("replica_0", "schedule_manager"))
+        self.assertIsNone(self.router.allow_migrate("default", "schedule_manager"))
+
+        pin_to_primary()
+        self.assertIsNone(self.router.db_for_read(Schedule))
+
+        routing_state.set(None)
+        self.assertIsNone(self.router.db_for_read(Schedule))
+
+    def test_pin_after_write(self):
+        """
+        Test a user who wrote recently reads from the primary.
+        """
+
+        pin_if_recent_write(1)
+        self.assertEqual(self.router.db_for_read(Schedule), "replica_0")
+
+        mark_recent_write(1)
+        pin_if_recent_write(1)
+        self.assertIsNone(self.router.db_for_read(Schedule))
+
+    def test_pin_after_version_change(self):
+        """
+        Test reads of a scope that changed within the lag window use the primary.
+        """
+
+        pin_if_recently_changed(time.time_ns() - 60 * 1_000_000_000)
+        self.assertEqual(self.router.db_for_read(Schedule), "replica_0")
+
+        pin_if_recently_changed(time.time_ns())
+        self.assertIsNone(self.router.db_for_read(Schedule))
+
+    def test_several_workers_require_a_shared_cache(self):
+        """
+        Test the system check fails when several workers would keep versions and pins per process.
+        """
+
+        with mock.patch.dict(os.environ, {"WEB_CONCURRENCY": "4"}):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ["schedule_manager.E001"])
+            redis = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://redis"}}
+            with override_settings(CACHES=redis):
+                self.assertEqual(check_shared_cache(None), [])
+
+        with mock.patch.dict(os.environ, {"WEB_CONCURRENCY": "1"}):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+@skipUnless(settings.DATABASE_REPLICAS, "Set DATABASE_REPLICAS to run the replica routing tests.")
+class ReplicaRoutingTestCase(TransactionTestCase):
+    """
+    Test requests against a primary and a replica alias.
+    """
+
+    databases = "__all__"
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.other_user = UserFactory()
+        self.schedule = Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="09:00", camera_ids=[1])
+        self.replica = connections[settings.DATABASE_REPLICAS[0]]
+        cache.clear()
+        user_cache.clear()
+        response_cache.clear()
+
+    def age_schedule_version(self):
+        """Move the schedule version out of the replica lag window."""
+        cache.set(VERSION_KEY_PREFIX + SCHEDULE_SCOPE, time.time_ns() - 60 * 1_000_000_000, None)
+
+    def get_schedules(self, user):
+        """List schedules as the user, returning the (primary, replica) query counts."""
+        access_token = RefreshToken.for_user(user).access_token
+        with CaptureQueriesContext(connections["default"]) as primary, CaptureQueriesContext(self.replica) as replica:
+            response = self.client.get(reverse("schedule-list"), HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        self.assertEqual(response.status_code, 200)
+        return len(primary), len(replica)
+
+    def test_read_your_writes(self):
+        """
+        Test reads use the replica except right after the user wrote.
+        """
+
+        self.age_schedule_version()
+        primary, replica = self.get_schedules(self.user)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+        self.client.force_authenticate(self.user)
+        response = self.client.patch(
+            reverse("schedule-detail", kwargs={"pk": self.schedule.pk}), {"stop": "10:00", "camera_ids": [1]}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(None)
+        self.age_schedule_version()
+        response_cache.clear()
+
+        primary, replica = self.get_schedules(self.user)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        primary, replica = self.get_schedules(self.other_user)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
@@ -1,9 +1,51 @@
+import base64
+import csv
+import gzip
+import hashlib
+import json
+import os
+import asyncio
+import tempfile
+import brotli
+import msgpack
+from datetime import time, timedelta
+from decimal import Decimal
+from uuid import UUID
+from io import StringIO
+from importlib import import_module
+from unittest import mock
+from django.apps import apps as django_apps
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, transaction
 from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
+from asgiref.sync import sync_to_async
+from django.test import AsyncClient, override_settings
 from rest_framework import status
-from schedule_manager.models import Schedule
+from rest_framework.renderers import JSONRenderer
+from schedule_manager.models import Schedule, ScheduleEvent, ScheduleImport, ScheduleTarget
 from rest_framework.test import APITestCase, APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
 from schedule_manager.tests.factories import UserFactory
-from schedule_manager.serializers import ScheduleSerializer
+from schedule_manager.renderers import FastJSONRenderer
+from schedule_manager.serializers import (
+    DUPLICATE_SCHEDULE_MESSAGE,
+    OVERLAPPING_SCHEDULE_MESSAGE,
+    ScheduleRowSerializer,
+    ScheduleSerializer
+)
+from schedule_manager.utils.cache import SCHEDULE_SCOPE, bump_version, response_cache
+from schedule_manager.utils.timeline import weekly_timeline
+from schedule_manager.utils.fingerprint import build_fingerprint
+from schedule_manager.utils.benchmark import compare_results
+from schedule_manager.utils.metrics import metrics
+from schedule_manager.utils.compaction import compact_user_schedules
+from schedule_manager.utils.compression import negotiate_encoding
+from schedule_manager.utils.events import afetch_events, wait_notifies
+from schedule_manager.utils.export import stream_ndjson
 
 
 class ScheduleEndpointsTestCases(APITestCase):
@@ -13,6 +55,8 @@ class ScheduleEndpointsTestCases(APITestCase):
         self.client = APIClient()
         self.user = UserFactory()
         self.url = reverse('schedule-list')
+        weekly_timeline.clear()
+        response_cache.clear()
 
     def test_create_schedule_with_camera_ids_unathenticated_user(self):
         """Test create schedule with unauthenticated user."""
@@ -137,3 +181,1290 @@ class ScheduleEndpointsTestCases(APITestCase):
         expected_response = "Cannot include camera IDs without removing existing badge IDs."
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data['non_field_errors'][0], expected_response)
+
+    def test_grouped_schedules_single_query(self):
+        """Test grouped schedules are fetched in one query and deduped per day."""
+        self.client.force_authenticate(user=self.user)
+        other_user = UserFactory()
+
+        for user in (self.user, other_user):
+            Schedule.objects.create(user=user, day="monday", start="09:00", stop="10:00", camera_ids=[1, 2])
+        Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="09:00", badge_ids=["a"])
+        Schedule.objects.create(user=self.user, day="friday", start="09:00", stop="10:00", camera_ids=[1, 2])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('schedule-grouped'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        schedule = response.data["schedule"]
+        self.assertEqual(list(schedule), [day for day, _ in Schedule.DaysChoices.choices])
+        self.assertEqual(schedule["monday"], [
+            {"start": "08:00:00", "stop": "09:00:00", "badge_ids": ["a"]},
+            {"start": "09:00:00", "stop": "10:00:00", "camera_ids": [1, 2]},
+        ])
+        self.assertEqual(schedule["friday"], [{"start": "09:00:00", "stop": "10:00:00", "camera_ids": [1, 2]}])
+        self.assertEqual(schedule["sunday"], [])
+
+    def test_create_schedule_with_reordered_ids_is_duplicate(self):
+        """Test the duplicate check ignores the order of the IDs."""
+        self.client.force_authenticate(user=self.user)
+        payload = {
+            "day": "monday",
+            "start": "00:00",
+            "stop": "01:00",
+            "camera_ids": [1, 2, 3]
+        }
+
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        payload["camera_ids"] = [3, 2, 1, 1]
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['non_field_errors'][0], "Schedule with these IDs already exists.")
+
+        # The same IDs as badges are a different schedule
+        payload = {"day": "monday", "start": "00:00", "stop": "01:00", "badge_ids": ["1", "2", "3"]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_duplicate_schedule_rejected_by_unique_constraint(self):
+        """Test the database rejects duplicates that bypass validation."""
+        Schedule.objects.create(user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[1, 2])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Schedule.objects.create(user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[2, 1])
+
+    def test_filter_schedules_by_camera_and_badge(self):
+        """Test schedules can be looked up through the membership table."""
+        self.client.force_authenticate(user=self.user)
+        camera_schedule = Schedule.objects.create(
+            user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[42, 7]
+        )
+        Schedule.objects.create(user=self.user, day="monday", start="02:00", stop="03:00", badge_ids=["b-1"])
+        self.assertEqual(
+            set(ScheduleTarget.objects.values_list("kind", "target_id")),
+            {("camera", "42"), ("camera", "7"), ("badge", "b-1")},
+        )
+
+        response = self.client.get(self.url, {"camera_id": 42})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data["results"]), 1)
+        self.assertEqual(response.data["results"][0]["camera_ids"], [42, 7])
+
+        response = self.client.get(self.url, {"badge_id": "b-1"})
+        self.assertEqual(len(response.data["results"]), 1)
+
+        # Camera IDs are whole numbers, not truncated decimals
+        for camera_id in ("42.5", "4e1", "x"):
+            response = self.client.get(self.url, {"camera_id": camera_id})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("camera_id", response.data)
+
+        # Membership follows updates and deletes
+        url = reverse('schedule-detail', kwargs={'pk': camera_schedule.id})
+        response = self.client.patch(url, {"camera_ids": [8]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(self.url, {"camera_id": 42}).data["results"], [])
+        self.assertEqual(len(self.client.get(self.url, {"camera_id": 8}).data["results"]), 1)
+
+        self.client.delete(url)
+        self.assertFalse(ScheduleTarget.objects.filter(kind="camera").exists())
+
+    def test_filter_schedules_by_active_range(self):
+        """Test schedules can be looked up by the range of time they are active in."""
+        self.client.force_authenticate(user=self.user)
+        monday = Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="10:00", camera_ids=[1])
+        overnight = Schedule.objects.create(user=self.user, day="tuesday", start="23:00", stop="01:00", camera_ids=[2])
+        sunday = Schedule.objects.create(user=self.user, day="sunday", start="23:30", stop="00:30", camera_ids=[3])
+        self.assertEqual((monday.start_minute, monday.stop_minute), (480, 600))
+        self.assertEqual((sunday.start_minute, sunday.stop_minute), (10050, 10110))
+
+        def active(active_from, active_to):
+            response = self.client.get(self.url, {"active_from": active_from, "active_to": active_to})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return sorted((entry["start"], entry["stop"]) for entry in response.data["results"])
+
+        # 2024-01-01 is a Monday
+        self.assertEqual(active("2024-01-03T00:30:00Z", "2024-01-03T02:00:00Z"), [("23:00:00", "01:00:00")])
+        self.assertEqual(active("2024-01-01T09:59:00Z", "2024-01-01T10:00:00Z"), [("08:00:00", "10:00:00")])
+        self.assertEqual(active("2024-01-01T10:00:00Z", "2024-01-01T11:00:00Z"), [])
+        self.assertEqual(active("2024-01-08T00:00:00Z", "2024-01-08T00:10:00Z"), [("23:30:00", "00:30:00")])
+        self.assertEqual(
+            active("2024-01-07T23:45:00Z", "2024-01-08T08:30:00Z"),
+            [("08:00:00", "10:00:00"), ("23:30:00", "00:30:00")],
+        )
+        self.assertEqual(len(active("2024-01-01T00:00:00Z", "2024-01-09T00:00:00Z")), 3)
+
+        # Minutes follow updates
+        url = reverse('schedule-detail', kwargs={'pk': overnight.id})
+        self.client.patch(url, {"day": "wednesday", "camera_ids": [2]}, format='json')
+        self.assertEqual(active("2024-01-03T00:30:00Z", "2024-01-03T02:00:00Z"), [])
+
+        response = self.client.get(self.url, {"active_from": "2024-01-03T00:30:00Z"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(self.url, {"active_from": "2024-01-03T00:30:00Z", "active_to": "2024-01-03T00:00:00Z"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_active_schedule_lookup(self):
+        """Test the compiled timeline answers whether a target is covered."""
+        self.client.force_authenticate(user=self.user)
+        active_url = reverse('schedule-active')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.create(user=self.user, day="monday", start="09:00", stop="10:00", camera_ids=[42])
+            Schedule.objects.create(user=self.user, day="monday", start="10:00", stop="11:00", camera_ids=[42])
+            Schedule.objects.create(user=self.user, day="sunday", start="23:00", stop="01:00", badge_ids=["b-1"])
+
+        def is_active(**params):
+            response = self.client.get(active_url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return response.data["active"]
+
+        # 2024-01-01 is a Monday
+        self.assertTrue(is_active(camera_id=42, at="2024-01-01T09:00:00Z"))
+        self.assertTrue(is_active(camera_id=42, at="2024-01-01T10:30:00Z"))
+        self.assertFalse(is_active(camera_id=42, at="2024-01-01T11:00:00Z"))
+        self.assertFalse(is_active(camera_id=7, at="2024-01-01T09:30:00Z"))
+
+        # Windows ending before they start run past midnight, wrapping the week
+        self.assertTrue(is_active(badge_id="b-1", at="2024-01-07T23:30:00Z"))
+        self.assertTrue(is_active(badge_id="b-1", at="2024-01-08T00:30:00Z"))
+        self.assertFalse(is_active(badge_id="b-1", at="2024-01-08T01:00:00Z"))
+
+        # The timeline is recompiled incrementally when a schedule changes
+        schedule = Schedule.objects.filter(camera_ids=[42]).earliest("start")
+        with self.captureOnCommitCallbacks(execute=True):
+            schedule.delete()
+        self.assertFalse(is_active(camera_id=42, at="2024-01-01T09:30:00Z"))
+        self.assertTrue(is_active(camera_id=42, at="2024-01-01T10:30:00Z"))
+
+        response = self.client.get(active_url, {"at": "2024-01-01T09:00:00Z"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_timeline_picks_up_writes_of_other_processes(self):
+        """Test the timeline is rebuilt once another process moves the schedule version."""
+        moment = timezone.datetime(2024, 1, 1, 9, 30, tzinfo=timezone.get_current_timezone())
+        self.assertFalse(weekly_timeline.is_active("camera", "42", moment))
+
+        # Another process writes without this process' signals, then bumps the shared version
+        schedule = Schedule(user=self.user, day="monday", start="09:00", stop="10:00", camera_ids=[42])
+        schedule.update_derived_fields()
+        Schedule.objects.bulk_create([schedule])
+        ScheduleTarget.objects.sync_for([schedule])
+        self.assertFalse(weekly_timeline.is_active("camera", "42", moment))
+
+        bump_version(SCHEDULE_SCOPE)
+        self.assertTrue(weekly_timeline.is_active("camera", "42", moment))
+        self.assertNotEqual(weekly_timeline.bitmap("camera", "42"), weekly_timeline.bitmap("camera", "7"))
+
+    def test_writes_refresh_the_timeline_without_a_rebuild(self):
+        """Test the writing process moves its timeline to the committed version instead of rebuilding it."""
+        moment = timezone.datetime(2024, 1, 1, 9, 30, tzinfo=timezone.get_current_timezone())
+        self.assertFalse(weekly_timeline.is_active("camera", "42", moment))
+        snapshot = weekly_timeline._snapshot
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.create(user=self.user, day="monday", start="09:00", stop="10:00", camera_ids=[42])
+        with self.assertNumQueries(0):
+            self.assertTrue(weekly_timeline.is_active("camera", "42", moment))
+        # Readers holding the previous snapshot are not affected by the refresh
+        self.assertNotIn(("camera", "42"), snapshot.starts)
+
+    def test_coverage_set_operations(self):
+        """Test coverage unions, intersects and complements the cameras' weekly bitmaps."""
+        self.client.force_authenticate(user=self.user)
+        coverage_url = reverse('schedule-coverage')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="12:00", camera_ids=[1])
+            Schedule.objects.create(user=self.user, day="monday", start="10:00", stop="14:00", camera_ids=[2])
+            Schedule.objects.create(user=self.user, day="sunday", start="23:00", stop="01:00", camera_ids=[1, 2])
+
+        def intervals(operation, camera_ids="1,2"):
+            response = self.client.get(coverage_url, {"camera_ids": camera_ids, "operation": operation})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return [(row["start_day"], row["start"], row["stop_day"], row["stop"]) for row in response.data["intervals"]]
+
+        # Runs wrapping the week are split at Sunday midnight
+        self.assertEqual(intervals("union"), [
+            ("monday", "00:00:00", "monday", "01:00:00"),
+            ("monday", "08:00:00", "monday", "14:00:00"),
+            ("sunday", "23:00:00", "monday", "00:00:00"),
+        ])
+        self.assertEqual(intervals("intersection")[1], ("monday", "10:00:00", "monday", "12:00:00"))
+        self.assertEqual(intervals("uncovered"), [
+            ("monday", "01:00:00", "monday", "08:00:00"),
+            ("monday", "14:00:00", "sunday", "23:00:00"),
+        ])
+        self.assertEqual(intervals("intersection", camera_ids="1,2,99"), [])
+
+        response = self.client.get(coverage_url, {"camera_ids": [1, 2], "operation": "union"})
+        self.assertEqual(response.data["minutes"], 2 * 60 + 6 * 60)
+
+        # Cached bitmaps are dropped when a camera's schedules change
+        with self.captureOnCommitCallbacks(execute=True):
+            Schedule.objects.filter(camera_ids=[2]).delete()
+        self.assertEqual(intervals("union", camera_ids="2"), [
+            ("monday", "00:00:00", "monday", "01:00:00"),
+            ("sunday", "23:00:00", "monday", "00:00:00"),
+        ])
+
+        response = self.client.get(coverage_url, {"operation": "union"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(coverage_url, {"camera_ids": "1", "operation": "xor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_schedule_operations(self):
+        """Test bulk operations are validated together and reported per item."""
+        self.client.force_authenticate(user=self.user)
+        bulk_url = reverse('schedule-bulk')
+        existing = Schedule.objects.create(user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[1])
+        to_update = Schedule.objects.create(user=self.user, day="monday", start="02:00", stop="03:00", camera_ids=[2])
+        to_delete = Schedule.objects.create(user=self.user, day="monday", start="04:00", stop="05:00", camera_ids=[3])
+
+        operations = [
+            {"action": "create", "data": {"day": "tuesday", "start": "00:00", "stop": "01:00", "camera_ids": [1, 2]}},
+            {"action": "create", "data": {"day": "tuesday", "start": "00:00", "stop": "01:00", "camera_ids": [2, 1]}},
+            {"action": "create", "data": {"day": "monday", "start": "00:00", "stop": "01:00", "camera_ids": [1]}},
+            {"action": "update", "id": to_update.id, "data": {"camera_ids": [2, 9]}},
+            {"action": "delete", "id": to_delete.id},
+            {"action": "delete", "id": 0},
+            {"action": "create", "data": {"day": "monday", "start": "00:00", "stop": "01:00"}},
+            {"action": "rename"},
+        ]
+
+        response = self.client.post(bulk_url, operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created", "error", "error", "updated", "deleted", "error", "error", "error"],
+        )
+        self.assertEqual(results[1]["errors"]["non_field_errors"][0], "Schedule with these IDs already exists.")
+        self.assertEqual(results[3]["id"], to_update.id)
+
+        created = Schedule.objects.get(pk=results[0]["id"])
+        self.assertEqual(created.user, self.user)
+        self.assertEqual(created.fingerprint, build_fingerprint(camera_ids=[2, 1]))
+        self.assertNotEqual(created.fingerprint, existing.fingerprint)
+        self.assertTrue(ScheduleTarget.objects.filter(schedule=created, kind="camera", target_id="2").exists())
+        self.assertTrue(ScheduleTarget.objects.filter(schedule=to_update, kind="camera", target_id="9").exists())
+        self.assertFalse(Schedule.objects.filter(pk=to_delete.id).exists())
+
+        response = self.client.post(bulk_url, {"action": "create"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_moves_schedules_into_keys_the_batch_frees(self):
+        """Test a schedule may take the key of one deleted or moved by the batch, unless the move is rejected."""
+        self.client.force_authenticate(user=self.user)
+        first = Schedule.objects.create(user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[1])
+        second = Schedule.objects.create(user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[2])
+        moved = Schedule.objects.create(user=self.user, day="monday", start="02:00", stop="03:00", camera_ids=[3])
+        blocked = Schedule.objects.create(user=self.user, day="monday", start="04:00", stop="05:00", camera_ids=[4])
+        Schedule.objects.create(user=self.user, day="monday", start="04:00", stop="05:00", camera_ids=[5])
+
+        operations = [
+            {"action": "update", "id": first.id, "data": {"camera_ids": [2]}},
+            {"action": "update", "id": second.id, "data": {"camera_ids": [1]}},
+            {"action": "create", "data": {"day": "monday", "start": "02:00", "stop": "03:00", "camera_ids": [3]}},
+            {"action": "update", "id": moved.id, "data": {"camera_ids": [6]}},
+            {"action": "update", "id": blocked.id, "data": {"camera_ids": [5]}},
+            {"action": "create", "data": {"day": "monday", "start": "04:00", "stop": "05:00", "camera_ids": [4]}},
+        ]
+        response = self.client.post(reverse('schedule-bulk'), operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["updated", "updated", "created", "updated", "error", "error"],
+        )
+        self.assertEqual(Schedule.objects.get(pk=first.id).camera_ids, [2])
+        self.assertEqual(Schedule.objects.get(pk=second.id).camera_ids, [1])
+        self.assertTrue(Schedule.objects.get(pk=second.id).is_active)
+        self.assertEqual(Schedule.objects.get(pk=blocked.id).camera_ids, [4])
+
+    def test_remove_duplicate_schedules_command(self):
+        """Test duplicates blocking the fingerprint constraint are listed, and only deleted without --dry-run."""
+        stdout = StringIO()
+        call_command("remove_duplicate_schedules", stdout=stdout)
+        self.assertIn("constraint is in place", stdout.getvalue())
+
+        kept = Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="09:00", camera_ids=[1, 2])
+        duplicate = Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="09:00", camera_ids=[3])
+        # Before the constraint existed, the same cameras in another order made a duplicate
+        ScheduleTarget.objects.filter(schedule=duplicate).delete()
+        Schedule.objects.filter(pk=duplicate.pk).update(camera_ids=[2, 1])
+
+        # The migration adding the constraint lists them instead of deleting them
+        migration = import_module("schedule_manager.migrations.0003_schedule_fingerprint")
+        with self.assertRaisesMessage(RuntimeError, f"{duplicate.pk} (repeats {kept.pk})"):
+            migration.backfill_fingerprints(django_apps, None)
+
+        with mock.patch(
+            "schedule_manager.management.commands.remove_duplicate_schedules.CONSTRAINT_MIGRATION",
+            ("schedule_manager", "9999_not_applied"),
+        ):
+            stdout = StringIO()
+            call_command("remove_duplicate_schedules", dry_run=True, stdout=stdout)
+            self.assertIn(f"Schedule {duplicate.pk} repeats schedule {kept.pk}.", stdout.getvalue())
+            self.assertTrue(Schedule.objects.filter(pk=duplicate.pk).exists())
+
+            call_command("remove_duplicate_schedules", stdout=StringIO())
+        self.assertFalse(Schedule.all_objects.filter(pk=duplicate.pk).exists())
+        self.assertTrue(Schedule.objects.filter(pk=kept.pk).exists())
+
+    def test_export_schedules_streams_ndjson_and_csv(self):
+        """Test schedules are streamed as NDJSON and CSV."""
+        self.client.force_authenticate(user=self.user)
+        export_url = reverse('schedule-export')
+        first = Schedule.objects.create(user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[1, 2])
+        second = Schedule.objects.create(user=self.user, day="friday", start="08:30", stop="09:00", badge_ids=["b-1"])
+
+        response = self.client.get(export_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        rows = [json.loads(line) for line in lines]
+        self.assertEqual([row["id"] for row in rows], [first.id, second.id])
+        self.assertEqual(rows[0]["camera_ids"], [1, 2])
+        self.assertEqual(rows[1]["start"], "08:30:00")
+        self.assertEqual(rows[1]["badge_ids"], ["b-1"])
+        self.assertEqual(rows[1]["user"], self.user.id)
+
+        response = self.client.get(export_url, {"format": "csv", "camera_id": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][:5], ["id", "user", "day", "start", "stop"])
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][2], "monday")
+        self.assertEqual(rows[1][6], "[1, 2]")
+
+    def test_list_schedules_with_cursor_pagination(self):
+        """Test schedules are paginated by cursor without counting the table."""
+        self.client.force_authenticate(user=self.user)
+        for hour in range(5):
+            Schedule.objects.create(user=self.user, day="monday", start=f"0{hour}:00", stop=f"0{hour}:30", camera_ids=[1])
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+
+        starts = [entry["start"] for entry in response.data["results"]]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+            starts.extend(entry["start"] for entry in response.data["results"])
+        self.assertEqual(starts, ["04:00:00", "03:00:00", "02:00:00", "01:00:00", "00:00:00"])
+
+        response = self.client.get(self.url, {"page_size": 2, "count": "true"})
+        self.assertEqual(response.data["count"], 5)
+
+    def test_fast_serializer_matches_schedule_serializer(self):
+        """Test list and detail responses match ScheduleSerializer, and ?fields= trims them."""
+        self.client.force_authenticate(user=self.user)
+        Schedule.objects.create(user=self.user, day="monday", start="08:00:30", stop="17:00", camera_ids=[3, 1])
+        Schedule.objects.create(user=self.user, day="friday", start="22:00", stop="02:00", badge_ids=["b-1", 7])
+        Schedule.objects.create(user=self.user, day="sunday", start="00:00", stop="00:00", camera_ids=None, badge_ids=["x"])
+        schedules = Schedule.objects.order_by("-created_at", "-id")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(response.content)["results"], json.loads(json.dumps(ScheduleSerializer(schedules, many=True).data)))
+
+        rows = list(schedules.values(*ScheduleRowSerializer.FIELDS))
+        self.assertEqual(ScheduleRowSerializer(rows, many=True).data, ScheduleSerializer(schedules, many=True).data)
+
+        response = self.client.get(self.url, {"fields": "camera_ids,start"})
+        self.assertEqual(response.data["results"][-1], {"start": "08:00:30", "camera_ids": [3, 1]})
+
+        url = reverse('schedule-detail', kwargs={"pk": schedules[0].id})
+        self.assertEqual(self.client.get(url).data, ScheduleSerializer(schedules[0]).data)
+        self.assertEqual(self.client.get(url, {"fields": "stop"}).data, {"stop": "00:00:00"})
+
+        response = self.client.get(self.url, {"fields": "start,user"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("user", response.data["fields"])
+
+    def test_fast_renderers_match_json_and_negotiate_msgpack(self):
+        """Test orjson bodies are byte-identical to DRF's and MessagePack is served on Accept."""
+        self.client.force_authenticate(user=self.user)
+        Schedule.objects.create(user=self.user, day="monday", start="08:00:30", stop="17:00", camera_ids=[3, 1])
+        Schedule.objects.create(user=self.user, day="friday", start="22:00", stop="02:00", badge_ids=["b- é", 7])
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        data = {
+            "at": timezone.now().replace(microsecond=6),
+            "time": time(8, 30),
+            "amount": Decimal("1.50"),
+            "id": UUID(int=1),
+            1: [2 ** 70, None, "line\u2028paragraph\u2029"],
+        }
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+        self.assertEqual(
+            FastJSONRenderer().render(data, "application/json; indent=2"),
+            JSONRenderer().render(data, "application/json; indent=2"),
+        )
+        for number in (float("nan"), float("-inf"), Decimal("Infinity")):
+            with self.assertRaises(ValueError):
+                JSONRenderer().render({"values": [None, number]})
+            with self.assertRaises(ValueError):
+                FastJSONRenderer().render({"values": [None, number]})
+
+        grouped_url = reverse('schedule-grouped')
+        packed = self.client.get(grouped_url, HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(packed["Content-Type"], "application/msgpack")
+        self.assertIn("Accept", packed["Vary"])
+        self.assertEqual(msgpack.unpackb(packed.content), json.loads(self.client.get(grouped_url).content))
+
+        body = msgpack.packb({"day": "tuesday", "start": "08:00", "stop": "09:00", "camera_ids": [1]})
+        response = self.client.post(self.url, body, content_type="application/msgpack", HTTP_ACCEPT="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(msgpack.unpackb(response.content)["camera_ids"], [1])
+
+        response = self.client.post(self.url, b"\xc1", content_type="application/msgpack")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post(self.url, b'{"day": NaN}', content_type="application/json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_grouped_schedules_conditional_get(self):
+        """Test unchanged polls are answered from the version without queries."""
+        self.client.force_authenticate(user=self.user)
+        grouped_url = reverse('schedule-grouped')
+        Schedule.objects.create(user=self.user, day="monday", start="00:00", stop="01:00", camera_ids=[1])
+
+        response = self.client.get(grouped_url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response["ETag"]
+        self.assertIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(grouped_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # A change in the same second as Last-Modified is invisible to the date
+        response = self.client.get(grouped_url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        later = http_date(parse_http_date(response["Last-Modified"]) + 1)
+        response = self.client.get(grouped_url, HTTP_IF_MODIFIED_SINCE=later)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(grouped_url)
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(json.loads(cached.content)["schedule"]["monday"][0]["camera_ids"], [1])
+
+        # Any write moves the version forward
+        Schedule.objects.create(user=self.user, day="monday", start="02:00", stop="03:00", camera_ids=[1])
+        response = self.client.get(grouped_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(len(response.data["schedule"]["monday"]), 2)
+
+    def test_grouped_schedules_are_served_precompressed(self):
+        """Test cached bodies are compressed once and sent in the encoding the client prefers."""
+        self.client.force_authenticate(user=self.user)
+        grouped_url = reverse('schedule-grouped')
+        for hour in range(20):
+            Schedule.objects.create(user=self.user, day="monday", start=time(hour), stop=time(hour, 30), camera_ids=[hour])
+        metrics.clear()
+
+        identity = self.client.get(grouped_url)
+        self.assertNotIn("Content-Encoding", identity)
+        self.assertIn("Accept-Encoding", identity["Vary"])
+
+        with self.assertNumQueries(0):
+            response = self.client.get(grouped_url, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), identity.content)
+
+        with self.assertNumQueries(0):
+            response = self.client.get(grouped_url, HTTP_ACCEPT_ENCODING="gzip;q=0.8, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), identity.content)
+        self.assertLess(len(response.content), len(identity.content))
+
+        response = self.client.get(grouped_url, HTTP_ACCEPT_ENCODING="br;q=0, *;q=0")
+        self.assertNotIn("Content-Encoding", response)
+
+        self.assertEqual(negotiate_encoding("*"), "br")
+        self.assertEqual(negotiate_encoding("GZIP;q=0.5, identity"), "gzip")
+        self.assertEqual(negotiate_encoding(None), "identity")
+
+        exposition = metrics.render()
+        self.assertIn('schedule_manager_response_cache_requests_total{result="miss",encoding="identity"} 1', exposition)
+        self.assertIn('schedule_manager_response_cache_requests_total{result="hit",encoding="br"} 1', exposition)
+        self.assertIn('schedule_manager_response_compression_ratio_count{encoding="gzip"} 1', exposition)
+
+
+class AsyncScheduleEndpointsTestCases(APITestCase):
+    """Async schedule endpoint test case."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        access_token = RefreshToken.for_user(self.user).access_token
+        self.auth_header = {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}
+
+    def test_async_endpoints_require_authentication(self):
+        """Test async endpoints reject anonymous and invalid tokens."""
+        response = self.client.get(reverse('async-schedule-list'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(reverse('async-schedule-list'), HTTP_AUTHORIZATION="Bearer invalid")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_async_list_detail_and_grouped(self):
+        """Test async endpoints return the same data as the synchronous ones."""
+        for hour in range(3):
+            Schedule.objects.create(user=self.user, day="monday", start=f"0{hour}:00", stop=f"0{hour}:30", camera_ids=[1])
+        schedule = Schedule.objects.latest("created_at")
+
+        response = self.client.get(reverse('async-schedule-list'), {"page_size": 2}, **self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual([entry["start"] for entry in data["results"]], ["02:00:00", "01:00:00"])
+
+        data = self.client.get(data["next"], **self.auth_header).json()
+        self.assertEqual([entry["start"] for entry in data["results"]], ["00:00:00"])
+        self.assertIsNone(data["next"])
+
+        url = reverse('async-schedule-detail', kwargs={"pk": schedule.id})
+        response = self.client.get(url, **self.auth_header)
+        self.assertEqual(response.json(), ScheduleSerializer(schedule).data)
+
+        response = self.client.get(reverse('async-schedule-grouped'), **self.auth_header)
+        self.assertEqual(len(response.json()["schedule"]["monday"]), 3)
+
+        response = self.client.get(reverse('async-schedule-grouped'), HTTP_IF_NONE_MATCH=response["ETag"], **self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+
+class BenchCommandTestCases(APITestCase):
+    """Benchmark command test case."""
+
+    def test_bench_writes_report_and_rolls_back(self):
+        """Test the benchmark report covers every hot path and leaves no data behind."""
+        with tempfile.NamedTemporaryFile(suffix=".json") as report_file:
+            call_command(
+                "bench",
+                users=2,
+                schedules=20,
+                iterations=2,
+                auth_iterations=1,
+                warmup=0,
+                output=report_file.name,
+                stdout=StringIO(),
+            )
+            report = json.load(report_file)
+
+        names = [result["name"] for result in report["results"]]
+        self.assertEqual(names, [
+            "validate", "to_representation", "to_representation_fast",
+            "grouped", "grouped_cached", "grouped_cached_br",
+            "render_json", "render_orjson", "render_msgpack",
+            "login", "refresh",
+        ])
+        results = {result["name"]: result for result in report["results"]}
+        self.assertEqual(results["grouped"]["queries_per_op"], 1)
+        self.assertGreater(results["grouped"]["ops_per_sec"], 0)
+        self.assertEqual(results["grouped_cached"]["queries_per_op"], 0)
+        self.assertEqual(results["to_representation_fast"]["queries_per_op"], 0)
+        self.assertEqual(results["render_orjson"]["payload_bytes"], results["render_json"]["payload_bytes"])
+        self.assertLess(results["render_msgpack"]["payload_bytes"], results["render_json"]["payload_bytes"])
+        self.assertEqual(results["grouped_cached_br"]["queries_per_op"], 0)
+        self.assertLess(results["grouped_cached_br"]["payload_bytes"], results["grouped_cached"]["payload_bytes"])
+        self.assertIsNone(results["login"]["payload_bytes"])
+        self.assertFalse(Schedule.objects.exists())
+
+    def test_compare_results_flags_regressions(self):
+        """Test lost throughput and extra queries are reported as regressions."""
+        baseline = {"results": [
+            {"name": "grouped", "ops_per_sec": 100, "queries_per_op": 1},
+            {"name": "validate", "ops_per_sec": 100, "queries_per_op": 1},
+        ]}
+        current = {"results": [
+            {"name": "grouped", "ops_per_sec": 95, "queries_per_op": 1},
+            {"name": "validate", "ops_per_sec": 100, "queries_per_op": 2},
+            {"name": "login", "ops_per_sec": 3, "queries_per_op": 4},
+        ]}
+
+        changes = compare_results(baseline, current, threshold=0.1)
+        self.assertFalse(changes["grouped"]["regressed"])
+        self.assertTrue(changes["validate"]["regressed"])
+        self.assertNotIn("login", changes)
+
+        changes = compare_results(baseline, current, threshold=0.01)
+        self.assertTrue(changes["grouped"]["regressed"])
+
+
+@override_settings(SCHEDULE_INSTRUMENTATION=True, SCHEDULE_METRICS_TOKEN="")
+class InstrumentationMiddlewareTestCases(APITestCase):
+    """Request instrumentation middleware test case."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        access_token = RefreshToken.for_user(self.user).access_token
+        self.auth_header = {"HTTP_AUTHORIZATION": f"Bearer {access_token}"}
+        response_cache.clear()
+        metrics.clear()
+
+    def test_server_timing_and_metrics(self):
+        """Test requests get a Server-Timing header and are aggregated per view."""
+        response = self.client.get(reverse('schedule-list'), **self.auth_header)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=[\d.]+$')
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        content = response.content.decode()
+        self.assertIn('schedule_manager_requests_total{view="schedule-list",method="GET",status="200"} 1', content)
+        self.assertIn('schedule_manager_request_duration_seconds_bucket{view="schedule-list",method="GET",le="+Inf"} 1', content)
+        self.assertIn('schedule_manager_request_sql_queries_count{view="schedule-list",method="GET"} 1', content)
+        self.assertIn("# TYPE schedule_manager_request_sql_duration_seconds histogram", content)
+
+    async def test_async_views_are_instrumented(self):
+        """Test queries run by async views are counted."""
+        client = AsyncClient()
+        headers = {"Authorization": self.auth_header["HTTP_AUTHORIZATION"]}
+        response = await client.get(reverse('async-schedule-list'), headers=headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
+    @override_settings(SCHEDULE_METRICS_TOKEN="secret")
+    def test_metrics_token(self):
+        """Test the metrics endpoint requires the configured bearer token."""
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(SCHEDULE_INSTRUMENTATION=False)
+    def test_disabled(self):
+        """Test nothing is recorded or exposed when instrumentation is off."""
+        response = self.client.get(reverse('schedule-list'), **self.auth_header)
+        self.assertNotIn("Server-Timing", response)
+
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+@override_settings(SCHEDULE_OVERLAP_DETECTION=True)
+class ScheduleOverlapDetectionTestCases(APITestCase):
+    """Schedule overlap detection test case."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('schedule-list')
+        self.existing = Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="10:00", camera_ids=[1, 2])
+
+    def test_overlapping_schedule_is_rejected_with_conflicts(self):
+        """Test a schedule overlapping on a shared camera lists the conflicting schedule."""
+        payload = {"day": "monday", "start": "09:00", "stop": "11:00", "camera_ids": [2, 3]}
+
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["non_field_errors"], [OVERLAPPING_SCHEDULE_MESSAGE])
+        self.assertEqual(
+            response.data["conflicts"],
+            [{"id": str(self.existing.id), "day": "monday", "start": "08:00:00", "stop": "10:00:00"}],
+        )
+
+    def test_non_overlapping_schedules_are_accepted(self):
+        """Test adjacent windows, other cameras and other users do not conflict."""
+        payloads = [
+            {"day": "monday", "start": "10:00", "stop": "11:00", "camera_ids": [1]},
+            {"day": "monday", "start": "09:00", "stop": "11:00", "camera_ids": [3]},
+            {"day": "monday", "start": "09:00", "stop": "11:00", "badge_ids": ["1"]},
+        ]
+        for payload in payloads:
+            response = self.client.post(self.url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.client.force_authenticate(user=UserFactory())
+        response = self.client.post(self.url, {"day": "monday", "start": "08:00", "stop": "09:00", "camera_ids": [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_overnight_schedules_overlap_the_next_day(self):
+        """Test a window running past midnight, and past Sunday, overlaps the next day."""
+        Schedule.objects.create(user=self.user, day="sunday", start="23:00", stop="01:00", camera_ids=[5])
+
+        payload = {"day": "monday", "start": "00:30", "stop": "02:00", "camera_ids": [5]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["conflicts"][0]["day"], "sunday")
+
+    def test_update_does_not_conflict_with_itself(self):
+        """Test moving a schedule over its own previous window is accepted."""
+        url = reverse('schedule-detail', kwargs={"pk": self.existing.id})
+        response = self.client.patch(url, {"stop": "11:00", "camera_ids": [1, 2]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_bulk_rejects_overlaps_inside_the_batch(self):
+        """Test bulk creates overlapping a stored or an earlier schedule of the batch are rejected."""
+        operations = [
+            {"action": "create", "data": {"day": "tuesday", "start": "08:00", "stop": "10:00", "camera_ids": [1]}},
+            {"action": "create", "data": {"day": "tuesday", "start": "09:00", "stop": "10:00", "camera_ids": [1]}},
+            {"action": "create", "data": {"day": "monday", "start": "09:30", "stop": "12:00", "camera_ids": [2]}},
+            {"action": "delete", "id": self.existing.id},
+        ]
+
+        response = self.client.post(reverse('schedule-bulk'), operations, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["created", "error", "created", "deleted"])
+        self.assertEqual(results[1]["errors"]["conflicts"][0]["index"], "0")
+
+    def test_bulk_checks_many_windows_against_the_range_they_span(self):
+        """Test a batch with more windows than the query lists one by one still finds every stored conflict."""
+        Schedule.objects.create(user=self.user, day="sunday", start="23:00", stop="01:00", camera_ids=[1])
+        operations = [
+            {"action": "create", "data": {"day": day, "start": f"{hour:02}:00", "stop": f"{hour:02}:30", "camera_ids": [1]}}
+            for day in ("monday", "wednesday", "friday") for hour in range(0, 24, 1)
+        ]
+        response = self.client.post(reverse('schedule-bulk'), operations, format='json')
+        rejected = [
+            (operation["data"]["day"], operation["data"]["start"])
+            for operation, result in zip(operations, response.data["results"]) if result["status"] == "error"
+        ]
+        self.assertEqual(rejected, [("monday", "00:00"), ("monday", "08:00"), ("monday", "09:00")])
+
+    def test_bulk_fills_the_window_an_update_leaves(self):
+        """Test a schedule moved by the batch frees its stored window, unless the move is rejected."""
+        other = Schedule.objects.create(user=self.user, day="tuesday", start="08:00", stop="10:00", camera_ids=[1])
+        operations = [
+            {"action": "create", "data": {"day": "monday", "start": "08:00", "stop": "09:00", "camera_ids": [1]}},
+            {"action": "update", "id": self.existing.id, "data": {"start": "12:00", "stop": "13:00", "camera_ids": [1, 2]}},
+        ]
+        response = self.client.post(reverse('schedule-bulk'), operations, format='json')
+        self.assertEqual([result["status"] for result in response.data["results"]], ["created", "updated"])
+
+        # The move is rejected, so its stored window is still taken
+        operations = [
+            {"action": "create", "data": {"day": "monday", "start": "12:00", "stop": "12:30", "camera_ids": [2]}},
+            {"action": "update", "id": self.existing.id, "data": {
+                "day": "tuesday", "start": "09:00", "stop": "10:00", "camera_ids": [1, 2],
+            }},
+        ]
+        response = self.client.post(reverse('schedule-bulk'), operations, format='json')
+        results = response.data["results"]
+        self.assertEqual([result["status"] for result in results], ["error", "error"])
+        self.assertEqual(results[0]["errors"]["conflicts"][0]["id"], str(self.existing.id))
+        self.assertEqual(results[1]["errors"]["conflicts"][0]["id"], str(other.id))
+
+    @override_settings(SCHEDULE_OVERLAP_DETECTION=False)
+    def test_overlaps_are_allowed_when_disabled(self):
+        """Test overlap detection is opt-in."""
+        payload = {"day": "monday", "start": "09:00", "stop": "11:00", "camera_ids": [2]}
+        response = self.client.post(self.url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class ScheduleCompactionTestCases(APITestCase):
+    """Schedule compaction test case."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        weekly_timeline.clear()
+        response_cache.clear()
+
+        windows = [
+            ("monday", "08:00", "10:00", [1, 2]),
+            ("monday", "09:00", "11:00", [2, 1]),
+            ("monday", "11:00", "12:00", [1, 2]),
+            ("monday", "13:00", "14:00", [1, 2]),
+            ("monday", "09:00", "11:00", [3]),
+            ("tuesday", "20:00", "23:00", [1]),
+            ("tuesday", "22:00", "02:00", [1]),
+        ]
+        for day, start, stop, camera_ids in windows:
+            Schedule.objects.create(user=self.user, day=day, start=start, stop=stop, camera_ids=camera_ids)
+        self.other = Schedule.objects.create(user=UserFactory(), day="monday", start="10:00", stop="12:00", camera_ids=[1, 2])
+
+    def windows(self):
+        return sorted(
+            Schedule.objects.filter(user=self.user).values_list("day", "start", "stop", "camera_ids"),
+            key=lambda row: (row[0], row[1], row[3]),
+        )
+
+    def test_compaction_merges_overlapping_and_adjacent_windows(self):
+        """Test windows sharing a day and targets are merged, including past midnight."""
+        report = compact_user_schedules([self.user.pk])
+
+        self.assertEqual(report.schedules_scanned, 7)
+        self.assertEqual(report.groups_compacted, 2)
+        self.assertEqual(report.rows_removed, 3)
+        self.assertEqual(report.rows_updated, 2)
+        self.assertGreater(report.bytes_saved, 0)
+        self.assertEqual(
+            [(day, str(start), str(stop)) for day, start, stop, _ in self.windows()],
+            [
+                ("monday", "08:00:00", "12:00:00"),
+                ("monday", "09:00:00", "11:00:00"),
+                ("monday", "13:00:00", "14:00:00"),
+                ("tuesday", "20:00:00", "02:00:00"),
+            ],
+        )
+        self.assertEqual(
+            set(ScheduleTarget.objects.filter(schedule__user=self.user).values_list("schedule_id", flat=True)),
+            set(Schedule.objects.filter(user=self.user).values_list("id", flat=True)),
+        )
+        self.assertEqual(Schedule.objects.get(pk=self.other.pk).start_minute, self.other.start_minute)
+        self.assertEqual(compact_user_schedules([self.user.pk]).rows_removed, 0)
+
+    def test_compaction_keeps_windows_within_a_day(self):
+        """Test windows are not merged past the 24 hours a schedule can cover."""
+        Schedule.objects.create(user=self.user, day="friday", start="00:00", stop="12:00", badge_ids=["1"])
+        Schedule.objects.create(user=self.user, day="friday", start="12:00", stop="00:00", badge_ids=["1"])
+        Schedule.objects.create(user=self.user, day="friday", start="23:00", stop="01:00", badge_ids=["1"])
+
+        compact_user_schedules([self.user.pk])
+        self.assertEqual(
+            sorted(Schedule.objects.filter(user=self.user, day="friday").values_list("start", "stop")),
+            [(time(0, 0), time(0, 0)), (time(23, 0), time(1, 0))],
+        )
+
+    def test_compact_endpoint_dry_run_and_apply(self):
+        """Test the endpoint reports without writing on a dry run, then compacts the user's schedules."""
+        url = reverse('schedule-compact')
+        before = self.windows()
+
+        response = self.client.post(url, {"dry_run": True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["dry_run"], True)
+        self.assertEqual(response.data["rows_removed"], 3)
+        self.assertEqual(self.windows(), before)
+
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows_removed"], 3)
+        self.assertEqual(Schedule.objects.filter(user=self.user).count(), 4)
+        self.assertTrue(Schedule.objects.filter(pk=self.other.pk).exists())
+
+    def test_compact_schedules_command(self):
+        """Test the command compacts every user in batches, and only reports on a dry run."""
+        UserFactory()
+        Schedule.objects.create(user=self.other.user, day="monday", start="11:00", stop="13:00", camera_ids=[1, 2])
+
+        out = StringIO()
+        call_command("compact_schedules", "--dry-run", "--json", "--batch-size", "1", stdout=out)
+        self.assertEqual(json.loads(out.getvalue())["rows_removed"], 4)
+        self.assertEqual(Schedule.objects.count(), 9)
+
+        out = StringIO()
+        call_command("compact_schedules", "--batch-size", "1", stdout=out)
+        self.assertIn("Removed 4 of 9 schedules", out.getvalue())
+        self.assertEqual(Schedule.objects.count(), 5)
+
+
+@override_settings(SCHEDULE_STREAM_HEARTBEAT=0.05, SCHEDULE_STREAM_MAX_SECONDS=0.3)
+class ScheduleEventStreamTestCases(APITestCase):
+    """Schedule event stream test case."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        access_token = RefreshToken.for_user(self.user).access_token
+        self.headers = {"Authorization": f"Bearer {access_token}"}
+        self.first = Schedule.objects.create(user=self.user, day="monday", start="08:00", stop="09:00", camera_ids=[1])
+        self.second = Schedule.objects.create(user=self.user, day="monday", start="10:00", stop="11:00", badge_ids=["a"])
+
+    async def read_stream(self, **headers):
+        response = await AsyncClient().get(reverse('schedule-stream'), headers={**self.headers, **headers})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+    def test_schedule_changes_are_recorded_as_events(self):
+        """Test single and bulk writes append events with the written schedule."""
+        self.client.force_authenticate(user=self.user)
+        self.client.patch(reverse('schedule-detail', kwargs={"pk": self.first.id}), {"stop": "09:30", "camera_ids": [1]}, format='json')
+        self.client.delete(reverse('schedule-detail', kwargs={"pk": self.second.id}))
+        self.client.post(reverse('schedule-bulk'), [
+            {"action": "create", "data": {"day": "friday", "start": "08:00", "stop": "09:00", "camera_ids": [2]}},
+            {"action": "update", "id": self.first.id, "data": {"stop": "10:00", "camera_ids": [1]}},
+        ], format='json')
+
+        events = list(ScheduleEvent.objects.order_by("id").values_list("action", "schedule_id"))
+        self.assertEqual([action for action, _ in events], ["created", "created", "updated", "deleted", "created", "updated"])
+        self.assertEqual(events[3][1], self.second.id)
+        self.assertEqual(
+            ScheduleEvent.objects.latest("id").data,
+            {"id": self.first.id, "day": "monday", "start": "08:00:00", "stop": "10:00:00", "badge_ids": [], "camera_ids": [1]},
+        )
+
+    async def test_stream_resumes_after_last_event_id(self):
+        """Test the stream replays the events after Last-Event-ID, then keeps the connection alive."""
+        first_event = await ScheduleEvent.objects.order_by("id").afirst()
+        content = await self.read_stream(**{"Last-Event-ID": str(first_event.id)})
+
+        self.assertTrue(content.startswith("retry: 3000\n\n"))
+        self.assertIn(f"id: {first_event.id + 1}\nevent: created\ndata: {{\"id\":{self.second.id},", content)
+        self.assertNotIn(f"id: {first_event.id}\n", content)
+        self.assertIn(": keepalive", content)
+
+        # Without Last-Event-ID only new events are sent
+        content = await self.read_stream()
+        self.assertNotIn("event: created", content)
+
+    async def test_stream_pushes_committed_changes(self):
+        """Test a subscriber is woken up by a commit instead of waiting for the next poll."""
+        def create_schedule():
+            with self.captureOnCommitCallbacks(execute=True):
+                Schedule.objects.create(user=self.user, day="sunday", start="08:00", stop="09:00", camera_ids=[3])
+
+        # Without a wake up the next chunk would be the keepalive at the end of the stream
+        with override_settings(SCHEDULE_STREAM_HEARTBEAT=30, SCHEDULE_STREAM_MAX_SECONDS=1):
+            response = await AsyncClient().get(reverse('schedule-stream'), headers=self.headers)
+            stream = aiter(response.streaming_content)
+            self.assertEqual(await anext(stream), b"retry: 3000\n\n")
+
+            next_chunk = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)
+            await sync_to_async(create_schedule)()
+            self.assertIn(b'event: created\ndata: {"id":', await next_chunk)
+            self.assertEqual([chunk async for chunk in stream], [b": keepalive\n\n"])
+
+    async def test_stream_resets_pruned_clients(self):
+        """Test a client whose events were pruned is told to refetch."""
+        first_event = await ScheduleEvent.objects.order_by("id").afirst()
+        await ScheduleEvent.objects.filter(pk=first_event.pk).adelete()
+        await sync_to_async(Schedule.objects.create)(user=self.user, day="friday", start="08:00", stop="09:00", camera_ids=[1])
+
+        content = await self.read_stream(**{"Last-Event-ID": str(first_event.id - 1)})
+        self.assertIn("event: reset\n", content)
+        self.assertNotIn("event: created", content)
+
+    async def test_stream_waits_at_gaps_until_they_time_out(self):
+        """Test an event after a missing ID is held back while the ID may still commit, however old the event."""
+        last_id = (await ScheduleEvent.objects.order_by("-id").afirst()).id
+        # Committed after a long transaction, the event after the gap is old already
+        await ScheduleEvent.objects.acreate(id=last_id + 3, action="created", schedule_id=1, data={})
+        await ScheduleEvent.objects.filter(id=last_id + 3).aupdate(created_at=timezone.now() - timedelta(hours=1))
+
+        gaps = {}
+        self.assertEqual(await afetch_events(last_id, gaps), ([], True))
+        self.assertEqual(set(gaps), {last_id + 1, last_id + 2})
+
+        # The transaction holding the first ID commits, the second is still missing
+        await ScheduleEvent.objects.acreate(id=last_id + 1, action="created", schedule_id=1, data={})
+        events, pending = await afetch_events(last_id, gaps)
+        self.assertEqual(([event.id for event in events], pending), ([last_id + 1], True))
+        self.assertEqual(set(gaps), {last_id + 2})
+
+        # Missing for longer than any transaction, the ID was rolled back
+        with override_settings(SCHEDULE_STREAM_GAP_TIMEOUT=0):
+            events, pending = await afetch_events(last_id + 1, gaps)
+        self.assertEqual(([event.id for event in events], pending), ([last_id + 3], False))
+        self.assertEqual(gaps, {})
+
+    def test_stream_rejects_anonymous_and_invalid_ids(self):
+        """Test the stream requires authentication and a numeric Last-Event-ID."""
+        response = self.client.get(reverse('schedule-stream'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self.client.get(reverse('schedule-stream'), HTTP_AUTHORIZATION=self.headers["Authorization"], HTTP_LAST_EVENT_ID="x")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        # A WSGI server would buffer the stream to its end
+        response = self.client.get(reverse('schedule-stream'), HTTP_AUTHORIZATION=self.headers["Authorization"])
+        self.assertEqual(response.status_code, status.HTTP_501_NOT_IMPLEMENTED)
+
+    def test_listener_reads_notifies_of_both_drivers(self):
+        """Test notifications are read from psycopg 3 and psycopg2 connections."""
+        notify = mock.Mock(payload="7")
+        psycopg3 = mock.Mock(spec=["notifies"])
+        psycopg3.notifies.return_value = iter([notify])
+        self.assertEqual(wait_notifies(psycopg3, 60), ["7"])
+        psycopg3.notifies.assert_called_once_with(timeout=60, stop_after=1)
+
+        psycopg2 = mock.Mock(spec=["poll", "fileno"], notifies=[notify, mock.Mock(payload="8")])
+        with mock.patch("schedule_manager.utils.events.select.select", return_value=([psycopg2], [], [])):
+            self.assertEqual(wait_notifies(psycopg2, 60), ["7", "8"])
+        psycopg2.poll.assert_called_once_with()
+        self.assertEqual(psycopg2.notifies, [])
+
+        with mock.patch("schedule_manager.utils.events.select.select", return_value=([], [], [])):
+            self.assertEqual(wait_notifies(psycopg2, 60), [])
+
+    def test_prune_schedule_events_keeps_the_latest(self):
+        """Test pruning deletes old events but keeps the latest one."""
+        out = StringIO()
+        call_command("prune_schedule_events", "--retention", "0", stdout=out)
+        self.assertIn("Deleted 1 schedule events.", out.getvalue())
+        self.assertEqual(list(ScheduleEvent.objects.values_list("schedule_id", flat=True)), [self.second.id])
+
+
+class ScheduleDeltaSyncTestCases(APITestCase):
+    """Schedule delta sync test case."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('schedule-changes')
+        weekly_timeline.clear()
+        response_cache.clear()
+        self.schedules = [
+            Schedule.objects.create(user=self.user, day="monday", start=f"0{hour}:00", stop=f"0{hour}:30", camera_ids=[1])
+            for hour in range(3)
+        ]
+        self.settle()
+
+    def settle(self):
+        """Age every write past the window in which cursors wait for concurrent commits."""
+        Schedule.all_objects.update(updated_at=timezone.now() - timedelta(hours=1))
+
+    def test_destroy_leaves_a_tombstone(self):
+        """Test deleting a schedule soft-deletes it and frees its unique key."""
+        schedule = self.schedules[0]
+        response = self.client.delete(reverse('schedule-detail', kwargs={"pk": schedule.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+        self.assertFalse(Schedule.objects.filter(pk=schedule.id).exists())
+        self.assertFalse(Schedule.all_objects.get(pk=schedule.id).is_active)
+        self.assertFalse(ScheduleTarget.objects.filter(schedule_id=schedule.id).exists())
+        response = self.client.get(reverse('schedule-detail', kwargs={"pk": schedule.id}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        payload = {"day": "monday", "start": "00:00", "stop": "00:30", "camera_ids": [1]}
+        response = self.client.post(reverse('schedule-list'), payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_changes_wait_for_transactions_committing_late(self):
+        """Test a write stamped before a sync but committed after it is sent on the next sync."""
+        cursor = self.client.get(self.url).data["cursor"]
+
+        # A bulk write stamped its rows 30 seconds ago and only commits now
+        late = Schedule.objects.create(user=self.user, day="tuesday", start="08:00", stop="09:00", camera_ids=[1])
+        Schedule.all_objects.filter(pk=late.pk).update(updated_at=timezone.now() - timedelta(seconds=30))
+
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual([change["id"] for change in response.data["changes"]], [late.id])
+
+    def test_changes_reject_malformed_cursors(self):
+        """Test naive, unparsable and truncated cursors are a 400, not a server error."""
+        for position in ("2026-01-01T00:00:00|1", "2026-13-01T00:00:00+00:00|1", "2026-01-01T00:00:00+00:00", "now|1"):
+            cursor = base64.urlsafe_b64encode(position.encode()).decode()
+            response = self.client.get(self.url, {"since": cursor})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, position)
+            self.assertEqual(response.data["since"], ["Invalid cursor."])
+
+    def test_changes_return_only_what_changed_since_the_cursor(self):
+        """Test a resync returns the changes and tombstones after the cursor with one query."""
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([change["id"] for change in response.data["changes"]], [schedule.id for schedule in self.schedules])
+        self.assertEqual(response.data["deleted"], [])
+        self.assertFalse(response.data["has_more"])
+        cursor = response.data["cursor"]
+
+        updated, deleted, _ = self.schedules
+        self.client.patch(reverse('schedule-detail', kwargs={"pk": updated.id}), {"stop": "00:45", "camera_ids": [1]}, format='json')
+        self.client.delete(reverse('schedule-detail', kwargs={"pk": deleted.id}))
+
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual(
+            response.data["changes"],
+            [{"id": updated.id, "day": "monday", "start": "00:00:00", "stop": "00:45:00", "badge_ids": [], "camera_ids": [1]}],
+        )
+        self.assertEqual(response.data["deleted"], [deleted.id])
+
+        # Recent writes are sent again until they settle, then the cursor moves past them
+        self.assertEqual(self.client.get(self.url, {"since": response.data["cursor"]}).data["deleted"], [deleted.id])
+        self.settle()
+        cursor = self.client.get(self.url, {"since": cursor}).data["cursor"]
+        response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual((response.data["changes"], response.data["deleted"]), ([], []))
+
+    def test_changes_are_paged(self):
+        """Test a resync larger than the page size is fetched in several pages."""
+        response = self.client.get(self.url, {"page_size": 2})
+        self.assertEqual(len(response.data["changes"]), 2)
+        self.assertTrue(response.data["has_more"])
+
+        response = self.client.get(self.url, {"page_size": 2, "since": response.data["cursor"]})
+        self.assertEqual([change["id"] for change in response.data["changes"]], [self.schedules[2].id])
+
+    def test_invalid_and_expired_cursors(self):
+        """Test malformed cursors are rejected and cursors older than the tombstones need a full sync."""
+        response = self.client.get(self.url, {"since": "invalid"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        cursor = self.client.get(self.url).data["cursor"]
+        with override_settings(SCHEDULE_TOMBSTONE_RETENTION=0):
+            response = self.client.get(self.url, {"since": cursor})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_purge_schedule_tombstones(self):
+        """Test purging removes old tombstones only, without new events."""
+        old, recent, _ = self.schedules
+        old.soft_delete()
+        Schedule.all_objects.filter(pk=old.pk).update(updated_at=timezone.now() - timedelta(days=60))
+        recent.soft_delete()
+        events = ScheduleEvent.objects.count()
+
+        out = StringIO()
+        call_command("purge_schedule_tombstones", stdout=out)
+        self.assertIn("Deleted 1 schedule tombstones.", out.getvalue())
+        self.assertFalse(Schedule.all_objects.filter(pk=old.pk).exists())
+        self.assertTrue(Schedule.all_objects.filter(pk=recent.pk).exists())
+        self.assertEqual(ScheduleEvent.objects.count(), events)
+
+
+@override_settings(SCHEDULE_IMPORT_CHUNK_SIZE=2)
+class ScheduleImportTestCases(APITestCase):
+    """Schedule import test case."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('schedule-import')
+        weekly_timeline.clear()
+        response_cache.clear()
+        Schedule.objects.create(user=self.user, day="sunday", start="10:00", stop="11:00", camera_ids=[9])
+
+    def upload(self, content, name="schedules.csv", **data):
+        """Upload an import file."""
+        file = SimpleUploadedFile(name, content.encode())
+        return self.client.post(self.url, {"file": file, **data}, format="multipart")
+
+    def test_import_endpoint_reports_row_errors(self):
+        """Test valid rows are imported in chunks and every rejected row is reported."""
+        content = "\n".join([
+            "day,start,stop,badge_ids,camera_ids",
+            'monday,08:00,09:00,,"[1, 2]"',
+            'monday,08:00,09:00,,"[2, 1]"',
+            'someday,08:00,09:00,,"[1]"',
+            "tuesday,08:00,09:00,,[1",
+            'sunday,10:00,11:00,,"[9]"',
+            'friday,22:00,02:00,"[""b-1""]",',
+            "friday,22:00,02:00,,",
+        ])
+        response = self.upload(content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["status"], "completed")
+        self.assertEqual(response.data["rows_read"], 7)
+        self.assertEqual(response.data["rows_imported"], 2)
+        self.assertEqual(response.data["rows_failed"], 5)
+        errors = {error["row"]: error["errors"] for error in response.data["errors"]}
+        self.assertEqual(sorted(errors), [2, 3, 4, 5, 7])
+        self.assertEqual(errors[2], {"non_field_errors": [DUPLICATE_SCHEDULE_MESSAGE]})
+        self.assertIn("day", errors[3])
+        self.assertEqual(errors[4], {"camera_ids": ["Expected a JSON array."]})
+        self.assertEqual(errors[5], {"non_field_errors": [DUPLICATE_SCHEDULE_MESSAGE]})
+        self.assertIn("non_field_errors", errors[7])
+
+        friday = Schedule.objects.get(user=self.user, day="friday")
+        self.assertEqual(friday.badge_ids, ["b-1"])
+        self.assertTrue(ScheduleTarget.objects.filter(schedule=friday, kind="badge", target_id="b-1").exists())
+
+        # Uploading the same completed file again is rejected
+        response = self.upload(content)
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("already completed", response.data["detail"])
+        self.assertEqual(Schedule.objects.filter(user=self.user).count(), 3)
+
+        response = self.upload("day,start\n", name="schedules.xlsx")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("file", response.data)
+
+    def test_interrupted_import_resumes_after_committed_rows(self):
+        """Test an import resumes after its last committed row and rejects unreadable files."""
+        lines = [
+            json.dumps({"day": "monday", "start": f"0{hour}:00", "stop": f"0{hour}:30", "camera_ids": [1]})
+            for hour in range(5)
+        ]
+        # The first chunk was committed before the upload was interrupted
+        ScheduleImport.objects.create(user=self.user, key="onboarding", format="jsonl", rows_read=2, rows_imported=2)
+
+        response = self.upload("\n".join(lines) + "\n\n[1]\n", name="schedules.jsonl", key="onboarding")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["rows_read"], 6)
+        self.assertEqual(response.data["rows_imported"], 5)
+        self.assertEqual(response.data["errors"], [{"row": 6, "errors": {"non_field_errors": ["Expected a JSON object."]}}])
+        starts = Schedule.objects.filter(user=self.user, day="monday").values_list("start", flat=True)
+        self.assertEqual(sorted(starts), [time(2), time(3), time(4)])
+
+        file = SimpleUploadedFile("broken.jsonl", b'{"day": "monday"}\n\xff\xfe')
+        response = self.client.post(self.url, {"file": file}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("Unreadable file", response.data["detail"])
+
+    @override_settings(SCHEDULE_IMPORT_REQUEST_CHUNKS=1)
+    def test_large_uploads_are_imported_over_several_requests(self):
+        """Test a request stops after its chunks and the same upload resumes the import."""
+        content = "\n".join(["day,start,stop,camera_ids"] + [f'monday,0{hour}:00,0{hour}:30,"[1]"' for hour in range(3)])
+
+        response = self.upload(content)
+        self.assertEqual((response.data["status"], response.data["rows_read"]), ("running", 2))
+        response = self.upload(content)
+        self.assertEqual((response.data["status"], response.data["rows_read"]), ("completed", 3))
+        self.assertEqual(Schedule.objects.filter(user=self.user, day="monday").count(), 3)
+
+        # Imports without a user are unique by key as well
+        ScheduleImport.objects.create(key="nightly", format="csv")
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ScheduleImport.objects.create(key="nightly", format="csv")
+
+    def test_imports_resume_only_the_same_file(self):
+        """Test the default key follows the file content and a key cannot resume another file."""
+        first = 'day,start,stop,camera_ids\nmonday,08:00,09:00,"[1]"'
+        second = 'day,start,stop,camera_ids\ntuesday,08:00,09:00,"[1]"'
+
+        response = self.upload(first)
+        self.assertEqual(response.data["key"], f"sha256:{hashlib.sha256(first.encode()).hexdigest()}")
+        # Another file of the same name is a new import
+        response = self.upload(second)
+        self.assertEqual((response.status_code, response.data["rows_imported"]), (status.HTTP_200_OK, 1))
+
+        ScheduleImport.objects.create(user=self.user, key="weekly", format="csv", fingerprint="0" * 64, rows_read=1)
+        response = self.upload(second, key="weekly")
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertIn("another file", response.data["detail"])
+        self.assertEqual(ScheduleImport.objects.get(key="weekly").rows_read, 1)
+
+    def test_import_schedules_command(self):
+        """Test the command imports the schedule export and reads users from the rows."""
+        other = UserFactory()
+        export = "".join(stream_ndjson(Schedule.objects.all()))
+        rows = [
+            export,
+            json.dumps({"user": other.id, "day": "monday", "start": "08:00", "stop": "09:00", "camera_ids": [1]}),
+            json.dumps({"user": 0, "day": "monday", "start": "08:00", "stop": "09:00", "camera_ids": [1]}),
+            json.dumps({"day": "monday", "start": "08:00", "stop": "09:00", "camera_ids": [1]}),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedules.ndjson")
+            errors_path = os.path.join(directory, "errors.jsonl")
+            with open(path, "w") as file:
+                file.write("\n".join(rows) + "\n")
+
+            stdout = StringIO()
+            call_command("import_schedules", path, errors=errors_path, stdout=stdout)
+            self.assertIn("Imported 1 schedules from 4 rows, 3 rejected.", stdout.getvalue())
+            with open(errors_path) as file:
+                errors = [json.loads(line) for line in file]
+            self.assertEqual([error["row"] for error in errors], [1, 3, 4])
+            self.assertEqual(errors[1]["errors"], {"user": ["User not found."]})
+            self.assertEqual(errors[2]["errors"], {"user": ["This field is required."]})
+            self.assertTrue(Schedule.objects.filter(user=other, day="monday").exists())
+
+            # The export of one user is imported for another with --user
+            call_command("import_schedules", path, user=other.id, key="copy", stdout=StringIO())
+            self.assertTrue(Schedule.objects.filter(user=other, day="sunday", camera_ids=[9]).exists())
+            self.assertEqual(ScheduleImport.objects.get(key="copy").rows_failed, 3)
+
+            with self.assertRaises(CommandError):
+                call_command("import_schedules", os.path.join(directory, "schedules.txt"), stdout=StringIO())
@@ -7,8 +7,15 @@ from schedule_manager.auth.views import (
     TokenRefreshView
 )
 from schedule_manager.views import (
+    MetricsView,
     ScheduleViews
 )
+from schedule_manager.async_views import (
+    schedule_list,
+    schedule_detail,
+    schedule_grouped,
+    schedule_stream
+)
 
 router = routers.SimpleRouter(trailing_slash=False)
 router.register(r'schedule', ScheduleViews, basename='schedule')
@@ -18,6 +25,15 @@ urlpatterns = [
     path("logout", LogoutView.as_view(), name="logout-user"),
     path("register", RegisterView.as_view(), name="register-user"),
     path("refresh/token", TokenRefreshView.as_view(), name="refresh-token"),
+    path("metrics", MetricsView.as_view(), name="metrics"),
+
+    # Async read endpoints, served without a worker thread under ASGI
+    path("async/schedule", schedule_list, name="async-schedule-list"),
+    path("async/schedule/grouped", schedule_grouped, name="async-schedule-grouped"),
+    path("async/schedule/<int:pk>", schedule_detail, name="async-schedule-detail"),
+
+    # Server-Sent Events feed of schedule changes
+    path("schedule/stream", schedule_stream, name="schedule-stream"),
 
 ]
 
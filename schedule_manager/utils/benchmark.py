@@ -0,0 +1,130 @@
+import gc
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from statistics import median
+from typing import Any, Callable, Dict, Optional
+from django.db import connection
+
+
+@dataclass
+class BenchmarkResult:
+    """Timings, query count and allocations of a single benchmark."""
+
+    name: str
+    iterations: int
+    ops_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    queries_per_op: float
+    allocated_bytes_per_op: int
+    peak_bytes: int
+    payload_bytes: Optional[int] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the result as a JSON serializable dictionary."""
+        return asdict(self)
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries it sees. Unlike the
+    queries log it is not capped and works with DEBUG off.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(samples, fraction: float) -> float:
+    """Return the nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(fraction * len(ordered)) - 1))
+    return ordered[index]
+
+
+def run_benchmark(
+    name: str,
+    operation: Callable[[], Any],
+    iterations: int,
+    warmup: int = 5,
+    setup: Optional[Callable[[], None]] = None,
+) -> BenchmarkResult:
+    """
+    Time `operation` over `iterations` runs. `setup` runs before every call
+    and is neither timed nor counted. Allocations are measured in a
+    separate pass so tracemalloc does not slow down the timed runs. When
+    the operation returns bytes, their length is reported as the payload.
+    """
+    for _ in range(warmup):
+        if setup is not None:
+            setup()
+        operation()
+
+    samples = []
+    counter = QueryCounter()
+    gc.collect()
+    for _ in range(iterations):
+        if setup is not None:
+            setup()
+        with connection.execute_wrapper(counter):
+            started = time.perf_counter()
+            operation()
+            samples.append(time.perf_counter() - started)
+
+    allocated = peak = 0
+    tracemalloc.start()
+    try:
+        for _ in range(min(iterations, 10)):
+            if setup is not None:
+                setup()
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            payload = operation()
+            _, run_peak = tracemalloc.get_traced_memory()
+            allocated = max(allocated, run_peak - before)
+            peak = max(peak, run_peak)
+    finally:
+        tracemalloc.stop()
+
+    total = sum(samples)
+    return BenchmarkResult(
+        name=name,
+        iterations=iterations,
+        ops_per_sec=round(iterations / total, 2) if total else 0.0,
+        p50_ms=round(median(samples) * 1000, 3),
+        p99_ms=round(percentile(samples, 0.99) * 1000, 3),
+        queries_per_op=round(counter.count / iterations, 2),
+        allocated_bytes_per_op=allocated,
+        peak_bytes=peak,
+        payload_bytes=len(payload) if isinstance(payload, bytes) else None,
+    )
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float) -> Dict[str, Dict[str, Any]]:
+    """
+    Compare two benchmark reports and return, per benchmark present in
+    both, the relative change of ops/sec and query count. A benchmark
+    regresses when its throughput drops by more than `threshold` (a
+    fraction) or it runs more queries per operation.
+    """
+    previous = {result["name"]: result for result in baseline.get("results", [])}
+    changes = {}
+
+    for result in current.get("results", []):
+        old = previous.get(result["name"])
+        if old is None or not old["ops_per_sec"]:
+            continue
+
+        throughput = (result["ops_per_sec"] - old["ops_per_sec"]) / old["ops_per_sec"]
+        changes[result["name"]] = {
+            "ops_per_sec_change": round(throughput, 4),
+            "queries_per_op_change": round(result["queries_per_op"] - old["queries_per_op"], 2),
+            "regressed": throughput < -threshold or result["queries_per_op"] > old["queries_per_op"],
+        }
+
+    return changes
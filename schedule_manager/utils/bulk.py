@@ -0,0 +1,231 @@
+from typing import Any, Dict, List
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from schedule_manager.models import DERIVED_FIELDS, TOMBSTONE_FIELDS, Schedule
+from schedule_manager.signals import schedules_bulk_saved
+from schedule_manager.utils.overlap import find_overlapping_schedules, lock_user_schedules
+from schedule_manager.serializers import (
+    DUPLICATE_SCHEDULE_MESSAGE,
+    BulkScheduleSerializer,
+    BulkOperationSerializer,
+    overlap_error
+)
+
+BULK_BATCH_SIZE = 500
+BULK_UPDATE_FIELDS = ["day", "start", "stop", "badge_ids", "camera_ids", *DERIVED_FIELDS, "updated_at"]
+
+
+def schedule_key(schedule: Schedule):
+    """Return the key the unique fingerprint constraint is enforced on."""
+    return schedule.user_id, schedule.day, schedule.start, schedule.stop, schedule.fingerprint
+
+
+def _error(index: int, errors) -> Dict[str, Any]:
+    """Return the result of a rejected operation."""
+    return {"index": index, "status": "error", "errors": errors}
+
+
+def find_existing_schedules(schedules: List[Schedule]) -> Dict[tuple, int]:
+    """
+    Map the unique key of every stored schedule that could conflict with the
+    given schedules to its ID, in one query.
+    """
+    if not schedules:
+        return {}
+
+    rows = Schedule.objects.filter(
+        user_id__in={schedule.user_id for schedule in schedules},
+        fingerprint__in={schedule.fingerprint for schedule in schedules},
+    ).values_list("id", "user_id", "day", "start", "stop", "fingerprint")
+    return {tuple(key): schedule_id for schedule_id, *key in rows}
+
+
+def reject_duplicate_schedules(pending, existing, deleted_ids, results):
+    """
+    Reject the schedules whose key is taken by a stored schedule or an
+    earlier schedule of the batch, and return the remaining ones.
+
+    Deleted schedules and schedules updated to another key leave their
+    stored key, so another schedule of the batch may take it. A rejected
+    update keeps its stored key, and the others are checked again against it.
+    """
+    rejected = set()
+    while True:
+        kept = [item for item in pending if item[0] not in rejected]
+        moved = {schedule.pk: schedule_key(schedule) for _, schedule in kept if schedule.pk is not None}
+        seen = set()
+
+        rejected_updates = False
+        for index, schedule in kept:
+            key = schedule_key(schedule)
+            holder = existing.get(key)
+            vacated = holder in deleted_ids or moved.get(holder, key) != key
+            if key in seen or (holder not in (None, schedule.pk) and not vacated):
+                results[index] = _error(index, {"non_field_errors": [DUPLICATE_SCHEDULE_MESSAGE]})
+                rejected.add(index)
+                rejected_updates = rejected_updates or schedule.pk is not None
+                continue
+            seen.add(key)
+        if not rejected_updates:
+            break
+
+    return [item for item in pending if item[0] not in rejected]
+
+
+def reject_overlapping_schedules(creates, updates, deleted_ids, results):
+    """
+    Reject the creates and updates overlapping a stored schedule or an
+    earlier schedule of the batch, and return the remaining ones.
+
+    Updated schedules leave their stored windows, so another schedule of
+    the batch may take them. A rejected update stays where it is stored,
+    and the others are checked again against it.
+    """
+    pending = sorted(creates + updates, key=lambda item: item[0])
+    lock_user_schedules(schedule.user_id for _, schedule in pending)
+
+    rejected = set()
+    while True:
+        kept = [item for item in pending if item[0] not in rejected]
+        moved_ids = {schedule.pk for _, schedule in kept if schedule.pk is not None}
+        conflicts = find_overlapping_schedules(
+            [({"index": index}, schedule) for index, schedule in kept],
+            exclude_ids=set(deleted_ids) | moved_ids,
+        )
+
+        rejected_updates = False
+        for (index, schedule), schedule_conflicts in zip(kept, conflicts):
+            if schedule_conflicts:
+                results[index] = _error(index, overlap_error(schedule_conflicts).detail)
+                rejected.add(index)
+                rejected_updates = rejected_updates or schedule.pk is not None
+        if not rejected_updates:
+            break
+
+    return (
+        [item for item in creates if item[0] not in rejected],
+        [item for item in updates if item[0] not in rejected],
+    )
+
+
+def apply_bulk_operations(operations: List[Any], request) -> List[Dict[str, Any]]:
+    """
+    Validate a batch of create/update/delete operations together and write
+    the valid ones in one transaction.
+
+    Every conflicting row is fetched with a single query, duplicates inside
+    the batch are detected in memory and the writes use bulk_create and
+    bulk_update. Return one result per operation, in order.
+    """
+    results: List[Dict[str, Any]] = [None] * len(operations)
+    envelopes = []
+
+    for index, operation in enumerate(operations):
+        serializer = BulkOperationSerializer(data=operation)
+        if serializer.is_valid():
+            envelopes.append((index, serializer.validated_data))
+        else:
+            results[index] = _error(index, serializer.errors)
+
+    # Fetch every schedule to update or delete at once
+    instances = Schedule.objects.in_bulk(
+        {operation["id"] for _, operation in envelopes if operation["action"] != "create"}
+    )
+
+    pending, deletes, touched_ids = [], [], set()
+    for index, operation in envelopes:
+        instance = None
+        if operation["action"] != "create":
+            instance = instances.get(operation["id"])
+            if instance is None:
+                results[index] = _error(index, {"id": "Schedule not found."})
+                continue
+            if instance.pk in touched_ids:
+                results[index] = _error(index, {"id": "Schedule appears more than once in the batch."})
+                continue
+            touched_ids.add(instance.pk)
+
+        if operation["action"] == "delete":
+            deletes.append((index, instance))
+            continue
+
+        serializer = BulkScheduleSerializer(
+            instance,
+            data=operation["data"],
+            partial=instance is not None,
+            context={"request": request},
+        )
+        if not serializer.is_valid():
+            results[index] = _error(index, serializer.errors)
+            continue
+
+        if instance is None:
+            schedule = Schedule(user=request.user, **serializer.validated_data)
+        else:
+            schedule = instance
+            for field, value in serializer.validated_data.items():
+                setattr(schedule, field, value)
+        schedule.update_derived_fields()
+        pending.append((index, schedule))
+
+    existing = find_existing_schedules([schedule for _, schedule in pending])
+    deleted_ids = {instance.pk for _, instance in deletes}
+
+    with transaction.atomic():
+        # Every rejected update stays at its stored key and window, which the
+        # other schedules of the batch are checked against again
+        while True:
+            pending = reject_duplicate_schedules(pending, existing, deleted_ids, results)
+            creates = [item for item in pending if item[1].pk is None]
+            updates = [item for item in pending if item[1].pk is not None]
+            if not settings.SCHEDULE_OVERLAP_DETECTION:
+                break
+            creates, kept_updates = reject_overlapping_schedules(creates, updates, deleted_ids, results)
+            if len(kept_updates) == len(updates):
+                break
+            pending = sorted(creates + kept_updates, key=lambda item: item[0])
+
+        # Delete, then update, then create, so a schedule may take the key of one
+        # deleted or moved by the batch. Stamped right before the writes, so
+        # delta sync cursors settle past them.
+        tombstones = [instance for _, instance in deletes]
+        for tombstone in tombstones:
+            tombstone.mark_deleted()
+        now = timezone.now()
+        for _, schedule in updates:
+            schedule.updated_at = now
+        Schedule.objects.bulk_update(tombstones, TOMBSTONE_FIELDS, batch_size=BULK_BATCH_SIZE)
+
+        # The unique constraint is checked row by row, so the updates whose
+        # stored key another schedule takes (as in a swap) are deactivated first
+        taken_ids = set()
+        for _, schedule in creates + updates:
+            holder = existing.get(schedule_key(schedule))
+            if holder != schedule.pk:
+                taken_ids.add(holder)
+        parked_ids = taken_ids & {schedule.pk for _, schedule in updates}
+        update_fields = BULK_UPDATE_FIELDS
+        if parked_ids:
+            Schedule.objects.filter(pk__in=parked_ids).update(is_active=False)
+            update_fields = [*BULK_UPDATE_FIELDS, "is_active"]
+        Schedule.all_objects.bulk_update(
+            [schedule for _, schedule in updates],
+            update_fields,
+            batch_size=BULK_BATCH_SIZE,
+        )
+        created = Schedule.objects.bulk_create(
+            [schedule for _, schedule in creates],
+            batch_size=BULK_BATCH_SIZE,
+        )
+        schedules_bulk_saved.send(
+            sender=Schedule,
+            schedules=created + [schedule for _, schedule in updates] + tombstones,
+            created=created,
+        )
+
+    for status, items in (("created", creates), ("updated", updates), ("deleted", deletes)):
+        for index, schedule in items:
+            results[index] = {"index": index, "status": status, "id": schedule.pk}
+
+    return results
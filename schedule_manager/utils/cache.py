@@ -0,0 +1,191 @@
+import time
+import threading
+from functools import wraps
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from schedule_manager.routers import pin_if_recently_changed
+from schedule_manager.utils.metrics import metrics
+from schedule_manager.utils.compression import IDENTITY, CompressedBody
+
+VERSION_KEY_PREFIX = "schedule_manager:version:"
+SCHEDULE_SCOPE = "schedule"
+
+_MISSING = object()
+
+
+class LRUCache:
+    """
+    Thread-safe, size-bounded LRU cache with an optional time-to-live.
+    """
+
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """Return the cached value and mark it as recently used."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store a value, evicting the least recently used entries when full."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove a value if it is cached."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every value."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def get_version(scope: str) -> int:
+    """
+    Return the current version of a scope. Versions are nanosecond timestamps
+    of the last change, so a lost counter never comes back with an old value.
+    """
+    key = VERSION_KEY_PREFIX + scope
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(scope: str) -> int:
+    """Async version of get_version."""
+    key = VERSION_KEY_PREFIX + scope
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(scope: str) -> int:
+    """Mark a scope as changed and return its new version."""
+    version = time.time_ns()
+    cache.set(VERSION_KEY_PREFIX + scope, version, None)
+    return version
+
+
+# Rendered and compressed bodies of the process keyed by (scope, version, path, media type)
+response_cache = LRUCache(settings.SCHEDULE_RESPONSE_CACHE_SIZE)
+
+
+def version_headers(scope: str, version: int):
+    """Return the validator and caching headers of a scope version."""
+    return {
+        "ETag": f'W/"{scope}-{version}"',
+        "Last-Modified": http_date(version // 1_000_000_000),
+        "Cache-Control": "private, no-cache",
+    }
+
+
+def is_not_modified(request, scope: str, version: int) -> bool:
+    """
+    Evaluate If-None-Match, falling back to If-Modified-Since. Dates only
+    have a one-second resolution, so a version from the same second as the
+    date counts as modified; clients revalidate reliably with the ETag.
+    """
+    etag = f'"{scope}-{version}"'
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return "*" in etags or any(value.removeprefix("W/") == etag for value in etags)
+
+    if_modified_since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return if_modified_since is not None and version // 1_000_000_000 < if_modified_since
+
+
+def send_compressed(response, body: CompressedBody, accept_encoding: str) -> str:
+    """Set the body encoding the client accepts best on the response, and return the encoding."""
+    encoding, content = body.negotiate(accept_encoding)
+    response.content = content
+    if encoding != IDENTITY:
+        response["Content-Encoding"] = encoding
+    return encoding
+
+
+def store_compressed(response, key, accept_encoding: str):
+    """Compress a freshly rendered body, cache it and send it in the accepted encoding."""
+    body = CompressedBody.build(response.content, response["Content-Type"])
+    response_cache.set(key, body)
+    for encoding, content in body.encoded.items():
+        metrics.observe_compression(encoding, len(content) / len(body.content))
+
+    encoding = send_compressed(response, body, accept_encoding)
+    metrics.observe_cached_response("miss", encoding, len(response.content))
+
+
+def versioned_response(scope: str):
+    """
+    Decorate a read-only view action with conditional GET and a response cache.
+
+    The ETag and Last-Modified validators come from the scope version, so a
+    matching If-None-Match is answered with 304 without touching the data.
+    Rendered bodies are cached per version, with their gzip and brotli forms
+    compressed once, and evicted in LRU order. Each response gets the form
+    its Accept-Encoding prefers.
+    """
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(self, request, *args, **kwargs):
+            version = get_version(scope)
+            headers = version_headers(scope, version)
+            pin_if_recently_changed(version)
+            accept_encoding = request.META.get("HTTP_ACCEPT_ENCODING", "")
+
+            if is_not_modified(request, scope, version):
+                response = HttpResponseNotModified()
+            else:
+                key = (scope, version, request.get_full_path(), request.accepted_media_type)
+                cached = response_cache.get(key)
+                if cached is not None:
+                    response = HttpResponse(content_type=cached.content_type)
+                    encoding = send_compressed(response, cached, accept_encoding)
+                    metrics.observe_cached_response("hit", encoding, len(response.content))
+                else:
+                    response = view_func(self, request, *args, **kwargs)
+                    if response.status_code == 200:
+                        response.add_post_render_callback(
+                            lambda rendered: store_compressed(rendered, key, accept_encoding)
+                        )
+
+            for header, value in headers.items():
+                response[header] = value
+            # JSON and MessagePack bodies, in any encoding, share the URL and the validators
+            patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+            return response
+
+        return wrapper
+
+    return decorator
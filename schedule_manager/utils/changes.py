@@ -0,0 +1,54 @@
+from datetime import timedelta
+from typing import Any, Dict, Optional, Tuple
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from schedule_manager.models import Schedule
+from schedule_manager.pagination import encode_keyset_cursor
+from schedule_manager.utils.representation import represent_schedule_row
+
+CHANGE_FIELDS = ("id", "updated_at", "is_active", "day", "start", "stop", "badge_ids", "camera_ids")
+
+
+def fetch_changes(since: Optional[Tuple[Any, int]], page_size: int) -> Dict[str, Any]:
+    """
+    Return the schedules written after the `since` (updated_at, id) position:
+    the changed schedules, the IDs of the deleted ones and the cursor to
+    resume from. Without `since`, return every active schedule.
+
+    One range scan on the (updated_at, id) index, so a resync costs the
+    number of changes rather than the number of schedules.
+
+    A transaction still committing may have written an earlier updated_at
+    than rows already visible. Cursors never move past rows younger than
+    SCHEDULE_CHANGES_SETTLE_SECONDS, so those rows are sent again rather
+    than skipped.
+    """
+    settled = (timezone.now() - timedelta(seconds=settings.SCHEDULE_CHANGES_SETTLE_SECONDS), 0)
+    if since is None:
+        queryset = Schedule.objects.all()
+    else:
+        moment, pk = since
+        queryset = Schedule.all_objects.filter(Q(updated_at__gt=moment) | Q(updated_at=moment, id__gt=pk))
+
+    rows = list(queryset.order_by("updated_at", "id").values_list(*CHANGE_FIELDS)[:page_size])
+
+    changes, deleted = [], []
+    for pk, _, is_active, day, start, stop, badge_ids, camera_ids in rows:
+        if is_active:
+            changes.append({"id": pk, "day": day, **represent_schedule_row(start, stop, badge_ids, camera_ids)})
+        else:
+            deleted.append(pk)
+
+    position = since
+    if rows and rows[-1][1] <= settled[0]:
+        position = (rows[-1][1], rows[-1][0])
+    elif position is None or position < settled:
+        position = settled
+
+    return {
+        "changes": changes,
+        "deleted": deleted,
+        "cursor": encode_keyset_cursor(*position),
+        "has_more": len(rows) == page_size and position != since,
+    }
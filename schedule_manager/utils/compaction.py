@@ -0,0 +1,128 @@
+import json
+from dataclasses import asdict, dataclass, field
+from itertools import groupby
+from typing import Any, Dict, Iterable, List
+from django.db import transaction
+from django.utils import timezone
+from schedule_manager.models import DERIVED_FIELDS, TOMBSTONE_FIELDS, Schedule
+from schedule_manager.signals import schedules_bulk_saved
+from schedule_manager.utils.overlap import lock_user_schedules
+from schedule_manager.utils.representation import represent_schedule_row
+from schedule_manager.utils.week import MINUTES_PER_DAY
+
+COMPACTION_UPDATE_FIELDS = ["stop", *DERIVED_FIELDS, "updated_at"]
+
+
+@dataclass
+class CompactionReport:
+    """What a compaction changed, or would change on a dry run."""
+
+    schedules_scanned: int = 0
+    groups_compacted: int = 0
+    rows_updated: int = 0
+    rows_removed: int = 0
+    bytes_saved: int = 0
+
+    def merge(self, other: "CompactionReport"):
+        """Add the counts of another report."""
+        for name, value in asdict(other).items():
+            setattr(self, name, getattr(self, name) + value)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the report as a JSON serializable dictionary."""
+        return asdict(self)
+
+
+@dataclass
+class Run:
+    """Schedules of a group merged into one window, the first one is kept."""
+
+    schedules: List[Schedule]
+    start_minute: int
+    stop_minute: int
+    stop: Any = field(default=None)
+
+
+def _representation_size(schedule: Schedule, stop=None) -> int:
+    """Return the size in bytes of the schedule in a compact JSON response."""
+    row = represent_schedule_row(schedule.start, stop or schedule.stop, schedule.badge_ids, schedule.camera_ids)
+    return len(json.dumps(row, separators=(",", ":")).encode())
+
+
+def merge_runs(schedules: Iterable[Schedule]) -> List[Run]:
+    """
+    Sweep the schedules of a (user, day, target set) group in start order and
+    merge overlapping or adjacent windows, as long as the merged window still
+    fits in a day (the longest window a schedule can express).
+    """
+    runs: List[Run] = []
+    for schedule in schedules:
+        if runs:
+            run = runs[-1]
+            stop_minute = max(run.stop_minute, schedule.stop_minute)
+            if schedule.start_minute <= run.stop_minute and stop_minute - run.start_minute <= MINUTES_PER_DAY:
+                run.schedules.append(schedule)
+                if schedule.stop_minute > run.stop_minute:
+                    run.stop_minute, run.stop = schedule.stop_minute, schedule.stop
+                continue
+        runs.append(Run([schedule], schedule.start_minute, schedule.stop_minute, schedule.stop))
+    return runs
+
+
+def compact_user_schedules(user_ids: Iterable[int], dry_run: bool = False) -> CompactionReport:
+    """
+    Merge the overlapping and adjacent schedules of the given users, per day
+    and set of cameras or badges, in one transaction. Each merged run keeps
+    its earliest schedule, stretched to the end of the run, and soft-deletes
+    the others. With `dry_run` nothing is written.
+    """
+    user_ids = list(user_ids)
+    report = CompactionReport()
+    updates, deletes = [], []
+
+    with transaction.atomic():
+        if not dry_run:
+            lock_user_schedules(user_ids)
+
+        schedules = (
+            Schedule.objects
+            .filter(user_id__in=user_ids)
+            .order_by("user_id", "day", "fingerprint", "start_minute", "id")
+        )
+        for _, group in groupby(schedules.iterator(chunk_size=2000), key=lambda s: (s.user_id, s.day, s.fingerprint)):
+            group = list(group)
+            report.schedules_scanned += len(group)
+
+            runs = [run for run in merge_runs(group) if len(run.schedules) > 1]
+            if runs:
+                report.groups_compacted += 1
+
+            for run in runs:
+                kept, *removed = run.schedules
+                report.bytes_saved += sum(_representation_size(schedule) for schedule in run.schedules)
+                report.bytes_saved -= _representation_size(kept, run.stop)
+                report.rows_removed += len(removed)
+                deletes.extend(removed)
+
+                if run.stop_minute != kept.stop_minute:
+                    kept.stop = run.stop
+                    kept.update_derived_fields()
+                    updates.append(kept)
+
+        report.rows_updated = len(updates)
+        if dry_run:
+            return report
+
+        # Delete first, a stretched schedule may take the place of a removed one.
+        # Stamped right before the writes, so delta sync cursors settle past them.
+        for schedule in deletes:
+            schedule.mark_deleted()
+        now = timezone.now()
+        for schedule in updates:
+            schedule.updated_at = now
+        Schedule.objects.bulk_update(deletes, TOMBSTONE_FIELDS, batch_size=500)
+        Schedule.objects.bulk_update(updates, COMPACTION_UPDATE_FIELDS, batch_size=500)
+        if updates or deletes:
+            schedules_bulk_saved.send(sender=Schedule, schedules=updates + deletes)
+
+    return report
@@ -0,0 +1,90 @@
+import gzip
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional
+import brotli
+from django.conf import settings
+
+BROTLI = "br"
+GZIP = "gzip"
+IDENTITY = "identity"
+
+# Preferred first when the client accepts both with the same quality
+ENCODINGS = (BROTLI, GZIP)
+
+# Bodies are compressed once per version, but on the request that missed.
+# Past these levels a grouped response of 5000 schedules (360 KB) takes
+# several times longer to compress for a few percent; brotli 11 takes a second.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 6
+
+
+def compress(content: bytes, encoding: str) -> bytes:
+    """Compress a body with gzip or brotli."""
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=BROTLI_QUALITY, mode=brotli.MODE_TEXT)
+    # A fixed mtime keeps the gzip bytes the same across processes
+    return gzip.compress(content, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """Return the quality of each coding of an Accept-Encoding header, by lowercase name."""
+    qualities = {}
+    for item in header.split(","):
+        coding, *params = item.strip().split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+    return qualities
+
+
+def negotiate_encoding(header: Optional[str], available: Iterable[str] = ENCODINGS) -> str:
+    """
+    Pick the best of the available encodings the Accept-Encoding header
+    allows, or identity. Equal qualities keep the order of `available`.
+    """
+    if not header:
+        return IDENTITY
+
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get("*", 0.0)
+    best, best_quality = IDENTITY, 0.0
+    for encoding in available:
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+@dataclass
+class CompressedBody:
+    """A rendered body and its gzip and brotli forms, compressed once."""
+
+    content: bytes
+    content_type: str
+    encoded: Dict[str, bytes] = field(default_factory=dict)
+
+    @classmethod
+    def build(cls, content: bytes, content_type: str) -> "CompressedBody":
+        """Compress bodies of at least SCHEDULE_COMPRESSION_MIN_BYTES in every encoding."""
+        body = cls(content, content_type)
+        if len(content) >= settings.SCHEDULE_COMPRESSION_MIN_BYTES:
+            for encoding in ENCODINGS:
+                encoded = compress(content, encoding)
+                # Incompressible bodies are sent as they are
+                if len(encoded) < len(content):
+                    body.encoded[encoding] = encoded
+        return body
+
+    def negotiate(self, accept_encoding: Optional[str]):
+        """Return the (encoding, content) pair to send for an Accept-Encoding header."""
+        encoding = negotiate_encoding(accept_encoding, self.encoded)
+        return encoding, self.encoded.get(encoding, self.content)
@@ -0,0 +1,63 @@
+from typing import Any, Dict, Iterable, List, Tuple
+import numpy as np
+from schedule_manager.utils.week import DAYS, MINUTES_PER_DAY, MINUTES_PER_WEEK
+
+# One bit per minute of the week, 1260 bytes per target
+BITMAP_BYTES = MINUTES_PER_WEEK // 8
+
+UNION = "union"
+INTERSECTION = "intersection"
+UNCOVERED = "uncovered"
+OPERATIONS = (UNION, INTERSECTION, UNCOVERED)
+
+EMPTY_BITMAP = bytes(BITMAP_BYTES)
+
+
+def intervals_to_bitmap(intervals: Iterable[Tuple[int, int]]) -> bytes:
+    """Pack disjoint minute-of-week [start, stop) intervals into a weekly bitmap."""
+    edges = np.zeros(MINUTES_PER_WEEK + 1, dtype=np.int8)
+    intervals = np.asarray(list(intervals), dtype=np.int64).reshape(-1, 2)
+    np.add.at(edges, intervals[:, 0], 1)
+    np.add.at(edges, intervals[:, 1], -1)
+    return np.packbits(np.cumsum(edges[:-1]) > 0).tobytes()
+
+
+def combine_bitmaps(bitmaps: List[bytes], operation: str) -> np.ndarray:
+    """
+    Combine packed weekly bitmaps byte-wise and return the unpacked minutes:
+    covered by any of them (union), by all of them (intersection), or by
+    none of them (uncovered).
+    """
+    packed = np.frombuffer(b"".join(bitmaps), dtype=np.uint8).reshape(len(bitmaps), BITMAP_BYTES)
+    if operation == INTERSECTION:
+        combined = np.bitwise_and.reduce(packed, axis=0)
+    else:
+        combined = np.bitwise_or.reduce(packed, axis=0)
+        if operation == UNCOVERED:
+            combined = np.invert(combined)
+    return np.unpackbits(combined).astype(bool)
+
+
+def bitmap_runs(minutes: np.ndarray) -> List[Tuple[int, int]]:
+    """Run-length encode the set minutes of the week into [start, stop) intervals."""
+    edges = np.diff(np.concatenate(([0], minutes.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    stops = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), stops.tolist()))
+
+
+def _represent_minute(minute: int) -> str:
+    minute %= MINUTES_PER_DAY
+    return f"{minute // 60:02d}:{minute % 60:02d}:00"
+
+
+def represent_interval(start: int, stop: int) -> Dict[str, Any]:
+    """Represent a minute-of-week interval by the days and times it starts and stops at."""
+    return {
+        "start_day": DAYS[start // MINUTES_PER_DAY],
+        "start": _represent_minute(start),
+        "stop_day": DAYS[stop // MINUTES_PER_DAY % len(DAYS)],
+        "stop": _represent_minute(stop),
+        "start_minute": start,
+        "stop_minute": stop,
+    }
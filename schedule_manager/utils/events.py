@@ -0,0 +1,190 @@
+import time
+import asyncio
+import logging
+import select
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, List, Tuple
+from django.conf import settings
+from django.db import connections
+from schedule_manager.models import ScheduleEvent
+from schedule_manager.renderers import encode_json
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "schedule_events"
+
+FETCH_LIMIT = 500
+
+
+class InMemoryEventBus:
+    """
+    Wake the stream subscribers of this process when schedule events are
+    committed. Subscribers only get woken up; the events are read from the
+    ScheduleEvent table, so a missed wake up never loses an event.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def publish(self, event_id: int):
+        """Announce a committed event. Called from the committing thread."""
+        self.deliver(event_id)
+
+    def deliver(self, event_id: int):
+        """Wake every subscriber of this process, whatever its event loop."""
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event_id)
+            except RuntimeError:
+                # The subscriber's loop is closed, it unsubscribes on its way out
+                pass
+
+    @asynccontextmanager
+    async def subscribe(self):
+        """Yield a queue receiving the IDs of committed events."""
+        subscriber = (asyncio.get_running_loop(), asyncio.Queue())
+        with self._lock:
+            self._subscribers.add(subscriber)
+        try:
+            yield subscriber[1]
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+
+class PostgresEventBus(InMemoryEventBus):
+    """
+    Fan events out to every process with Postgres LISTEN/NOTIFY. Commits
+    are announced with pg_notify, and a daemon thread per process listens
+    on a dedicated connection and wakes the local subscribers.
+    """
+
+    def __init__(self, alias: str = "default"):
+        super().__init__()
+        self.alias = alias
+        self._listener = None
+
+    def publish(self, event_id: int):
+        with connections[self.alias].cursor() as cursor:
+            cursor.execute("SELECT pg_notify(%s, %s)", [NOTIFY_CHANNEL, str(event_id)])
+
+    @asynccontextmanager
+    async def subscribe(self):
+        self.start_listener()
+        async with super().subscribe() as queue:
+            yield queue
+
+    def start_listener(self):
+        """Start the listener thread of the process once."""
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self.listen, name="schedule-events", daemon=True)
+                self._listener.start()
+
+    def listen(self):
+        """Forward notifications to the local subscribers, reconnecting on errors."""
+        while True:
+            connection = connections.create_connection(self.alias)
+            try:
+                connection.ensure_connection()
+                raw = connection.connection
+                with raw.cursor() as cursor:
+                    cursor.execute(f"LISTEN {NOTIFY_CHANNEL}")
+
+                while True:
+                    for payload in wait_notifies(raw, 60):
+                        self.deliver(int(payload))
+            except Exception:
+                logger.exception("Schedule event listener failed, reconnecting")
+                time.sleep(1)
+            finally:
+                connection.close()
+
+
+def wait_notifies(raw, timeout: float) -> List[str]:
+    """
+    Wait up to `timeout` seconds for notifications on a listening DB-API
+    connection and return their payloads. psycopg 3 connections iterate
+    them with notifies(), psycopg2 ones queue them on poll().
+    """
+    if callable(getattr(raw, "notifies", None)):
+        return [notify.payload for notify in raw.notifies(timeout=timeout, stop_after=1)]
+
+    if select.select([raw], [], [], timeout) == ([], [], []):
+        return []
+    raw.poll()
+    payloads = [notify.payload for notify in raw.notifies]
+    del raw.notifies[:len(payloads)]
+    return payloads
+
+
+_event_bus = None
+
+
+def get_event_bus() -> InMemoryEventBus:
+    """Return the bus of the process: LISTEN/NOTIFY on Postgres, in memory otherwise."""
+    global _event_bus
+    if _event_bus is None:
+        if connections["default"].vendor == "postgresql":
+            _event_bus = PostgresEventBus()
+        else:
+            _event_bus = InMemoryEventBus()
+    return _event_bus
+
+
+async def alatest_event_id() -> int:
+    """Return the ID of the latest event, 0 when there is none."""
+    event = await ScheduleEvent.objects.order_by("-id").only("id").afirst()
+    return event.id if event is not None else 0
+
+
+async def ais_expired(last_id: int) -> bool:
+    """
+    Return whether a client that saw `last_id` cannot resume: the events
+    after it were pruned, or it comes from another database.
+    """
+    oldest = await ScheduleEvent.objects.order_by("id").only("id").afirst()
+    if oldest is None:
+        return False
+    return oldest.id > last_id + 1 or last_id > await alatest_event_id()
+
+
+async def afetch_events(last_id: int, gaps: Dict[int, float]) -> Tuple[List[ScheduleEvent], bool]:
+    """
+    Return the events after `last_id` in ID order, and whether the fetch
+    stopped at a gap in the IDs. Event IDs are allocated before commit, so
+    a missing ID may belong to a transaction still open. `gaps` maps the
+    missing IDs of a stream to when it first saw them; the stream waits at
+    a missing ID until it has been missing for SCHEDULE_STREAM_GAP_TIMEOUT
+    seconds, then skips it as rolled back.
+    """
+    now = time.monotonic()
+    events = []
+    expected = last_id + 1
+    async for event in ScheduleEvent.objects.filter(id__gt=last_id).order_by("id")[:FETCH_LIMIT]:
+        if event.id != expected:
+            missing = range(expected, event.id)
+            for missing_id in missing:
+                gaps.setdefault(missing_id, now)
+            if any(now - gaps[missing_id] < settings.SCHEDULE_STREAM_GAP_TIMEOUT for missing_id in missing):
+                return events, True
+            for missing_id in missing:
+                del gaps[missing_id]
+        # The event may have filled a gap seen by an earlier fetch
+        gaps.pop(event.id, None)
+        events.append(event)
+        expected = event.id + 1
+    return events, False
+
+
+def format_event(event: ScheduleEvent) -> str:
+    """Format an event in the text/event-stream format, with compact JSON data."""
+    data = encode_json(event.data).decode()
+    return f"id: {event.id}\nevent: {event.action}\ndata: {data}\n\n"
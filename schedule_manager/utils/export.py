@@ -0,0 +1,76 @@
+import csv
+import json
+from typing import Iterator
+from django.db.models import QuerySet
+from schedule_manager.utils.representation import (
+    represent_time,
+    represent_datetime,
+    represent_badge_ids,
+    represent_camera_ids
+)
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_COLUMNS = ("id", "user", "day", "start", "stop", "badge_ids", "camera_ids", "created_at", "updated_at")
+EXPORT_FIELDS = ("id", "user_id", "day", "start", "stop", "badge_ids", "camera_ids", "created_at", "updated_at")
+
+
+class Echo:
+    """A file-like object that returns what is written, for csv.writer."""
+
+    def write(self, value):
+        """Return the value instead of buffering it."""
+        return value
+
+
+def iter_export_rows(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[tuple]:
+    """Yield formatted schedule rows, reading the table in fixed-size chunks."""
+    rows = queryset.order_by("id").values_list(*EXPORT_FIELDS).iterator(chunk_size=chunk_size)
+    for schedule_id, user_id, day, start, stop, badge_ids, camera_ids, created_at, updated_at in rows:
+        yield (
+            schedule_id,
+            user_id,
+            day,
+            represent_time(start),
+            represent_time(stop),
+            represent_badge_ids(badge_ids),
+            represent_camera_ids(camera_ids),
+            represent_datetime(created_at),
+            represent_datetime(updated_at),
+        )
+
+
+def _batched(lines: Iterator[str], chunk_size: int) -> Iterator[str]:
+    """Join lines into larger chunks so the response isn't written row by row."""
+    buffer = []
+    for line in lines:
+        buffer.append(line)
+        if len(buffer) >= chunk_size:
+            yield "".join(buffer)
+            buffer = []
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_ndjson(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Stream schedules as newline-delimited JSON objects."""
+    encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+    lines = (
+        encoder.encode(dict(zip(EXPORT_COLUMNS, row))) + "\n"
+        for row in iter_export_rows(queryset, chunk_size)
+    )
+    return _batched(lines, chunk_size)
+
+
+def stream_csv(queryset: QuerySet, chunk_size: int = EXPORT_CHUNK_SIZE) -> Iterator[str]:
+    """Stream schedules as CSV, with the ID lists encoded as JSON arrays."""
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(EXPORT_COLUMNS)
+        for row in iter_export_rows(queryset, chunk_size):
+            row = list(row)
+            row[5] = json.dumps(row[5]) if row[5] is not None else ""
+            row[6] = json.dumps(row[6]) if row[6] is not None else ""
+            yield writer.writerow(row)
+
+    return _batched(lines(), chunk_size)
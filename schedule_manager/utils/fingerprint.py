@@ -0,0 +1,35 @@
+import json
+import hashlib
+from typing import Any, Dict, Iterable, Tuple
+
+
+def build_fingerprint(badge_ids=None, camera_ids=None) -> str:
+    """
+    Return an order-insensitive fingerprint of a schedule's badge or camera IDs.
+    Badge and camera sets never share a fingerprint, and an empty set yields "".
+    """
+    if badge_ids:
+        kind, values = "badge", sorted({str(value) for value in badge_ids})
+    elif camera_ids:
+        kind, values = "camera", sorted({int(value) for value in camera_ids})
+    else:
+        return ""
+
+    payload = json.dumps([kind, values], separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def find_duplicate_schedules(rows: Iterable[Tuple[Any, ...]]) -> Dict[int, int]:
+    """
+    Map the ID of every schedule repeating an earlier one (same user, day,
+    start, stop and fingerprint) to the ID of the schedule it repeats, from
+    (id, user_id, day, start, stop, badge_ids, camera_ids) rows in ID order.
+    """
+    first = {}
+    duplicates = {}
+    for schedule_id, user_id, day, start, stop, badge_ids, camera_ids in rows:
+        key = (user_id, day, start, stop, build_fingerprint(badge_ids, camera_ids))
+        kept_id = first.setdefault(key, schedule_id)
+        if kept_id != schedule_id:
+            duplicates[schedule_id] = kept_id
+    return duplicates
@@ -0,0 +1,74 @@
+from typing import Any, Dict, List
+from django.db.models import QuerySet
+from schedule_manager.models import Schedule
+from schedule_manager.utils.representation import represent_schedule_row
+
+GROUPED_FIELDS = ("day", "start", "stop", "badge_ids", "camera_ids")
+
+
+class DayGrouper:
+    """
+    Collect schedule rows into per-day buckets, keeping the first of every
+    entry that shares the same normalized key.
+    """
+
+    def __init__(self):
+        self.schedule_data = {day: [] for day, _ in Schedule.DaysChoices.choices}
+        self._seen = set()
+
+    def add(self, day, start, stop, badge_ids, camera_ids):
+        """Add a row unless an equal entry was already added for the day."""
+        bucket = self.schedule_data.get(day)
+        if bucket is None:
+            return
+
+        entry = represent_schedule_row(start, stop, badge_ids, camera_ids)
+
+        # Remove empty badge_ids and camera_ids
+        if not entry["badge_ids"]:
+            entry.pop("badge_ids")
+        if not entry["camera_ids"]:
+            entry.pop("camera_ids")
+
+        unique_key = (
+            day,
+            entry["start"],
+            entry["stop"],
+            tuple(entry.get("badge_ids", [])),
+            tuple(entry.get("camera_ids", [])),
+        )
+
+        if unique_key not in self._seen:
+            self._seen.add(unique_key)
+            bucket.append(entry)
+
+
+def grouped_rows(queryset: QuerySet) -> QuerySet:
+    """
+    Return the rows to group in a single ordered query, with exact duplicate
+    rows already collapsed by the database (DISTINCT).
+    """
+    return queryset.order_by("start").values_list(*GROUPED_FIELDS).distinct()
+
+
+def group_schedules_by_day(queryset: QuerySet, chunk_size: int = 2000) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Group schedules by day in a single ordered query. Memory grows with the
+    number of unique entries instead of raw rows.
+    """
+    grouper = DayGrouper()
+    for row in grouped_rows(queryset).iterator(chunk_size=chunk_size):
+        grouper.add(*row)
+    return grouper.schedule_data
+
+
+async def agroup_schedules_by_day(queryset: QuerySet, chunk_size: int = 2000) -> Dict[str, List[Dict[str, Any]]]:
+    """Async version of group_schedules_by_day built on the async ORM."""
+    grouper = DayGrouper()
+    rows = queryset.order_by("start").values(*GROUPED_FIELDS).distinct()
+
+    # values() rather than values_list(): its iterable defers the query to the
+    # worker thread, which Django's values_list iterable does not do under aiterator()
+    async for row in rows.aiterator(chunk_size=chunk_size):
+        grouper.add(*(row[field] for field in GROUPED_FIELDS))
+    return grouper.schedule_data
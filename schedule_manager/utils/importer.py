@@ -0,0 +1,229 @@
+import csv
+import hashlib
+import io
+import json
+from itertools import islice
+from typing import Any, Callable, Dict, IO, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from schedule_manager.models import Schedule, ScheduleImport, User
+from schedule_manager.signals import schedules_bulk_saved
+from schedule_manager.serializers import DUPLICATE_SCHEDULE_MESSAGE, BulkScheduleSerializer
+from schedule_manager.utils.bulk import (
+    BULK_BATCH_SIZE,
+    find_existing_schedules,
+    reject_overlapping_schedules,
+    schedule_key
+)
+
+CSV = ScheduleImport.FormatChoices.CSV
+JSONL = ScheduleImport.FormatChoices.JSONL
+
+# CSV cells holding JSON arrays, as written by the CSV export
+ID_LIST_COLUMNS = ("badge_ids", "camera_ids")
+
+# A parsed row and its parse errors, None when it parsed
+ParsedRow = Tuple[Dict[str, Any], Optional[Dict[str, Any]]]
+
+
+class ImportFileError(Exception):
+    """The import file cannot be read any further."""
+
+
+class ImportConflictError(Exception):
+    """The import key belongs to another file, or the import already completed."""
+
+
+def file_fingerprint(file: IO[bytes]) -> str:
+    """Return the SHA-256 hex digest of a binary file read in blocks, and rewind it."""
+    digest = hashlib.sha256()
+    for block in iter(lambda: file.read(1024 * 1024), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def resume_import(user: Optional[User], key: str, file_format: str, fingerprint: str) -> ScheduleImport:
+    """
+    Return the import saved under `key`, created if needed. Resuming
+    another file under the key, or a completed import, is rejected.
+    """
+    record, created = ScheduleImport.objects.get_or_create(
+        user=user,
+        key=key,
+        defaults={"format": file_format, "fingerprint": fingerprint},
+    )
+    if created:
+        return record
+    if record.fingerprint and record.fingerprint != fingerprint:
+        raise ImportConflictError(f"Import {key} was started with another file.")
+    if record.status == ScheduleImport.StatusChoices.COMPLETED:
+        raise ImportConflictError(f"Import {key} already completed.")
+    if not record.fingerprint:
+        # Imports started before files were fingerprinted take the first file resuming them
+        record.fingerprint = fingerprint
+        record.save(update_fields=["fingerprint", "updated_at"])
+    return record
+
+
+def iter_csv_rows(stream: IO[str]) -> Iterator[ParsedRow]:
+    """Yield the rows of a CSV file with a header, leaving out empty cells."""
+    for row in csv.DictReader(stream):
+        row = {column: value for column, value in row.items() if column is not None and value not in (None, "")}
+        errors = {}
+        for column in ID_LIST_COLUMNS:
+            if column in row:
+                try:
+                    row[column] = json.loads(row[column])
+                except ValueError:
+                    errors[column] = ["Expected a JSON array."]
+        yield row, errors or None
+
+
+def iter_jsonl_rows(stream: IO[str]) -> Iterator[ParsedRow]:
+    """Yield the objects of a JSON Lines file, skipping blank lines."""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError as exc:
+            yield {}, {"non_field_errors": [f"Invalid JSON: {exc}"]}
+            continue
+        if not isinstance(row, dict):
+            yield {}, {"non_field_errors": ["Expected a JSON object."]}
+            continue
+        yield row, None
+
+
+def iter_import_rows(file: IO[bytes], file_format: str) -> Iterator[ParsedRow]:
+    """Parse a binary UTF-8 file as a stream of rows, one line in memory at a time."""
+    stream = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    rows = iter_csv_rows(stream) if file_format == CSV else iter_jsonl_rows(stream)
+    try:
+        yield from rows
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError(f"Unreadable file: {exc}")
+
+
+def _owner_id(row: Dict[str, Any], user: Optional[User]):
+    """Return the ID of the user a row is imported for, or raise a validation error."""
+    value = row.pop("user", None)
+    if user is not None:
+        return user.pk
+    if value is None:
+        raise serializers.ValidationError({"user": ["This field is required."]})
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise serializers.ValidationError({"user": ["A valid integer is required."]})
+
+
+def import_chunk(
+    record: ScheduleImport,
+    chunk: List[Tuple[int, ParsedRow]],
+    serializer: BulkScheduleSerializer,
+    user: Optional[User] = None,
+) -> Dict[int, Any]:
+    """
+    Validate a chunk of numbered rows and create the valid schedules in one
+    transaction, along with the progress of the import. Fields are validated
+    per row without queries; duplicates are checked against the schedules
+    preloaded for the whole chunk with one query, and overlaps with another.
+    Return the errors of the rejected rows by row number.
+    """
+    errors: Dict[int, Any] = {}
+    pending = []
+
+    for number, (row, row_errors) in chunk:
+        if row_errors:
+            errors[number] = row_errors
+            continue
+        try:
+            owner_id = _owner_id(row, user)
+            data = serializer.run_validation(row)
+        except serializers.ValidationError as exc:
+            errors[number] = serializers.as_serializer_error(exc)
+            continue
+        schedule = Schedule(user_id=owner_id, **data)
+        schedule.update_derived_fields()
+        pending.append((number, schedule))
+
+    if user is None:
+        user_ids = {schedule.user_id for _, schedule in pending}
+        known = set(User.objects.filter(pk__in=user_ids).values_list("pk", flat=True))
+        for number, schedule in pending:
+            if schedule.user_id not in known:
+                errors[number] = {"user": ["User not found."]}
+        pending = [(number, schedule) for number, schedule in pending if schedule.user_id in known]
+
+    existing = find_existing_schedules([schedule for _, schedule in pending])
+    seen = set()
+    creates = []
+    for number, schedule in pending:
+        key = schedule_key(schedule)
+        if key in seen or key in existing:
+            errors[number] = {"non_field_errors": [DUPLICATE_SCHEDULE_MESSAGE]}
+            continue
+        seen.add(key)
+        creates.append((number, schedule))
+
+    with transaction.atomic():
+        if settings.SCHEDULE_OVERLAP_DETECTION:
+            rejected = {}
+            creates, _ = reject_overlapping_schedules(creates, [], set(), rejected)
+            errors.update((number, result["errors"]) for number, result in rejected.items())
+
+        created = Schedule.objects.bulk_create([schedule for _, schedule in creates], batch_size=BULK_BATCH_SIZE)
+        if created:
+            schedules_bulk_saved.send(sender=Schedule, schedules=created, created=created)
+
+        # Only the first errors are kept, the counts cover every row
+        room = max(settings.SCHEDULE_IMPORT_MAX_ERRORS - len(record.errors), 0)
+        record.errors.extend({"row": number, "errors": errors[number]} for number in sorted(errors)[:room])
+        record.rows_read = chunk[-1][0]
+        record.rows_imported += len(created)
+        record.rows_failed += len(errors)
+        record.save(update_fields=["rows_read", "rows_imported", "rows_failed", "errors", "updated_at"])
+
+    return errors
+
+
+def run_import(
+    record: ScheduleImport,
+    rows: Iterator[ParsedRow],
+    user: Optional[User] = None,
+    chunk_size: Optional[int] = None,
+    on_errors: Optional[Callable[[Dict[int, Any]], None]] = None,
+    max_chunks: Optional[int] = None,
+) -> ScheduleImport:
+    """
+    Import parsed rows in chunks of `chunk_size`, for `user` or for the user
+    ID of each row. Rows committed by an earlier run of the import are
+    skipped, so running it again with the same file resumes it. Every
+    chunk's errors are passed to `on_errors`. After `max_chunks` chunks the
+    import stops, still running, to be resumed by the next run.
+    """
+    if record.status == ScheduleImport.StatusChoices.COMPLETED:
+        return record
+
+    chunk_size = chunk_size or settings.SCHEDULE_IMPORT_CHUNK_SIZE
+    serializer = BulkScheduleSerializer()
+    numbered = islice(enumerate(rows, start=1), record.rows_read, None)
+
+    chunks = 0
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            break
+        if chunks == max_chunks:
+            return record
+        chunks += 1
+        errors = import_chunk(record, chunk, serializer, user)
+        if errors and on_errors is not None:
+            on_errors(errors)
+
+    record.status = ScheduleImport.StatusChoices.COMPLETED
+    record.save(update_fields=["status", "updated_at"])
+    return record
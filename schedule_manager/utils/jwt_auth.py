@@ -1,5 +1,6 @@
 from django.utils import timezone
 from rest_framework.response import Response
+from schedule_manager.auth.tokens import FilteredRefreshToken
 from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
 from dj_rest_auth.app_settings import api_settings as rest_auth_settings
 from rest_framework_simplejwt.settings import api_settings as jwt_settings
@@ -99,7 +100,7 @@ def logout_and_revoke_tokens(
     """
     Manually revoke JWT refresh tokens by blacklisting them.
     """
-    token = RefreshToken(refresh_token)
+    token = FilteredRefreshToken(refresh_token)
     token.blacklist()
 
     force_token_expiration = timezone.now() - jwt_settings.REFRESH_TOKEN_LIFETIME
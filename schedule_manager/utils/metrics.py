@@ -0,0 +1,193 @@
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, Tuple
+
+# Upper bounds of the histogram buckets, the +Inf bucket is implicit
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+COMPRESSION_RATIO_BUCKETS = (0.05, 0.1, 0.15, 0.2, 0.3, 0.4, 0.5, 0.75, 1.0)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], values: Tuple[str, ...], **extra) -> str:
+    """Format a label set, e.g. {view="schedule-list",method="GET"}."""
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    """Format a sample value."""
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """
+    A monotonically increasing counter per label set.
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, labels: Tuple[str, ...], amount: float = 1):
+        """Increase the counter of a label set."""
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self):
+        """Yield the (suffix, labels, value) samples of the metric."""
+        for labels, value in sorted(self._values.items()):
+            yield "", _labels(self.labelnames, labels), value
+
+    def clear(self):
+        """Drop every recorded value."""
+        self._values.clear()
+
+
+class Histogram:
+    """
+    Cumulative histogram per label set with fixed bucket bounds, in the
+    shape Prometheus expects (_bucket, _sum and _count series).
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        """Record a value for a label set."""
+        state = self._values.get(labels)
+        if state is None:
+            # One counter per bucket plus +Inf, then the sum
+            state = self._values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        state[bisect_left(self.buckets, value)] += 1
+        state[-1] += value
+
+    def samples(self):
+        """Yield the (suffix, labels, value) samples of the metric."""
+        for labels, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), state):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(bound)
+                yield "_bucket", _labels(self.labelnames, labels, le=le), cumulative
+            yield "_sum", _labels(self.labelnames, labels), state[-1]
+            yield "_count", _labels(self.labelnames, labels), cumulative
+
+    def clear(self):
+        """Drop every recorded value."""
+        self._values.clear()
+
+
+class MetricsRegistry:
+    """
+    In-process metrics of the request instrumentation, rendered in the
+    Prometheus text exposition format. Every worker process keeps its own
+    registry, so scrape each worker (or run one per container).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        labels = ("view", "method")
+        self.requests = Counter(
+            "schedule_manager_requests_total",
+            "Requests handled, by view, method and status code.",
+            ("view", "method", "status"),
+        )
+        self.latency = Histogram(
+            "schedule_manager_request_duration_seconds",
+            "Wall time of the request.",
+            labels,
+        )
+        self.sql_queries = Histogram(
+            "schedule_manager_request_sql_queries",
+            "SQL queries executed by the request.",
+            labels,
+            buckets=QUERY_COUNT_BUCKETS,
+        )
+        self.sql_duration = Histogram(
+            "schedule_manager_request_sql_duration_seconds",
+            "Time spent executing SQL during the request.",
+            labels,
+        )
+        self.cached_responses = Counter(
+            "schedule_manager_response_cache_requests_total",
+            "Cacheable responses, by cache result (hit or miss) and content encoding.",
+            ("result", "encoding"),
+        )
+        self.cached_response_bytes = Counter(
+            "schedule_manager_response_cache_sent_bytes_total",
+            "Body bytes of cacheable responses sent, by content encoding.",
+            ("encoding",),
+        )
+        self.compression_ratio = Histogram(
+            "schedule_manager_response_compression_ratio",
+            "Compressed to original size of the bodies stored in the response cache.",
+            ("encoding",),
+            buckets=COMPRESSION_RATIO_BUCKETS,
+        )
+        self.metrics = (
+            self.requests,
+            self.latency,
+            self.sql_queries,
+            self.sql_duration,
+            self.cached_responses,
+            self.cached_response_bytes,
+            self.compression_ratio,
+        )
+
+    def observe_request(self, view: str, method: str, status: int, duration: float, queries: int, sql_duration: float):
+        """Record a finished request."""
+        labels = (view, method)
+        with self._lock:
+            self.requests.inc((view, method, str(status)))
+            self.latency.observe(labels, duration)
+            self.sql_queries.observe(labels, queries)
+            self.sql_duration.observe(labels, sql_duration)
+
+    def observe_cached_response(self, result: str, encoding: str, size: int):
+        """Record a cacheable response served from the cache (hit) or rendered (miss)."""
+        with self._lock:
+            self.cached_responses.inc((result, encoding))
+            self.cached_response_bytes.inc((encoding,), size)
+
+    def observe_compression(self, encoding: str, ratio: float):
+        """Record the compression ratio of a body stored in the response cache."""
+        with self._lock:
+            self.compression_ratio.observe((encoding,), ratio)
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text format."""
+        lines = []
+        with self._lock:
+            for metric in self.metrics:
+                lines.append(f"# HELP {metric.name} {metric.documentation}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for suffix, labels, value in metric.samples():
+                    lines.append(f"{metric.name}{suffix}{labels} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Drop every recorded value."""
+        with self._lock:
+            for metric in self.metrics:
+                metric.clear()
+
+
+metrics = MetricsRegistry()
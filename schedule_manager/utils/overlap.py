@@ -0,0 +1,162 @@
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+from django.db.models import Q
+from schedule_manager.models import Schedule, ScheduleTarget, User
+from schedule_manager.utils.representation import represent_time
+from schedule_manager.utils.week import (
+    DAY_INDEX,
+    MINUTES_PER_DAY,
+    MINUTES_PER_WEEK,
+    merge_windows,
+    schedule_window,
+    split_week_window
+)
+
+# A schedule never covers more than a day, which bounds the bisect window
+MAX_WINDOW_MINUTES = MINUTES_PER_DAY
+
+# Past this many disjoint candidate windows, stored windows are read for
+# the range spanning them all rather than with one condition per window
+MAX_QUERY_WINDOWS = 50
+
+
+class IntervalSet:
+    """
+    Minute-of-week [start, stop) windows kept sorted by start. Since no
+    window is longer than a day, the windows overlapping a range are found
+    by bisecting the starts into [start - one day, stop) instead of a scan.
+    """
+
+    def __init__(self, windows: Iterable[Tuple[int, int, Any]] = ()):
+        """Start from (start, stop, owner) windows, sorted once."""
+        windows = sorted(windows, key=lambda window: window[0])
+        self._starts: List[int] = [start for start, _, _ in windows]
+        self._windows: List[Tuple[int, Any]] = [(stop, owner) for _, stop, owner in windows]
+
+    def add(self, start: int, stop: int, owner):
+        """Insert a window owned by `owner`."""
+        index = bisect_right(self._starts, start)
+        self._starts.insert(index, start)
+        self._windows.insert(index, (stop, owner))
+
+    def overlapping(self, start: int, stop: int) -> List[Any]:
+        """Return the owners of the windows overlapping [start, stop)."""
+        low = bisect_right(self._starts, start - MAX_WINDOW_MINUTES)
+        high = bisect_left(self._starts, stop)
+        return [owner for window_stop, owner in self._windows[low:high] if window_stop > start]
+
+
+def _week_windows(day, start, stop) -> List[Tuple[int, int]]:
+    return list(split_week_window(*schedule_window(day, start, stop)))
+
+
+def _describe(label: Dict[str, Any], day, start, stop) -> Dict[str, Any]:
+    return {**label, "day": day, "start": represent_time(start), "stop": represent_time(stop)}
+
+
+def _stored_window_condition(windows: Iterable[Tuple[int, int]]) -> Q:
+    """
+    Match the targets of the stored schedules overlapping any of the
+    minute-of-week windows, with range conditions on the indexed columns.
+    """
+    windows = merge_windows(windows)
+    if len(windows) > MAX_QUERY_WINDOWS:
+        windows = [(windows[0][0], windows[-1][1])]
+
+    condition = Q()
+    for start, stop in windows:
+        condition |= Q(schedule__start_minute__lt=stop, schedule__stop_minute__gt=start)
+    # Stored windows running past Sunday midnight also cover the start of the week
+    condition |= Q(schedule__stop_minute__gt=windows[0][0] + MINUTES_PER_WEEK)
+    return condition
+
+
+def lock_user_schedules(user_ids: Iterable[int]):
+    """
+    Serialize schedule writes per user until the end of the transaction by
+    locking the user rows, so two overlapping schedules cannot be accepted
+    concurrently. A no-op on SQLite, which already serializes writes.
+    """
+    list(User.objects.select_for_update().filter(pk__in=set(user_ids)).order_by("pk").values_list("pk"))
+
+
+def find_overlapping_schedules(
+    candidates: List[Tuple[Dict[str, Any], Schedule]],
+    exclude_ids: Iterable[int] = (),
+) -> List[List[Dict[str, Any]]]:
+    """
+    Return, for each (label, schedule) candidate, the schedules of the same
+    user it overlaps on a shared camera or badge. Stored schedules are
+    described by their ID and candidates by their label; a candidate is
+    compared with the stored schedules and the earlier candidates that had
+    no conflict. `exclude_ids` are stored schedules being deleted.
+
+    Only the stored windows of the involved users and targets overlapping a
+    candidate are read, with one query bounded by the indexed minute-of-week
+    columns. They are sorted once per target, then each candidate is a
+    bisect per target and window.
+    """
+    if not candidates:
+        return []
+
+    target_ids = defaultdict(set)
+    candidate_windows = []
+    for _, schedule in candidates:
+        candidate_windows.extend(_week_windows(schedule.day, schedule.start, schedule.stop))
+        for kind, target_id in schedule.iter_targets():
+            target_ids[kind].add(target_id)
+
+    targets = Q()
+    for kind, ids in target_ids.items():
+        targets |= Q(kind=kind, target_id__in=ids)
+
+    stored_windows = defaultdict(list)
+    if target_ids:
+        rows = (
+            ScheduleTarget.objects
+            .filter(targets, schedule__user_id__in={schedule.user_id for _, schedule in candidates})
+            .filter(_stored_window_condition(candidate_windows))
+            .exclude(schedule_id__in=list(exclude_ids))
+            .values_list(
+                "kind",
+                "target_id",
+                "schedule_id",
+                "schedule__user_id",
+                "schedule__day",
+                "schedule__start",
+                "schedule__stop",
+            )
+        )
+        stored = {}
+        for kind, target_id, schedule_id, user_id, day, start, stop in rows:
+            owner = stored.get(schedule_id)
+            if owner is None:
+                owner = stored[schedule_id] = _describe({"id": schedule_id}, day, start, stop)
+            for window in _week_windows(day, start, stop):
+                stored_windows[(user_id, kind, target_id)].append((*window, owner))
+
+    intervals = defaultdict(IntervalSet, {key: IntervalSet(windows) for key, windows in stored_windows.items()})
+
+    results = []
+    for label, schedule in candidates:
+        keys = [(schedule.user_id, kind, target_id) for kind, target_id in schedule.iter_targets()]
+        windows = _week_windows(schedule.day, schedule.start, schedule.stop)
+
+        # The same owner shows up once per shared target and window piece
+        conflicts = {}
+        for key in keys:
+            for window in windows:
+                for owner in intervals[key].overlapping(*window):
+                    # An updated schedule does not conflict with its stored version
+                    if schedule.pk is None or owner.get("id") != schedule.pk:
+                        conflicts[id(owner)] = owner
+
+        results.append(sorted(conflicts.values(), key=lambda owner: (DAY_INDEX[owner["day"]], owner["start"])))
+        if not conflicts:
+            owner = _describe(label, schedule.day, schedule.start, schedule.stop)
+            for key in keys:
+                for window in windows:
+                    intervals[key].add(*window, owner)
+
+    return results
@@ -0,0 +1,49 @@
+from datetime import datetime, time
+from typing import Any, Dict, List, Optional
+from django.utils import timezone
+
+
+def represent_time(value: Optional[time]) -> Optional[str]:
+    """Format a time the same way as the DRF TimeField (ISO 8601)."""
+    if value is None:
+        return None
+    return value.isoformat()
+
+
+def represent_datetime(value: Optional[datetime]) -> Optional[str]:
+    """Format a datetime the same way as the DRF DateTimeField (ISO 8601)."""
+    if value is None:
+        return None
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    value = value.isoformat()
+    if value.endswith("+00:00"):
+        value = value[:-6] + "Z"
+    return value
+
+
+def represent_badge_ids(values: Optional[List[Any]]) -> Optional[List[Optional[str]]]:
+    """Format badge IDs the same way as ListField(child=CharField())."""
+    if values is None:
+        return None
+    return [str(value) if value is not None else None for value in values]
+
+
+def represent_camera_ids(values: Optional[List[Any]]) -> Optional[List[Optional[int]]]:
+    """Format camera IDs the same way as ListField(child=IntegerField())."""
+    if values is None:
+        return None
+    return [int(value) if value is not None else None for value in values]
+
+
+def represent_schedule_row(start, stop, badge_ids, camera_ids) -> Dict[str, Any]:
+    """
+    Build the public representation of a schedule from raw column values.
+    The output matches ScheduleSerializer.to_representation.
+    """
+    return {
+        "start": represent_time(start),
+        "stop": represent_time(stop),
+        "badge_ids": represent_badge_ids(badge_ids),
+        "camera_ids": represent_camera_ids(camera_ids),
+    }
@@ -0,0 +1,154 @@
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, List, Tuple
+from schedule_manager.models import ScheduleTarget
+from schedule_manager.utils.cache import SCHEDULE_SCOPE, get_version
+from schedule_manager.utils.coverage import EMPTY_BITMAP, intervals_to_bitmap
+from schedule_manager.utils.week import (
+    merge_windows,
+    minute_of_week,
+    schedule_window,
+    split_week_window,
+)
+
+Target = Tuple[str, str]
+
+TIMELINE_FIELDS = ("kind", "target_id", "schedule__day", "schedule__start", "schedule__stop")
+
+
+@dataclass(frozen=True)
+class TimelineSnapshot:
+    """
+    Compiled intervals and packed bitmaps of every target. Snapshots are
+    never changed once published, only the bitmap cache fills up.
+    """
+
+    starts: Dict[Target, List[int]] = field(default_factory=dict)
+    stops: Dict[Target, List[int]] = field(default_factory=dict)
+    bitmaps: Dict[Target, bytes] = field(default_factory=dict)
+
+
+class WeeklyTimeline:
+    """
+    Compiled weekly coverage of every camera and badge.
+
+    Each target maps to sorted, merged minute-of-week intervals so that
+    "is X active at T" is a bisect in memory instead of an ORM query.
+    Weekly bitmaps of the targets are packed from the intervals on first
+    use and kept until the target is recompiled.
+
+    The writing process recompiles the changed targets on commit and moves
+    the timeline to the version its write committed. Every process rebuilds
+    the whole timeline on its next use once the schedule version moves
+    otherwise, which is how writes of other processes show up. Readers take
+    one reference to the published snapshot; writers publish a new one.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Schedule version the timeline was built at, None until it is built
+        self._version = None
+        self._snapshot = TimelineSnapshot()
+
+    def _compile(self, rows) -> Dict[Target, List[Tuple[int, int]]]:
+        """Compile (kind, target_id, day, start, stop) rows into merged intervals."""
+        windows = defaultdict(list)
+        for kind, target_id, day, start, stop in rows:
+            windows[(kind, target_id)].extend(split_week_window(*schedule_window(day, start, stop)))
+        return {target: merge_windows(target_windows) for target, target_windows in windows.items()}
+
+    def _ensure_loaded(self) -> TimelineSnapshot:
+        """Return the snapshot, built on first use and after the schedule version moved."""
+        version = get_version(SCHEDULE_SCOPE)
+        if self._version == version:
+            return self._snapshot
+        with self._lock:
+            if self._version != version:
+                # The version is read first, a write committing during the build moves it again
+                compiled = self._compile(ScheduleTarget.objects.values_list(*TIMELINE_FIELDS).iterator(chunk_size=2000))
+                self._snapshot = TimelineSnapshot(
+                    {target: [start for start, _ in intervals] for target, intervals in compiled.items()},
+                    {target: [stop for _, stop in intervals] for target, intervals in compiled.items()},
+                )
+                self._version = version
+            return self._snapshot
+
+    def refresh(self, targets: Iterable[Target]):
+        """Recompile only the given targets after their schedules changed."""
+        targets = set(targets)
+        if self._version is None or not targets:
+            return
+
+        kinds = defaultdict(set)
+        for kind, target_id in targets:
+            kinds[kind].add(target_id)
+
+        rows = []
+        for kind, target_ids in kinds.items():
+            rows.extend(
+                ScheduleTarget.objects
+                .filter(kind=kind, target_id__in=target_ids)
+                .values_list(*TIMELINE_FIELDS)
+            )
+
+        compiled = self._compile(rows)
+        with self._lock:
+            snapshot = self._snapshot
+            starts, stops, bitmaps = dict(snapshot.starts), dict(snapshot.stops), dict(snapshot.bitmaps)
+            for target in targets:
+                bitmaps.pop(target, None)
+                intervals = compiled.get(target)
+                if intervals:
+                    starts[target] = [start for start, _ in intervals]
+                    stops[target] = [stop for _, stop in intervals]
+                else:
+                    starts.pop(target, None)
+                    stops.pop(target, None)
+            self._snapshot = TimelineSnapshot(starts, stops, bitmaps)
+
+    def advance(self, previous: Iterable[int], version: int):
+        """
+        Move the timeline to the version a write of this process committed,
+        once its targets were refreshed. The timeline must be at one of the
+        `previous` versions of that write, otherwise it is rebuilt.
+        """
+        with self._lock:
+            if self._version is not None and self._version in previous:
+                self._version = version
+
+    def clear(self):
+        """Drop the compiled timeline so it is rebuilt on next use."""
+        with self._lock:
+            self._snapshot = TimelineSnapshot()
+            self._version = None
+
+    def is_active(self, kind: str, target_id: str, moment: datetime) -> bool:
+        """Return whether the target is covered by a schedule at the given moment."""
+        snapshot = self._ensure_loaded()
+        starts = snapshot.starts.get((kind, target_id))
+        if not starts:
+            return False
+
+        minute = minute_of_week(moment)
+        index = bisect_right(starts, minute) - 1
+        return index >= 0 and minute < snapshot.stops[(kind, target_id)][index]
+
+    def bitmap(self, kind: str, target_id: str) -> bytes:
+        """Return the packed weekly bitmap of the minutes the target is covered."""
+        snapshot = self._ensure_loaded()
+        target = (kind, target_id)
+        bitmap = snapshot.bitmaps.get(target)
+        if bitmap is None:
+            starts = snapshot.starts.get(target)
+            if not starts:
+                return EMPTY_BITMAP
+            bitmap = intervals_to_bitmap(zip(starts, snapshot.stops[target]))
+            snapshot.bitmaps[target] = bitmap
+        return bitmap
+
+
+# Shared timeline of the process
+weekly_timeline = WeeklyTimeline()
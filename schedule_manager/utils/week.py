@@ -0,0 +1,72 @@
+import math
+from datetime import datetime, time
+from typing import Iterable, Iterator, List, Tuple
+from django.utils import timezone
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+# Same order as Schedule.DaysChoices, Monday first like datetime.weekday()
+DAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+DAY_INDEX = {day: index for index, day in enumerate(DAYS)}
+
+
+def minute_of_day(value: time) -> int:
+    """Return the minute of the day of a time."""
+    return value.hour * 60 + value.minute
+
+
+def minute_of_week(moment: datetime) -> int:
+    """Return the minute of the week (Monday 00:00 is 0) in the current time zone."""
+    if timezone.is_aware(moment):
+        moment = timezone.localtime(moment)
+    return moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+
+def schedule_window(day: str, start: time, stop: time) -> Tuple[int, int]:
+    """
+    Return the [start, stop) minutes of the week covered by a schedule.
+    A stop at or before the start runs past midnight into the next day.
+    """
+    start_minute = DAY_INDEX[day] * MINUTES_PER_DAY + minute_of_day(start)
+    stop_minute = DAY_INDEX[day] * MINUTES_PER_DAY + minute_of_day(stop)
+    if stop_minute <= start_minute:
+        stop_minute += MINUTES_PER_DAY
+    return start_minute, stop_minute
+
+
+def split_week_window(start_minute: int, stop_minute: int) -> Iterator[Tuple[int, int]]:
+    """Split a window running past Sunday midnight into pieces inside the week."""
+    if stop_minute <= MINUTES_PER_WEEK:
+        yield start_minute, stop_minute
+    else:
+        yield start_minute, MINUTES_PER_WEEK
+        yield 0, stop_minute - MINUTES_PER_WEEK
+
+
+def merge_windows(windows: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Merge overlapping or adjacent windows into a sorted, disjoint list."""
+    merged = []
+    for start_minute, stop_minute in sorted(windows):
+        if merged and start_minute <= merged[-1][1]:
+            if stop_minute > merged[-1][1]:
+                merged[-1] = (merged[-1][0], stop_minute)
+        else:
+            merged.append((start_minute, stop_minute))
+    return merged
+
+
+def week_range_pieces(start: datetime, stop: datetime) -> List[Tuple[int, int]]:
+    """
+    Return the [start, stop) minutes of the week covered by a datetime range,
+    split at the week end. A range of a week or more covers the whole week.
+    """
+    if stop <= start:
+        return []
+
+    start_minute = minute_of_week(start)
+    floor = start.replace(second=0, microsecond=0)
+    minutes = math.ceil((stop - floor).total_seconds() / 60)
+    if minutes >= MINUTES_PER_WEEK:
+        return [(0, MINUTES_PER_WEEK)]
+    return list(split_week_window(start_minute, start_minute + minutes))
@@ -0,0 +1,108 @@
+import time
+import logging
+import threading
+from typing import Callable, Dict, Iterable, Optional
+from django.db import close_old_connections
+from django.db.models import Case, F, Value, When
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """
+    Buffer field updates in process and write them in batches, one bulk
+    UPDATE per flush. Only the latest value of a field is kept per row, so
+    repeated updates of the same row collapse into one.
+
+    Flushes are meant to run off the request path (see flush_if_due); a
+    flush is due once `max_size` rows are pending or the oldest pending
+    update is `interval` seconds old.
+    """
+
+    def __init__(
+        self,
+        model,
+        fields: Iterable[str],
+        max_size: int,
+        interval: float,
+        on_flush: Optional[Callable[[list], None]] = None,
+    ):
+        self.model = model
+        self.fields = tuple(fields)
+        self.max_size = max_size
+        self.interval = interval
+        self.on_flush = on_flush
+        self._pending: Dict[object, Dict[str, object]] = {}
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def record(self, pk, **values):
+        """Buffer new values of the row with the given primary key."""
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            self._pending.setdefault(pk, {}).update(values)
+
+    def is_due(self) -> bool:
+        """Return whether the pending updates should be written now."""
+        with self._lock:
+            if not self._pending:
+                return False
+            return len(self._pending) >= self.max_size or time.monotonic() - self._oldest >= self.interval
+
+    def flush_if_due(self):
+        """Flush when the size threshold or the flush interval is reached."""
+        if self.is_due():
+            self.flush()
+
+    def flush(self) -> int:
+        """Write every pending update and return the number of rows updated."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._oldest = None
+
+        if not pending:
+            return 0
+
+        try:
+            updated = self.write(pending)
+        except Exception:
+            logger.exception("Failed to write %d buffered %s updates", len(pending), self.model.__name__)
+            self.requeue(pending)
+            return 0
+
+        if self.on_flush is not None:
+            self.on_flush(list(pending))
+        return updated
+
+    def write(self, pending) -> int:
+        """Write the updates with a single UPDATE ... SET field = CASE ... statement."""
+        updates = {}
+        for field in self.fields:
+            whens = [When(pk=pk, then=Value(values[field])) for pk, values in pending.items() if field in values]
+            if whens:
+                updates[field] = Case(*whens, default=F(field), output_field=self.model._meta.get_field(field))
+
+        return self.model._base_manager.filter(pk__in=list(pending)).update(**updates)
+
+    def requeue(self, pending):
+        """Put back updates that failed to write, unless newer ones arrived."""
+        with self._lock:
+            if not self._pending:
+                self._oldest = time.monotonic()
+            for pk, values in pending.items():
+                self._pending[pk] = {**values, **self._pending.get(pk, {})}
+
+    def flush_on_exit(self):
+        """Flush at interpreter shutdown with a usable database connection."""
+        close_old_connections()
+        self.flush()
+
+    def clear(self):
+        """Drop every pending update."""
+        with self._lock:
+            self._pending.clear()
+            self._oldest = None
+
+    def __len__(self):
+        return len(self._pending)
@@ -1,9 +1,49 @@
-from rest_framework import viewsets
+from datetime import timedelta
+from django.conf import settings
+from django.db import IntegrityError
+from django.views import View
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from rest_framework import generics, status, viewsets
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from schedule_manager.models import Schedule
+from rest_framework.parsers import MultiPartParser
+from schedule_manager.models import Schedule, ScheduleImport, ScheduleTarget
+from schedule_manager.filters import ScheduleFilter
+from schedule_manager.pagination import ScheduleCursorPagination
+from schedule_manager.renderers import CSVRenderer, NDJSONRenderer
 from rest_framework.permissions import IsAuthenticated
-from schedule_manager.serializers import ScheduleSerializer
+from schedule_manager.routers import pin_to_primary
+from schedule_manager.utils.timeline import weekly_timeline
+from schedule_manager.utils.bulk import apply_bulk_operations
+from schedule_manager.utils.changes import fetch_changes
+from schedule_manager.utils.compaction import compact_user_schedules
+from schedule_manager.utils.coverage import bitmap_runs, combine_bitmaps, represent_interval
+from schedule_manager.utils.cache import SCHEDULE_SCOPE, versioned_response
+from schedule_manager.utils.export import stream_csv, stream_ndjson
+from schedule_manager.utils.importer import (
+    ImportConflictError,
+    ImportFileError,
+    file_fingerprint,
+    iter_import_rows,
+    resume_import,
+    run_import
+)
+from schedule_manager.utils.grouping import group_schedules_by_day
+from schedule_manager.utils.metrics import PROMETHEUS_CONTENT_TYPE, metrics
+from schedule_manager.serializers import (
+    ScheduleSerializer,
+    ScheduleRowSerializer,
+    DUPLICATE_SCHEDULE_MESSAGE,
+    ChangesQuerySerializer,
+    CompactionRequestSerializer,
+    CoverageQuerySerializer,
+    ScheduleImportSerializer,
+    ScheduleImportRequestSerializer,
+    ActiveScheduleQuerySerializer
+)
+
 
 class ScheduleViews(viewsets.ModelViewSet):
     """
@@ -13,40 +53,235 @@ class ScheduleViews(viewsets.ModelViewSet):
     serializer_class = ScheduleSerializer
     permission_classes = [IsAuthenticated]  # No need for custom permission since isn't required
     http_method_names = ['get', 'post', 'patch', 'delete']
+    filterset_class = ScheduleFilter
+    pagination_class = ScheduleCursorPagination
 
     def get_queryset(self):
         """Fetch all schedules."""
         return Schedule.objects.all()
 
+    @versioned_response(SCHEDULE_SCOPE)
+    def list(self, request, *args, **kwargs):
+        """
+        List schedules, limited to the ?fields= requested, answering unchanged
+        polls with 304 or a cached body. Rows are read with values() and
+        serialized by the read-only fast path.
+        """
+        fields = ScheduleRowSerializer.parse_fields(request.query_params.get("fields"))
+        queryset = self.filter_queryset(self.get_queryset())
+
+        # The cursor is built from the ordering columns of the last row
+        page = self.paginate_queryset(queryset.values("id", "created_at", *fields))
+        if page is not None:
+            return self.get_paginated_response(ScheduleRowSerializer(page, many=True, fields=fields).data)
+        return Response(ScheduleRowSerializer(queryset.values(*fields), many=True, fields=fields).data)
+
+    @versioned_response(SCHEDULE_SCOPE)
+    def retrieve(self, request, *args, **kwargs):
+        """Retrieve a schedule, limited to the ?fields= requested, answering unchanged polls with 304 or a cached body."""
+        fields = ScheduleRowSerializer.parse_fields(request.query_params.get("fields"))
+        queryset = self.filter_queryset(self.get_queryset()).values(*fields)
+
+        row = generics.get_object_or_404(queryset, pk=kwargs["pk"])
+        self.check_object_permissions(request, row)
+        return Response(ScheduleRowSerializer(row, fields=fields).data)
+
     def perform_create(self, serializer):
         """Automatically set the user field to the current user."""
         serializer.save(user=self.request.user)
 
+    def perform_destroy(self, instance):
+        """Soft-delete, leaving a tombstone for delta sync until it is purged."""
+        instance.soft_delete()
+
     # Custom action for retrieving schedules grouped by day
     @action(detail=False, methods=['get'])
+    @versioned_response(SCHEDULE_SCOPE)
     def grouped(self, request):
-        schedule_data = {}
+        """Return unique schedules grouped by day, fetched in a single query."""
+        schedule_data = group_schedules_by_day(self.filter_queryset(self.get_queryset()))
+        return Response({"schedule": schedule_data})
 
-        for day, _ in Schedule.DaysChoices.choices:
-            day_schedules = Schedule.objects.filter(day=day).order_by('start')  # Fixed ordering to 'start'
-            serializer = ScheduleSerializer(day_schedules, many=True)
-            unique_entries = []
-            seen = set()
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """
+        Return the schedules created, updated or deleted since the ?since=
+        cursor of the previous sync, and the cursor to pass next time.
+        Without a cursor every schedule is returned.
+        """
+        serializer = ChangesQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        since = serializer.validated_data.get("since")
 
-            for entry in serializer.data:
-                # Remove empty badge_ids and camera_ids
-                if not entry.get("badge_ids"):
-                    entry.pop("badge_ids", None)
-                if not entry.get("camera_ids"):
-                    entry.pop("camera_ids", None)
+        retention = timedelta(seconds=settings.SCHEDULE_TOMBSTONE_RETENTION)
+        if since is not None and since[0] < timezone.now() - retention:
+            return Response(
+                {"detail": "The cursor is older than the tombstone retention, sync again without it."},
+                status=status.HTTP_410_GONE
+            )
 
-                # Create a unique identifier based on the fields you want to consider
-                unique_key = (entry["start"], entry["stop"], tuple(entry.get("badge_ids", [])), tuple(entry.get("camera_ids", [])))
+        # A lagging replica would let the cursor skip changes it has not seen
+        pin_to_primary()
+        return Response(fetch_changes(since, serializer.validated_data["page_size"]))
 
-                if unique_key not in seen:
-                    seen.add(unique_key)
-                    unique_entries.append(entry)
+    @action(detail=False, methods=['get'])
+    def active(self, request):
+        """Return whether a camera or badge is covered by a schedule at the given time."""
+        serializer = ActiveScheduleQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
 
-            schedule_data[day] = unique_entries
+        if "camera_id" in data:
+            target = (ScheduleTarget.KindChoices.CAMERA, str(data["camera_id"]))
+        else:
+            target = (ScheduleTarget.KindChoices.BADGE, data["badge_id"])
 
-        return Response({"schedule": schedule_data})
+        is_active = weekly_timeline.is_active(*target, data["at"])
+        return Response({**serializer.data, "active": is_active})
+
+    @action(detail=False, methods=['get'])
+    def coverage(self, request):
+        """
+        Return the minutes of the week covered by any (union) or all
+        (intersection) of the given cameras, or by none of them (uncovered),
+        as intervals. The cameras' compiled weekly bitmaps are combined with
+        vectorized bitwise operations.
+        """
+        serializer = CoverageQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        data = serializer.validated_data
+
+        bitmaps = [
+            weekly_timeline.bitmap(ScheduleTarget.KindChoices.CAMERA, str(camera_id))
+            for camera_id in dict.fromkeys(data["camera_ids"])
+        ]
+        minutes = combine_bitmaps(bitmaps, data["operation"])
+        return Response({
+            **serializer.data,
+            "minutes": int(minutes.sum()),
+            "intervals": [represent_interval(start, stop) for start, stop in bitmap_runs(minutes)],
+        })
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create, update and delete schedules in one batch.
+        Valid operations are written together and every operation gets its own result.
+        """
+        operations = request.data
+        if not isinstance(operations, list):
+            return Response(
+                {"detail": "Expected a list of operations."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if len(operations) > settings.SCHEDULE_BULK_MAX_OPERATIONS:
+            return Response(
+                {"detail": f"A batch can contain at most {settings.SCHEDULE_BULK_MAX_OPERATIONS} operations."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            results = apply_bulk_operations(operations, request)
+        except IntegrityError:
+            # A concurrent request wrote a conflicting schedule after validation
+            return Response(
+                {"detail": DUPLICATE_SCHEDULE_MESSAGE},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response({"results": results})
+
+    @action(detail=False, methods=['post'])
+    def compact(self, request):
+        """
+        Merge the overlapping and adjacent schedules of the current user that
+        share a day and a set of cameras or badges, and report the rows removed
+        and the response bytes saved. Nothing is written with dry_run.
+        """
+        serializer = CompactionRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        report = compact_user_schedules([request.user.pk], dry_run=serializer.validated_data["dry_run"])
+        return Response({**serializer.data, **report.as_dict()})
+
+    @action(detail=False, methods=['post'], url_path="import", url_name="import", parser_classes=[MultiPartParser])
+    def import_schedules(self, request):
+        """
+        Import the schedules of an uploaded CSV or JSON Lines file for the
+        current user, reporting the rejected rows. The file is parsed as a
+        stream and committed in chunks; uploading it again with the same key
+        resumes an interrupted import, the key being the file's SHA-256 by
+        default. Resuming with another file, or a completed import, answers
+        409. A request imports at most
+        SCHEDULE_IMPORT_REQUEST_CHUNKS chunks and answers with the import
+        still running, for the client to upload the file again.
+        """
+        serializer = ScheduleImportRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data["file"]
+        file_format = ScheduleImport.format_for(upload.name)
+        fingerprint = file_fingerprint(upload.file)
+
+        try:
+            record = resume_import(
+                request.user,
+                serializer.validated_data.get("key", f"sha256:{fingerprint}"),
+                file_format,
+                fingerprint,
+            )
+        except ImportConflictError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_409_CONFLICT)
+
+        try:
+            run_import(
+                record,
+                iter_import_rows(upload.file, file_format),
+                user=request.user,
+                max_chunks=settings.SCHEDULE_IMPORT_REQUEST_CHUNKS,
+            )
+        except ImportFileError as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        except IntegrityError:
+            # A concurrent request wrote a conflicting schedule, the upload resumes at the failed chunk
+            return Response(
+                {"detail": DUPLICATE_SCHEDULE_MESSAGE},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        return Response(ScheduleImportSerializer(record).data)
+
+    @action(detail=False, methods=['get'], renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request):
+        """
+        Stream every schedule as NDJSON (default) or CSV with ?format=csv.
+        Rows are read in chunks, so memory stays flat regardless of the table size.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        renderer = request.accepted_renderer
+
+        if renderer.format == CSVRenderer.format:
+            content = stream_csv(queryset)
+        else:
+            content = stream_ndjson(queryset)
+
+        response = StreamingHttpResponse(content, content_type=f"{renderer.media_type}; charset={renderer.charset}")
+        response["Content-Disposition"] = f'attachment; filename="schedules.{renderer.format}"'
+        return response
+
+
+class MetricsView(View):
+    """
+    Expose the request instrumentation metrics in the Prometheus text format.
+    """
+
+    def get(self, request):
+        """Return the metrics of this worker process."""
+        if not settings.SCHEDULE_INSTRUMENTATION:
+            raise Http404
+
+        token = settings.SCHEDULE_METRICS_TOKEN
+        if token and not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+            return HttpResponse(status=status.HTTP_401_UNAUTHORIZED)
+
+        return HttpResponse(metrics.render(), content_type=PROMETHEUS_CONTENT_TYPE)